@@ -1,18 +1,26 @@
 """
 App factory and configuration.
-Creates the Dash app instance and registers all components and callbacks.
+Creates the Dash app instance and registers all components, callbacks and routes.
 """
 
+import time
+
 import dash
 from layouts.main_layout import create_main_layout
 from callbacks import register_all_callbacks
+from routes import register_all_routes
+from utils.warmup import start_warmup
 
 
 def create_app():
     """Create and configure the Dash application."""
+    start = time.perf_counter()
     app = dash.Dash(__name__)
 
     app.layout = create_main_layout()
     register_all_callbacks(app)
+    register_all_routes(app)
 
-    return app
\ No newline at end of file
+    print(f"App created in {time.perf_counter() - start:.2f}s", flush=True)
+    start_warmup()
+    return app
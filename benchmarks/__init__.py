@@ -0,0 +1,3 @@
+"""
+Benchmarks for loading, channel listing, decoding and plotting MDF files.
+"""
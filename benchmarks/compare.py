@@ -0,0 +1,57 @@
+"""
+Compare two benchmark result files step by step:
+
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+
+
+def _key(result):
+    config = result['config']
+    return (config['version'], config['groups'], config['channels_per_group'],
+            config['duration'], config['rate'])
+
+
+def compare(baseline, candidate, threshold=1.10):
+    """Return rows of (config, step, baseline s, candidate s, ratio, flag)."""
+    base_results = {_key(r): r for r in baseline['results'] if 'steps' in r}
+    rows = []
+    for result in candidate['results']:
+        base = base_results.get(_key(result))
+        if base is None or 'steps' not in result:
+            continue
+        for step, timing in result['steps'].items():
+            if step not in base['steps']:
+                continue
+            old = base['steps'][step]['median']
+            new = timing['median']
+            ratio = new / old if old else float('inf')
+            flag = 'slower' if ratio > threshold else 'faster' if ratio < 1 / threshold else ''
+            rows.append((_key(result), step, old, new, ratio, flag))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=1.10,
+                        help='ratio beyond which a step is flagged (default 1.10)')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['environment'].get('commit')}")
+    print(f"candidate: {candidate['environment'].get('commit')}")
+    for key, step, old, new, ratio, flag in compare(baseline, candidate, args.threshold):
+        print(f"MDF {key[0]} {key[1]}x{key[2]}  {step:<24} {old * 1000:10.2f} ms "
+              f"-> {new * 1000:10.2f} ms  x{ratio:5.2f} {flag}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark harness for the MDF load, channel listing, decode and plot paths.
+
+Generates synthetic MDF files, times the operations logscope performs on
+them and writes the results as JSON for comparison between versions:
+
+    python -m benchmarks.run --preset medium --output bench.json
+    python -m benchmarks.compare old.json bench.json
+
+Each configuration runs in a fresh process so caches start cold and the
+reported peak RSS belongs to that configuration alone.
+"""
+
+import argparse
+import base64
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_mdf, sample_count
+
+
+PRESETS = {
+    'small': {'groups': 2, 'channels_per_group': 20, 'duration': 60.0, 'rate': 100.0},
+    'medium': {'groups': 4, 'channels_per_group': 100, 'duration': 600.0, 'rate': 100.0},
+    'large': {'groups': 8, 'channels_per_group': 250, 'duration': 1800.0, 'rate': 200.0},
+}
+
+# Channels decoded and plotted per configuration
+DECODE_CHANNELS = 20
+PLOT_CHANNELS = 4
+
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in MiB."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def timed(fn, repeat=1):
+    """Run fn repeat times and return (last result, timing summary in seconds)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, {
+        'runs': len(times),
+        'min': min(times),
+        'median': statistics.median(times),
+        'max': max(times),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_config(config, work_dir, repeat):
+    """Benchmark one configuration; runs inside a fresh process."""
+    # Keep uploads, catalog and sessions of the run out of the real directories
+    os.environ['LOGSCOPE_UPLOAD_DIR'] = os.path.join(work_dir, 'uploads')
+    os.environ['LOGSCOPE_SESSION_DIR'] = os.path.join(work_dir, 'sessions')
+    os.environ.setdefault('LOGSCOPE_BUILD_PYRAMIDS', '0')
+
+    from asammdf import MDF
+    from callbacks.file_handlers import process_mdf_file, scan_mdf_metadata
+    from components.visualization import create_signal_figure
+    from utils.channel_index import ChannelIndex
+    from utils.mdf_cache import mdf_cache
+    from utils.plot_engine import build_traces
+    from utils.shared_signals import shared_signals
+    from utils.upload_store import save_base64_upload
+
+    steps = {}
+    name = f"bench_v{config['version']}_{config['groups']}x{config['channels_per_group']}"
+    ext = '.mf4' if config['version'].startswith('4') else '.mdf'
+    path = os.path.join(work_dir, name + ext)
+
+    _, steps['generate'] = timed(lambda: generate_mdf(
+        path, config['version'], config['groups'], config['channels_per_group'],
+        config['duration'], config['rate']))
+
+    # Upload path: base64 payload as sent by dcc.Upload, then a duplicate upload
+    with open(path, 'rb') as f:
+        contents = 'data:application/octet-stream;base64,' + base64.b64encode(f.read()).decode()
+    _, steps['save_upload'] = timed(lambda: save_base64_upload(contents, name + ext))
+    _, steps['save_upload_duplicate'] = timed(lambda: save_base64_upload(contents, name + ext),
+                                              repeat)
+    del contents
+
+    # Opening and scanning with asammdf, bypassing every cache
+    def open_and_scan():
+        mdf = MDF(path)
+        try:
+            return scan_mdf_metadata(mdf)
+        finally:
+            mdf.close()
+    metadata, steps['open_scan'] = timed(open_and_scan, repeat)
+
+    # process_mdf_file: first load fills the catalog, later loads are answered from it
+    result, steps['load_cold'] = timed(lambda: process_mdf_file(path, 'manual'))
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    file_id = result['data']['file_id']
+    mdf_cache.evict_file(path)
+    _, steps['load_catalog'] = timed(lambda: process_mdf_file(path, 'manual', file_id=file_id),
+                                     repeat)
+
+    names = metadata['signal_names']
+    index, steps['channel_index_build'] = timed(lambda: ChannelIndex(names), repeat)
+    _, steps['channel_search_prefix'] = timed(lambda: index.search('G1.Ch00'), repeat)
+    _, steps['channel_search_fuzzy'] = timed(lambda: index.search('ch0042', 'fuzzy'), repeat)
+    _, steps['channel_search_regex'] = timed(lambda: index.search(r'Ch\d+5$', 'regex'), repeat)
+
+    # Per-channel decode into the shared store, cold each time
+    channels = [n for n in names if '.Ch' in n]
+    channels = channels[::max(len(channels) // DECODE_CHANNELS, 1)][:DECODE_CHANNELS]
+
+    def decode_all():
+        shared_signals.release_all()
+        for channel in channels:
+            shared_signals.get(path, channel, file_id=file_id)
+    _, decode = timed(decode_all, repeat)
+    steps['decode_per_channel'] = dict(decode, **{
+        k: decode[k] / len(channels) for k in ('min', 'median', 'max')})
+
+    # Figure generation for a few decoded channels, full range and a 10% window
+    series = [{'file_id': file_id, 'file_path': path, 'channel': channel, 'label': channel}
+              for channel in channels[:PLOT_CHANNELS]]
+    window = (config['duration'] * 0.45, config['duration'] * 0.55)
+
+    def figure(x_range):
+        traces, errors = build_traces(series, 1200, x_range=x_range)
+        return create_signal_figure(traces, errors, x_range=x_range).to_json()
+    _, steps['figure_full'] = timed(lambda: figure(None), repeat)
+    _, steps['figure_window'] = timed(lambda: figure(window), repeat)
+
+    shared_signals.release_all()
+    mdf_cache.close_all()
+    return {
+        'config': config,
+        'file_size': os.path.getsize(path),
+        'channels': len(names),
+        'samples_per_channel_total': sample_count(config),
+        'steps': steps,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def _child(config, work_dir, repeat, queue):
+    try:
+        queue.put(run_config(config, work_dir, repeat))
+    except Exception as e:
+        queue.put({'config': config, 'error': f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(config, repeat):
+    """Run one configuration in a spawned process and return its result."""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    with tempfile.TemporaryDirectory(prefix='logscope_bench_') as work_dir:
+        process = ctx.Process(target=_child, args=(config, work_dir, repeat, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+    return result
+
+
+def environment():
+    """Describe the machine and code version the benchmark ran on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    versions = {}
+    for module in ('asammdf', 'numpy', 'dash', 'plotly'):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark logscope MDF handling.')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--versions', nargs='+', default=['3.30', '4.10'],
+                        help='MDF versions to generate (default: 3.30 4.10)')
+    parser.add_argument('--groups', type=int, help='channel groups per file')
+    parser.add_argument('--channels', type=int, help='channels per group')
+    parser.add_argument('--duration', type=float, help='recording length in seconds')
+    parser.add_argument('--rate', type=float, help='sample rate of the first group in Hz')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per timed step')
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args(argv)
+
+    base = dict(PRESETS[args.preset])
+    for key, value in (('groups', args.groups), ('channels_per_group', args.channels),
+                       ('duration', args.duration), ('rate', args.rate)):
+        if value is not None:
+            base[key] = value
+
+    results = []
+    for version in args.versions:
+        config = dict(base, version=version)
+        print(f"Benchmarking MDF {version}: {config}", flush=True)
+        result = run_isolated(config, args.repeat)
+        if 'error' in result:
+            print(f"  failed: {result['error']}", flush=True)
+        else:
+            for step, timing in result['steps'].items():
+                print(f"  {step:<24} {timing['median'] * 1000:10.2f} ms", flush=True)
+            print(f"  peak RSS {result['peak_rss_mb']:.0f} MiB", flush=True)
+        results.append(result)
+
+    report = {'environment': environment(), 'preset': args.preset, 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
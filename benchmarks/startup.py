@@ -0,0 +1,137 @@
+"""
+Cold start benchmark and import-time report.
+
+Starts fresh interpreters and times importing Dash and the server-side
+modules create_app pulls in (routes and the utils used by the callbacks),
+building a Dash app with the routes registered and serving the first page
+(index, layout and callback map), then the deferred cost of the first
+MDF-related import:
+
+    python -m benchmarks.startup --runs 5 --top 15 --output startup.json
+
+Each run also records which heavy dependencies were already imported before
+first use; that list should stay empty. --top lists the slowest imports of
+the server modules from python -X importtime.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# Modules imported at startup, other than the layout and component trees
+SERVER_MODULES = (
+    'routes', 'utils.warmup', 'utils.catalog', 'utils.channel_index', 'utils.console_kernel',
+    'utils.export', 'utils.expressions', 'utils.jobs', 'utils.mdf_cache', 'utils.metrics',
+    'utils.pip_jobs', 'utils.plot_engine', 'utils.pyramid', 'utils.selection',
+    'utils.session_store', 'utils.upload_store',
+)
+
+# Dependencies that should load on first use only
+HEAVY_MODULES = ('asammdf', 'pandas', 'scipy', 'matplotlib', 'pyarrow')
+
+# Runs inside each fresh interpreter; prints one JSON line of timings
+_CHILD = r"""
+import importlib, json, sys, time
+start = time.perf_counter()
+import dash
+framework = time.perf_counter()
+for module in %(modules)r:
+    importlib.import_module(module)
+imported = time.perf_counter()
+import routes
+application = dash.Dash('logscope')
+application.layout = dash.html.Div(id='app')
+routes.register_all_routes(application)
+created = time.perf_counter()
+client = application.server.test_client()
+for path in ('/', '/_dash-layout', '/_dash-dependencies'):
+    assert client.get(path).status_code == 200, path
+served = time.perf_counter()
+eager = [m for m in %(heavy)r if m in sys.modules]
+import asammdf
+deferred = time.perf_counter()
+print('STARTUP ' + json.dumps({
+    'import_dash': framework - start,
+    'import_server': imported - framework,
+    'create_app': created - imported,
+    'first_page': served - created,
+    'ready_total': served - start,
+    'deferred_asammdf': deferred - served,
+    'eager_heavy': eager,
+}))
+""" % {'modules': SERVER_MODULES, 'heavy': HEAVY_MODULES}
+
+_IMPORT_REPORT = 'import dash, ' + ', '.join(SERVER_MODULES)
+
+
+def _child_env():
+    env = dict(os.environ, LOGSCOPE_WARMUP='0')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.getcwd(), env.get('PYTHONPATH')]))
+    return env
+
+
+def measure_once():
+    """Time one cold start in a fresh interpreter."""
+    process = subprocess.run([sys.executable, '-c', _CHILD], capture_output=True,
+                             text=True, env=_child_env())
+    for line in process.stdout.splitlines():
+        if line.startswith('STARTUP '):
+            return json.loads(line[len('STARTUP '):])
+    raise RuntimeError(f"Startup run failed:\n{process.stderr[-2000:]}")
+
+
+def import_report(top):
+    """Return the top modules by cumulative import time as (seconds, module)."""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', _IMPORT_REPORT],
+                             capture_output=True, text=True, env=_child_env())
+    rows = []
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        # Only top-level imports; nested ones are included in their parent
+        if module.startswith('  '):
+            continue
+        rows.append((int(cumulative) / 1e6, module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark logscope cold start.')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to time')
+    parser.add_argument('--top', type=int, default=15,
+                        help='slowest imports to list (0 to skip the report)')
+    parser.add_argument('--output', help='write the timings as JSON')
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.runs)]
+    summary = {step: {'median': statistics.median(r[step] for r in runs),
+                      'min': min(r[step] for r in runs),
+                      'max': max(r[step] for r in runs)}
+               for step in runs[0] if step != 'eager_heavy'}
+    for step, timing in summary.items():
+        print(f"{step:<18} {timing['median'] * 1000:10.1f} ms "
+              f"(min {timing['min'] * 1000:.1f}, max {timing['max'] * 1000:.1f})", flush=True)
+    eager = sorted({module for r in runs for module in r['eager_heavy']})
+    print(f"{'eager_heavy':<18} {', '.join(eager) or 'none'}", flush=True)
+
+    report = import_report(args.top) if args.top else []
+    if report:
+        print("\nSlowest imports of the server modules (cumulative):", flush=True)
+        for seconds, module in report:
+            print(f"  {seconds * 1000:10.1f} ms  {module}", flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'runs': runs, 'summary': summary,
+                       'imports': [{'module': m, 'seconds': s} for s, m in report]}, f, indent=2)
+        print(f"Results written to {args.output}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
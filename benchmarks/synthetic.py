@@ -0,0 +1,52 @@
+"""
+Synthetic MDF files of configurable size for benchmarking.
+"""
+
+import os
+
+import numpy as np
+
+
+def generate_mdf(path, version='4.10', groups=4, channels_per_group=50,
+                 duration=60.0, rate=100.0, seed=0):
+    """Write a synthetic MDF file and return its path.
+
+    Each group has its own master at rate * (group index + 1) Hz so groups
+    differ in length, and holds a mix of sine, ramp, noise and integer
+    channels. version is any MDF version asammdf can write ('3.30', '4.10').
+    """
+    from asammdf import MDF, Signal
+
+    rng = np.random.default_rng(seed)
+    mdf = MDF(version=version)
+    for group_index in range(groups):
+        group_rate = rate * (group_index + 1)
+        timestamps = np.arange(0, duration, 1.0 / group_rate)
+        signals = []
+        for channel_index in range(channels_per_group):
+            kind = channel_index % 4
+            if kind == 0:
+                samples = np.sin(timestamps * (channel_index + 1) * 0.1)
+            elif kind == 1:
+                samples = timestamps * channel_index
+            elif kind == 2:
+                samples = rng.normal(size=len(timestamps))
+            else:
+                samples = rng.integers(0, 255, size=len(timestamps)).astype(np.uint8)
+            signals.append(Signal(
+                samples=samples,
+                timestamps=timestamps,
+                name=f"G{group_index}.Ch{channel_index:04d}",
+                unit='V' if kind != 3 else ''
+            ))
+        mdf.append(signals, comment=f"group {group_index}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    mdf.save(path, overwrite=True)
+    mdf.close()
+    return path
+
+
+def sample_count(config):
+    """Return the number of samples per channel summed over all groups of a config."""
+    return sum(int(config['duration'] * config['rate'] * (g + 1)) for g in range(config['groups']))
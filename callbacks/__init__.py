@@ -5,13 +5,19 @@ Imports and registers all callback modules.
 
 from .ui_interactions import register_ui_callbacks
 from .file_handlers import register_file_callbacks
-from .data_processing import register_data_callbacks
 from .python_console import register_console_callbacks
+from .plot_handlers import register_plot_callbacks
+from .channel_search import register_search_callbacks
+from .export_handlers import register_export_callbacks
+from .derived_signals import register_derived_callbacks
 
 
 def register_all_callbacks(app):
     """Register all application callbacks."""
     register_ui_callbacks(app)
     register_file_callbacks(app)
-    register_data_callbacks(app)
-    register_console_callbacks(app)
\ No newline at end of file
+    register_console_callbacks(app)
+    register_plot_callbacks(app)
+    register_search_callbacks(app)
+    register_export_callbacks(app)
+    register_derived_callbacks(app)
\ No newline at end of file
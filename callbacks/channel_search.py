@@ -0,0 +1,114 @@
+"""
+Channel search callbacks backed by the server-side name index.
+"""
+
+import re
+from dash import Input, Output, State, callback_context, no_update
+from dash.exceptions import PreventUpdate
+from utils.channel_index import get_channel_index
+from utils.session_store import session_store
+from utils.plot_engine import channel_key, split_channel_key
+from utils.expressions import DERIVED_PREFIX
+
+
+# Channel names sent to the browser per page
+SEARCH_PAGE_SIZE = 100
+
+# Options offered by the plot channel selector while typing
+SELECTOR_OPTION_LIMIT = 50
+
+
+def register_search_callbacks(app):
+    """Register channel search callbacks."""
+
+    @app.callback(
+        [Output('string-list-field', 'value'),
+         Output('channel-search-page-label', 'children'),
+         Output('channel-search-page', 'data')],
+        [Input('channel-search-input', 'value'),
+         Input('channel-search-mode', 'value'),
+         Input('channel-search-prev', 'n_clicks'),
+         Input('channel-search-next', 'n_clicks'),
+         Input('uploaded-file-mdf-data', 'data')],
+        [State('channel-search-page', 'data')]
+    )
+    def search_channels(query, mode, prev_clicks, next_clicks, mdf_data, page):
+        """Show one page of channel names matching the search."""
+        file_info = session_store.get_file(mdf_data)
+        if not file_info:
+            return "", "", 0
+
+        trigger_id = callback_context.triggered[0]['prop_id'].split('.')[0] \
+            if callback_context.triggered else None
+        page = page or 0
+        if trigger_id == 'channel-search-next':
+            page += 1
+        elif trigger_id == 'channel-search-prev':
+            page = max(page - 1, 0)
+        else:
+            page = 0
+
+        try:
+            index = get_channel_index(file_info['file_path'], file_info['file_id'],
+                                      file_info.get('selection'))
+            names, total = index.search(query, mode, page * SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE)
+        except re.error as e:
+            return no_update, f"Invalid regex: {e}", no_update
+        except (KeyError, OSError) as e:
+            return f"Error: {e}", "", 0
+
+        if not names and page > 0:
+            # Ran past the last page
+            raise PreventUpdate
+
+        first = page * SEARCH_PAGE_SIZE + 1 if names else 0
+        label = f"{first}-{page * SEARCH_PAGE_SIZE + len(names)} of {total}"
+        return '\n'.join(names) if names else 'No signals found', label, page
+
+    # Fill the plot channel selector from the index as the user types
+    @app.callback(
+        Output('channel-select', 'options'),
+        [Input('channel-select', 'search_value'),
+         Input('uploaded-file-mdf-data', 'data'),
+         Input('derived-store', 'data')],
+        [State('channel-select', 'value'),
+         State('session-id-store', 'data')]
+    )
+    def update_channel_options(search_value, mdf_data, derived_data, selected, session_id):
+        """Offer the active file's best matches, keeping channels selected from other files."""
+        selected = selected or []
+        options = [{'label': channel_label(key), 'value': key} for key in selected]
+        file_info = session_store.get_file(mdf_data)
+        if not file_info:
+            return options
+
+        # Derived channels of the session, evaluated against the active file
+        query = (search_value or '').lower()
+        for name in (derived_data or {}).get('names', []):
+            key = channel_key(file_info['file_id'], DERIVED_PREFIX + name)
+            if query in name.lower() and key not in selected:
+                options.append({'label': channel_label(key), 'value': key})
+
+        try:
+            index = get_channel_index(file_info['file_path'], file_info['file_id'],
+                                      file_info.get('selection'))
+            names, _ = index.search(search_value, 'prefix', 0, SELECTOR_OPTION_LIMIT)
+            if search_value and not names:
+                names, _ = index.search(search_value, 'fuzzy', 0, SELECTOR_OPTION_LIMIT)
+        except (KeyError, OSError):
+            return options
+
+        for name in names:
+            key = channel_key(file_info['file_id'], name)
+            if key not in selected:
+                options.append({'label': channel_label(key), 'value': key})
+        return options
+
+
+def channel_label(key):
+    """Return a display label for a selector value, prefixed with its file name."""
+    file_id, channel = split_channel_key(key)
+    file_info = session_store.get_file(file_id)
+    if not file_info:
+        return channel
+    return f"{file_info['original_filename']}: {channel}"
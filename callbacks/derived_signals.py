@@ -0,0 +1,36 @@
+"""
+Callbacks for defining derived channels.
+"""
+
+from dash import Input, Output, State
+from dash.exceptions import PreventUpdate
+from utils.expressions import ExpressionError, parse_definitions
+from utils.session_store import session_store
+
+
+def register_derived_callbacks(app):
+    """Register derived channel callbacks."""
+
+    @app.callback(
+        [Output('derived-store', 'data'),
+         Output('derived-status', 'children')],
+        [Input('derived-apply', 'n_clicks')],
+        [State('derived-input', 'value'),
+         State('session-id-store', 'data')],
+        prevent_initial_call=True
+    )
+    def apply_derived_definitions(n_clicks, text, session_id):
+        """Validate the definitions and keep them for the session's plots."""
+        if not n_clicks or not session_id:
+            raise PreventUpdate
+
+        try:
+            definitions = parse_definitions(text)
+        except ExpressionError as e:
+            return {'names': []}, f"Error: {e}"
+
+        session_store.set(session_id, 'derived', definitions)
+        names = list(definitions)
+        status = f"{len(names)} derived channel(s): {', '.join(names)}" if names \
+            else "No derived channels"
+        return {'names': names}, status
@@ -0,0 +1,85 @@
+"""
+Callbacks for exporting recordings to Parquet / Arrow.
+"""
+
+from dash import Input, Output, State, no_update
+from dash.exceptions import PreventUpdate
+from utils.export import export_mdf
+from utils.jobs import job_queue, QUEUED, LOADING, INDEXED, FAILED
+from utils.plot_engine import parse_x_range, split_channel_key
+from utils.session_store import session_store
+
+
+def register_export_callbacks(app):
+    """Register export callbacks."""
+
+    @app.callback(
+        [Output('export-job-store', 'data'),
+         Output('export-poll', 'disabled')],
+        [Input('export-button', 'n_clicks')],
+        [State('export-format', 'value'),
+         State('export-options', 'value'),
+         State('uploaded-file-mdf-data', 'data'),
+         State('channel-select', 'value'),
+         State('main-plot', 'relayoutData')],
+        prevent_initial_call=True
+    )
+    def start_export(n_clicks, fmt, options, mdf_data, channels, relayout_data):
+        """Queue an export of the active file as a background job."""
+        if not n_clicks:
+            raise PreventUpdate
+
+        file_info = session_store.get_file(mdf_data)
+        if not file_info:
+            return {'job_id': job_queue.fail('export', 'No file loaded')}, False
+
+        file_id = file_info['file_id']
+        options = options or []
+
+        selected = None
+        if 'selected' in options:
+            selected = [split_channel_key(key)[1] for key in channels or []
+                        if split_channel_key(key)[0] == file_id]
+            if not selected:
+                return {'job_id': job_queue.fail('export', 'No plotted channels of this file')}, False
+
+        t_range = None
+        if 'window' in options:
+            x_range = parse_x_range(relayout_data)
+            if x_range:
+                t_range = list(x_range)
+
+        job_id = job_queue.submit('export', export_job, file_info['file_path'], fmt,
+                                  selected, t_range, file_id)
+        return {'job_id': job_id}, False
+
+    @app.callback(
+        [Output('export-status', 'children'),
+         Output('export-poll', 'disabled', allow_duplicate=True)],
+        [Input('export-poll', 'n_intervals'),
+         Input('export-job-store', 'data')],
+        prevent_initial_call=True
+    )
+    def poll_export(n_intervals, job_data):
+        """Show the progress of the running export."""
+        job = job_queue.get((job_data or {}).get('job_id'))
+        if job is None:
+            return no_update, True
+
+        if job.status == QUEUED:
+            position = job_queue.queue_position(job.job_id)
+            return (f"Export queued ({position} ahead)" if position else "Export queued"), False
+        if job.status == LOADING:
+            return job.message, False
+        if job.status == FAILED:
+            return job.message, True
+        return f"Exported to {job.result}", True
+
+
+def export_job(job, file_path, fmt, channels, t_range, file_id):
+    """Job body: export a file and report progress through the job."""
+    job.update(LOADING, 'Exporting...')
+    out_dir = export_mdf(file_path, fmt, channels=channels, t_range=t_range, file_id=file_id,
+                         progress=lambda message: job.update(LOADING, message))
+    job.update(INDEXED, f"Exported to {out_dir}")
+    return out_dir
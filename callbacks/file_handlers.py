@@ -2,14 +2,26 @@
 File handling callbacks for upload and browse functionality.
 """
 
-import asammdf
-import base64
+import datetime
 import os
-import tempfile
-import pandas as pd
-from dash import Input, Output, State, callback_context, html
+from dash import Input, Output, State, callback_context, html, no_update
 from dash.exceptions import PreventUpdate
 import uuid
+from utils.mdf_cache import mdf_cache
+from utils.upload_store import content_store, pop_completed_upload, save_base64_upload
+from utils.pyramid import schedule_pyramid_build
+from utils.jobs import job_queue, QUEUED, LOADING, INDEXED, FAILED, FINISHED_STATES
+from utils.channel_index import get_channel_index
+from utils.export import find_columnar_copy, columnar_signal_names
+from utils.catalog import catalog
+from utils.session_store import session_store
+from utils.metrics import span
+from utils.selection import (format_path_spec, parse_path_spec, select_channels,
+                             window_label)
+
+
+# Recordings that can be loaded side by side
+MAX_LOADED_FILES = 8
 
 
 def register_file_callbacks(app):
@@ -49,21 +61,132 @@ def register_file_callbacks(app):
         Input('file-upload-area', 'id')
     )
 
-    # Main file handling callback
+    # Stream browsed or dropped files to the server in raw chunks instead of
+    # letting dcc.Upload read them into a base64 data URL
+    app.clientside_callback(
+        """
+        function(id) {
+            const upload = document.getElementById('file-upload-area');
+            if (!upload || upload.dataset.chunkedUpload) {
+                return window.dash_clientside.no_update;
+            }
+            upload.dataset.chunkedUpload = '1';
+
+            const CHUNK_SIZE = 8 * 1024 * 1024;
+            const MAX_RETRIES = 5;
+
+            function setProgress(text) {
+                const progress = document.getElementById('upload-progress');
+                if (progress) progress.textContent = text;
+            }
+
+            function newUploadId() {
+                if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+                return Date.now().toString(16) + '-' + Math.random().toString(16).slice(2);
+            }
+
+            async function fetchReceived(uploadId) {
+                const resp = await fetch('upload/status/' + uploadId);
+                const info = await resp.json();
+                return info.received || 0;
+            }
+
+            async function sendFile(file) {
+                const uploadId = newUploadId();
+                let offset = 0;
+                let retries = 0;
+
+                while (true) {
+                    const params = new URLSearchParams({
+                        upload_id: uploadId,
+                        filename: file.name,
+                        offset: offset,
+                        total: file.size
+                    });
+                    let info;
+                    try {
+                        const resp = await fetch('upload/chunk?' + params, {
+                            method: 'POST',
+                            headers: {'Content-Type': 'application/octet-stream'},
+                            body: file.slice(offset, offset + CHUNK_SIZE)
+                        });
+                        info = await resp.json();
+                        if (resp.status === 400) {
+                            setProgress('Upload failed: ' + info.error);
+                            return;
+                        }
+                        if (!resp.ok && resp.status !== 409) throw new Error(info.error);
+                        retries = 0;
+                    } catch (err) {
+                        // Resume from whatever the server already has
+                        if (++retries > MAX_RETRIES) {
+                            setProgress('Upload failed: ' + err);
+                            return;
+                        }
+                        await new Promise(r => setTimeout(r, 1000 * retries));
+                        try { offset = await fetchReceived(uploadId); } catch (e) {}
+                        continue;
+                    }
+
+                    offset = info.received;
+                    const percent = file.size ? Math.floor(100 * offset / file.size) : 100;
+                    setProgress('Uploading ' + file.name + ': ' + percent + '%');
+                    if (info.complete) break;
+                }
+
+                setProgress('Uploaded ' + file.name + ', loading...');
+                window.dash_clientside.set_props('chunked-upload-store', {
+                    data: {upload_id: uploadId, filename: file.name, total: file.size}
+                });
+            }
+
+            async function sendFiles(files) {
+                for (const file of files) {
+                    await sendFile(file);
+                }
+            }
+
+            function intercept(e, files) {
+                if (!files || !files.length) return;
+                e.preventDefault();
+                e.stopPropagation();
+                sendFiles(Array.from(files));
+            }
+
+            // Capture phase runs before dcc.Upload's own handlers
+            upload.addEventListener('drop', function(e) {
+                intercept(e, e.dataTransfer && e.dataTransfer.files);
+            }, true);
+            upload.addEventListener('change', function(e) {
+                if (e.target && e.target.type === 'file') {
+                    intercept(e, e.target.files);
+                    e.target.value = '';
+                }
+            }, true);
+
+            return window.dash_clientside.no_update;
+        }
+        """,
+        Output('upload-progress', 'title'),  # Dummy output
+        Input('file-upload-area', 'id')
+    )
+
+    # Main file handling callback - queues load jobs and starts polling them
     @app.callback(
-        [Output('uploaded-files-store', 'data'),
-         Output('file-path-input', 'value'),
-         Output('string-list-field', 'value'),
+        [Output('file-load-job-store', 'data'),
+         Output('file-load-poll', 'disabled'),
          Output('file-upload-area', 'contents'),  # Clear contents to allow re-upload
          Output('file-upload-area', 'filename')],  # Clear filename too
         [Input('file-upload-area', 'contents'),
-         Input('file-path-input', 'n_submit')],  # Manual path entry
+         Input('file-path-input', 'n_submit'),  # Manual path entry
+         Input('chunked-upload-store', 'data')],  # Finished chunked upload
         [State('file-upload-area', 'filename'),
          State('file-path-input', 'value'),
-         State('uploaded-files-store', 'data')]
+         State('file-load-job-store', 'data'),
+         State('session-id-store', 'data')]
     )
-    def handle_file_operations(contents, n_submit,
-                              filename, manual_path, current_store):
+    def handle_file_operations(contents, n_submit, chunked_upload,
+                              filename, manual_path, job_data, session_id):
         """Handle all file operations: browse, drag-drop, and manual entry."""
 
         ctx = callback_context
@@ -71,89 +194,163 @@ def register_file_callbacks(app):
             raise PreventUpdate
 
         trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
-
-        # Initialize returns - always clear upload contents to allow re-upload
-        files_data = current_store or {}
-        path_display = manual_path or ""
-        signals_text = ""
+        job_ids = []
 
         # Handle manual path entry (on Enter key)
         if trigger_id == 'file-path-input' and n_submit:
             if manual_path and manual_path.strip():
-                # Force processing even if it's the same file
-                file_id = str(uuid.uuid4())
-                result = process_mdf_file(manual_path.strip(), 'manual', file_id=file_id)
-                if result['success']:
-                    files_data = result['data']
-                    path_display = manual_path.strip()
-                    signals_text = result['signals_text']
+                # The path may be followed by a channel and time window selection
+                try:
+                    path, selection = parse_path_spec(manual_path)
+                except ValueError as e:
+                    job_ids.append(job_queue.fail('load', f"Error: {e}"))
                 else:
-                    signals_text = f"Error: {result['error']}"
-            return files_data, path_display, signals_text, None, None
+                    # Generate unique ID for this load, forcing processing even for the same file
+                    job_ids.append(job_queue.submit('load', load_file_job, path, 'manual',
+                                                    file_id=str(uuid.uuid4()),
+                                                    session_id=session_id,
+                                                    selection=selection))
+
+        # Handle a chunked upload that the browser streamed to disk
+        elif trigger_id == 'chunked-upload-store' and chunked_upload:
+            upload = pop_completed_upload(chunked_upload.get('upload_id', ''))
+            if not upload:
+                job_ids.append(job_queue.fail('load', "Error: Upload not found or incomplete"))
+            else:
+                job_ids.append(job_queue.submit('load', load_file_job, upload['path'], 'upload',
+                                                original_filename=upload['filename'],
+                                                file_id=str(uuid.uuid4()),
+                                                remove_on_error=True,
+                                                session_id=session_id))
 
-        # Handle file upload (browse or drag-and-drop)
+        # Handle file upload (browse or drag-and-drop), one job per file
         elif trigger_id == 'file-upload-area' and contents:
-            # Generate unique ID for this upload
-            file_id = str(uuid.uuid4())
-
-            # Check file extension
-            if not filename.lower().endswith(('.mdf', '.mf4', '.dat')):
-                error_msg = f"Error: Only MDF files are supported (got {filename})"
-                return files_data, path_display, error_msg, None, None
-
-            # Save uploaded file to temp location
-            temp_path = save_uploaded_file(contents, filename, file_id)
-            if temp_path:
-                result = process_mdf_file(temp_path, 'upload', original_filename=filename, file_id=file_id)
-                if result['success']:
-                    files_data = result['data']
-                    path_display = temp_path
-                    signals_text = result['signals_text']
+            if not isinstance(contents, list):
+                contents, filename = [contents], [filename]
+            for file_contents, name in zip(contents, filename):
+                # Check file extension
+                if not name.lower().endswith(('.mdf', '.mf4', '.dat')):
+                    job_ids.append(job_queue.fail(
+                        'load', f"Error: Only MDF files are supported (got {name})"))
                 else:
-                    signals_text = f"Error: {result['error']}"
-                    # Clean up temp file on error
-                    if os.path.exists(temp_path):
-                        try:
-                            os.remove(temp_path)
-                        except:
-                            pass
-            else:
-                signals_text = "Error: Failed to save uploaded file"
+                    job_ids.append(job_queue.submit('load', save_and_load_job, file_contents,
+                                                    name, file_id=str(uuid.uuid4()),
+                                                    session_id=session_id))
+
+        if not job_ids:
+            return no_update, no_update, None, None
+
+        # Keep polling jobs that are still running alongside the new ones
+        running = []
+        for job_id in (job_data or {}).get('job_ids', []):
+            job = job_queue.get(job_id)
+            if job and job.status not in FINISHED_STATES:
+                running.append(job_id)
 
         # Always clear contents to allow re-upload of same file
-        return files_data, path_display, signals_text, None, None
+        return {'job_ids': running + job_ids}, False, None, None
 
-    # Store MDF processing results in a separate store
+    # Poll the running load jobs and publish their results
     @app.callback(
-        Output('uploaded-file-mdf-data', 'data'),
+        [Output('uploaded-files-store', 'data'),
+         Output('file-path-input', 'value'),
+         Output('file-load-status', 'children'),
+         Output('file-load-poll', 'disabled', allow_duplicate=True)],
+        [Input('file-load-poll', 'n_intervals'),
+         Input('file-load-job-store', 'data')],
+        [State('uploaded-files-store', 'data'),
+         State('session-id-store', 'data')],
+        prevent_initial_call=True
+    )
+    def poll_file_load_job(n_intervals, job_data, files_data, session_id):
+        """Report load job progress and add indexed files to the loaded set."""
+        file_ids = list((files_data or {}).get('file_ids', []))
+        path_display = no_update
+        status_lines = []
+        running = False
+
+        for job_id in (job_data or {}).get('job_ids', []):
+            job = job_queue.get(job_id)
+            if job is None:
+                continue
+
+            if job.status == QUEUED:
+                position = job_queue.queue_position(job.job_id)
+                status_lines.append(f"Queued ({position} ahead)" if position else "Queued")
+                running = True
+            elif job.status == LOADING:
+                status_lines.append(job.message)
+                running = True
+            elif job.status == FAILED:
+                status_lines.append(job.message)
+            else:
+                status_lines.append(job.message)
+                file_id = job.result['data']['file_id']
+                if file_id not in file_ids:
+                    file_ids.append(file_id)
+                    path_display = job.result['path_display']
+
+        # Hold a bounded number of files; the oldest drop out first and
+        # release their stored upload unless a kept file uses the same blob
+        kept_ids = file_ids[-MAX_LOADED_FILES:]
+        kept_paths = {os.path.realpath(info['file_path'])
+                      for info in map(session_store.get_file, kept_ids) if info}
+        for dropped_id in file_ids[:-MAX_LOADED_FILES]:
+            dropped = session_store.get_file(dropped_id)
+            if dropped and (not session_id
+                            or os.path.realpath(dropped['file_path']) not in kept_paths):
+                content_store.release(dropped['file_path'], session_id or dropped_id)
+        file_ids = kept_ids
+        files_out = {'file_ids': file_ids} if file_ids != (files_data or {}).get('file_ids') \
+            else no_update
+        status = html.Div([html.Div(line) for line in status_lines])
+        return files_out, path_display, status, not running
+
+    # Offer the loaded files for selection, switching to the newest one
+    @app.callback(
+        [Output('loaded-files-select', 'options'),
+         Output('loaded-files-select', 'value')],
         [Input('uploaded-files-store', 'data')]
     )
-    def update_mdf_data_store(files_data):
-        """Update MDF data store when a new file is loaded."""
-        if files_data and 'signal_names' in files_data:
-            return {
-                'file_path': files_data.get('file_path'),
-                'signal_names': files_data.get('signal_names'),
-                'signal_count': files_data.get('signal_count'),
-                'groups_count': files_data.get('groups_count'),
-                'mdf_version': files_data.get('mdf_version'),
-                'processed_time': files_data.get('processed_time'),
-                'file_id': files_data.get('file_id')
-            }
+    def update_loaded_files(files_data):
+        """List loaded files and make the most recent one active."""
+        options = []
+        for file_id in (files_data or {}).get('file_ids', []):
+            file_info = session_store.get_file(file_id)
+            if file_info:
+                label = f"{file_info['original_filename']} ({file_info['signal_count']} signals)"
+                options.append({'label': label, 'value': file_id})
+        return options, options[-1]['value'] if options else None
+
+    # Store the active file's handle in a separate store
+    @app.callback(
+        Output('uploaded-file-mdf-data', 'data'),
+        [Input('loaded-files-select', 'value')],
+        [State('session-id-store', 'data')]
+    )
+    def update_mdf_data_store(active_file_id, session_id):
+        """Update MDF data store when the active file changes."""
+        file_info = session_store.get_file(active_file_id)
+        if file_info:
+            # Using the session's files keeps its stored uploads from expiring
+            content_store.touch_holder(session_id or file_info['file_id'])
+            # Only the handle goes to the browser; metadata stays in the session store
+            return {'file_id': file_info['file_id']}
         return {}
 
     # Update the file path input placeholder
     @app.callback(
         Output('file-path-input', 'placeholder'),
-        [Input('uploaded-files-store', 'data')]
+        [Input('uploaded-file-mdf-data', 'data')]
     )
-    def update_placeholder(files_data):
+    def update_placeholder(mdf_data):
         """Update placeholder based on current state."""
-        if files_data and files_data.get('file_path'):
-            basename = os.path.basename(files_data.get('file_path', ''))
-            signal_count = files_data.get('signal_count', 0)
+        file_info = session_store.get_file(mdf_data)
+        if file_info and file_info.get('file_path'):
+            basename = os.path.basename(file_info.get('file_path', ''))
+            signal_count = file_info.get('signal_count', 0)
             return f'Current: {basename} ({signal_count} signals) | Enter new path...'
-        return 'Enter MDF file path and press Enter...'
+        return 'Enter MDF file path (optionally | channel globs | t0..t1) and press Enter...'
 
     # Visual feedback for drag and drop
     @app.callback(
@@ -169,60 +366,57 @@ def register_file_callbacks(app):
         return current_style
 
 
-def save_uploaded_file(contents, filename, file_id):
-    """Save uploaded file content to a temporary location."""
-    try:
-        # Create temp directory if it doesn't exist
-        temp_dir = os.path.join(tempfile.gettempdir(), 'logscope_uploads')
-        os.makedirs(temp_dir, exist_ok=True)
-
-        # Clean up old files (older than 1 hour)
-        cleanup_old_files(temp_dir, max_age_hours=1)
-
-        # Generate unique filename using the file_id
-        name_part, ext = os.path.splitext(filename)
-        unique_filename = f"{name_part}_{file_id[:8]}{ext}"
-        temp_path = os.path.join(temp_dir, unique_filename)
+def load_file_job(job, file_path, source, original_filename=None, file_id=None,
+                  remove_on_error=False, session_id=None, selection=None):
+    """Background job: process an MDF file and return its metadata."""
+    job.update(LOADING, f"Loading {original_filename or os.path.basename(file_path)}...")
+    # Stored uploads stay on disk while a session references them
+    holder = session_id or file_id
+    content_store.acquire(file_path, holder)
+    result = process_mdf_file(file_path, source, original_filename=original_filename,
+                              file_id=file_id, selection=selection)
+    if not result['success']:
+        # Drop the stored upload on error unless another session uses it
+        content_store.release(file_path, holder, remove_unused=remove_on_error)
+        job.error = result['error']
+        job.update(FAILED, f"Error: {result['error']}")
+        return None
 
-        # Decode and save file
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
+    # Build the channel search index now so the first search is instant
+    job.update(LOADING, "Indexing channel names...")
+    get_channel_index(file_path, file_id, selection)
 
-        with open(temp_path, 'wb') as f:
-            f.write(decoded)
+    job.update(INDEXED, result['status'])
+    return {
+        'data': session_store.put_file(result['data']),
+        'path_display': format_path_spec(file_path, selection)
+    }
 
-        print(f"File saved to: {temp_path}", flush=True)
-        return temp_path
 
+def save_and_load_job(job, contents, filename, file_id, session_id=None):
+    """Background job: save a base64 upload to the content store, then process it."""
+    job.update(LOADING, f"Saving {filename}...")
+    try:
+        file_path = save_base64_upload(contents, filename)
     except Exception as e:
         print(f"Error saving file: {str(e)}", flush=True)
+        job.error = "Failed to save uploaded file"
+        job.update(FAILED, "Error: Failed to save uploaded file")
         return None
+    return load_file_job(job, file_path, 'upload', original_filename=filename,
+                         file_id=file_id, remove_on_error=True, session_id=session_id)
 
 
-def cleanup_old_files(temp_dir, max_age_hours=1):
-    """Clean up old temporary files."""
-    try:
-        current_time = pd.Timestamp.now()
-        for filename in os.listdir(temp_dir):
-            filepath = os.path.join(temp_dir, filename)
-            if os.path.isfile(filepath):
-                file_time = pd.Timestamp(os.path.getmtime(filepath), unit='s')
-                if (current_time - file_time).total_seconds() > max_age_hours * 3600:
-                    try:
-                        os.remove(filepath)
-                        print(f"Cleaned up old file: {filename}", flush=True)
-                    except:
-                        pass
-    except Exception as e:
-        print(f"Error during cleanup: {e}", flush=True)
+def process_mdf_file(file_path, source, original_filename=None, file_id=None,
+                     selection=None):
+    """Process MDF file and extract signal names.
 
-
-def process_mdf_file(file_path, source, original_filename=None, file_id=None):
-    """Process MDF file and extract signal names."""
+    With a selection (see utils.selection) only the matching channels are
+    offered and plots read only the records inside its time window.
+    """
     result = {
         'success': False,
         'data': {},
-        'signals_text': '',
         'status': '',
         'error': None
     }
@@ -239,48 +433,46 @@ def process_mdf_file(file_path, source, original_filename=None, file_id=None):
             return result
 
         print(f"Loading MDF file: {file_path}", flush=True)
-
-        # Load MDF file
-        mdf = asammdf.MDF(file_path)
-
-        # Extract all signal names - improved method
-        signal_names = []
-
-        # Method 1: Use list_channels() if available
-        try:
-            channels_info = mdf.list_channels()
-            if channels_info:
-                signal_names = list(channels_info.keys())
-        except AttributeError:
-            pass
-
-        # Method 2: Iterate through groups and channels
-        if not signal_names:
-            for group_idx, group in enumerate(mdf.groups):
-                for channel in group.channels:
-                    if hasattr(channel, 'name') and channel.name:
-                        signal_names.append(channel.name)
-
-        # Method 3: Try to_dataframe as last resort
-        if not signal_names:
-            try:
-                df = mdf.to_dataframe(time_as_date=False)
-                signal_names = [col for col in df.columns if col != 'timestamps']
-            except Exception as e:
-                print(f"Warning: Could not convert to dataframe: {e}", flush=True)
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_signals = []
-        for signal in signal_names:
-            if signal and signal not in seen:
-                seen.add(signal)
-                unique_signals.append(signal)
-
-        signal_names = unique_signals
-
-        # Format signals for display
-        signals_text = '\n'.join(signal_names) if signal_names else 'No signals found'
+        file_id = file_id or str(uuid.uuid4())
+
+        # Known files are answered from the catalog or a columnar copy
+        # without opening them
+        metadata = catalog.lookup(file_path)
+        columnar = find_columnar_copy(file_path) if metadata is None else None
+        if metadata is not None:
+            print(f"Catalog hit: {file_path}", flush=True)
+            mdf_cache.remember(file_id, file_path)
+        elif columnar is not None:
+            print(f"Using columnar copy: {columnar['dir']}", flush=True)
+            mdf_cache.remember(file_id, file_path)
+            metadata = {
+                'signal_names': columnar_signal_names(columnar),
+                'groups_count': len(columnar['groups']),
+                'mdf_version': f"columnar ({columnar['format']})"
+            }
+        else:
+            # Reuse the cached handle and metadata if this file was opened before
+            with mdf_cache.checkout(file_path, file_id=file_id) as entry:
+                with entry.lock:
+                    if not entry.metadata:
+                        with span('mdf_scan'):
+                            entry.metadata = scan_mdf_metadata(entry.mdf)
+                        try:
+                            catalog.record(file_path, entry.mdf, entry.metadata)
+                        except Exception as e:
+                            print(f"Could not catalog {file_path}: {e}", flush=True)
+                    else:
+                        print(f"MDF cache hit: {file_path}", flush=True)
+                    metadata = entry.metadata
+
+        # Signal names stay on the server; the browser searches them through the index
+        signal_names = metadata['signal_names']
+        total_signals = len(signal_names)
+        if selection:
+            signal_names = select_channels(file_path, signal_names, selection)
+            if not signal_names:
+                result['error'] = "No channels match the selection"
+                return result
 
         # Get file info
         file_stats = os.stat(file_path)
@@ -290,28 +482,82 @@ def process_mdf_file(file_path, source, original_filename=None, file_id=None):
             'file_path': file_path,
             'source': source,
             'original_filename': original_filename or os.path.basename(file_path),
-            'signal_names': signal_names,
             'signal_count': len(signal_names),
-            'groups_count': len(mdf.groups),
-            'mdf_version': getattr(mdf, 'version', 'Unknown'),
-            'processed_time': pd.Timestamp.now().isoformat(),
+            'groups_count': metadata['groups_count'],
+            'mdf_version': metadata['mdf_version'],
+            'processed_time': datetime.datetime.now().isoformat(),
             'file_size': file_stats.st_size,
-            'file_id': file_id or str(uuid.uuid4())
+            'file_id': file_id,
+            'selection': selection
         }
 
-        # Close the MDF file
-        mdf.close()
-
         result['success'] = True
         result['data'] = file_info
-        result['signals_text'] = signals_text
-        result['status'] = f"Loaded: {len(signal_names)} signals from {os.path.basename(file_path)}"
+        if selection:
+            window = f", {window_label(selection['window'])} s" if selection['window'] else ''
+            result['status'] = (f"Loaded: {len(signal_names)} of {total_signals} signals"
+                                f"{window} from {os.path.basename(file_path)}")
+        else:
+            result['status'] = (f"Loaded: {len(signal_names)} signals from "
+                                f"{os.path.basename(file_path)}")
 
         print(f"Successfully processed MDF: {len(signal_names)} signals found", flush=True)
 
+        # Optionally precompute plot tiles in the background; a partial load
+        # skips them since building tiles decodes every channel of the file
+        if not selection:
+            schedule_pyramid_build(file_path, file_id)
+
     except Exception as e:
         result['error'] = str(e)
         result['status'] = f"Error: {str(e)}"
         print(f"Error processing MDF: {str(e)}", flush=True)
 
-    return result
\ No newline at end of file
+    return result
+
+
+def scan_mdf_metadata(mdf):
+    """Extract signal names and file level metadata from an open MDF."""
+    # Extract all signal names - improved method
+    signal_names = []
+
+    # Method 1: Use list_channels() if available
+    try:
+        channels_info = mdf.list_channels()
+        if channels_info:
+            signal_names = list(channels_info.keys())
+    except AttributeError:
+        pass
+
+    # Method 2: Iterate through groups and channels
+    if not signal_names:
+        for group_idx, group in enumerate(mdf.groups):
+            for channel in group.channels:
+                if hasattr(channel, 'name') and channel.name:
+                    signal_names.append(channel.name)
+
+    # Method 3: Fall back to asammdf's channel name index. It is built from
+    # the channel blocks while the header is parsed, so no samples are decoded
+    # and the cost depends on the channel count only
+    if not signal_names:
+        channels_db = getattr(mdf, 'channels_db', None) or {}
+        entries = sorted(
+            (location, name)
+            for name, locations in channels_db.items()
+            for location in locations
+        )
+        signal_names = [name for _, name in entries]
+
+    # Remove duplicates while preserving order
+    seen = set()
+    unique_signals = []
+    for signal in signal_names:
+        if signal and signal not in seen:
+            seen.add(signal)
+            unique_signals.append(signal)
+
+    return {
+        'signal_names': unique_signals,
+        'groups_count': len(mdf.groups),
+        'mdf_version': getattr(mdf, 'version', 'Unknown'),
+    }
\ No newline at end of file
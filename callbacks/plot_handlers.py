@@ -0,0 +1,72 @@
+"""
+Plotting callbacks for the main signal plot.
+"""
+
+from dash import Input, Output, State, callback_context
+from dash.exceptions import PreventUpdate
+from components.visualization import create_default_figure, create_signal_figure
+from utils.plot_engine import build_traces, parse_x_range, split_channel_key
+from utils.session_store import session_store
+from utils.expressions import DERIVED_PREFIX
+from utils.selection import selection_window
+
+
+def register_plot_callbacks(app):
+    """Register plotting callbacks."""
+
+    # Measure the plot width once it is rendered
+    app.clientside_callback(
+        """
+        function(id) {
+            const graph = document.getElementById('main-plot');
+            return graph ? graph.offsetWidth : window.dash_clientside.no_update;
+        }
+        """,
+        Output('plot-width-store', 'data'),
+        Input('main-plot', 'id')
+    )
+
+    @app.callback(
+        Output('main-plot', 'figure'),
+        [Input('channel-select', 'value'),
+         Input('plot-align', 'value'),
+         Input('main-plot', 'relayoutData'),
+         Input('derived-store', 'data')],
+        [State('plot-width-store', 'data'),
+         State('session-id-store', 'data')]
+    )
+    def update_main_plot(channels, align, relayout_data, derived_data, plot_width, session_id):
+        """Plot the selected channels, re-resolving the visible window on zoom."""
+        if not channels:
+            return create_default_figure()
+
+        x_range = parse_x_range(relayout_data)
+        trigger_id = callback_context.triggered[0]['prop_id'].split('.')[0]
+        if trigger_id == 'main-plot' and x_range is False:
+            # Legend clicks, y-only zooms etc. need no new data
+            raise PreventUpdate
+
+        series = []
+        definitions = session_store.get(session_id, 'derived', {}) if session_id else {}
+        file_ids = {split_channel_key(key)[0] for key in channels}
+        for key in channels:
+            file_id, channel = split_channel_key(key)
+            file_info = session_store.get_file(file_id) or {}
+            # Name the file only when channels of several files are shown
+            label = channel if len(file_ids) == 1 \
+                else f"{file_info.get('original_filename', '?')}: {channel}"
+            series.append({
+                'file_id': file_id,
+                'file_path': file_info.get('file_path'),
+                'channel': channel,
+                'label': label,
+                # Partially loaded files are only read inside their time window
+                'window': selection_window(file_info.get('selection'))
+            })
+            if channel.startswith(DERIVED_PREFIX):
+                # None marks a definition that no longer exists
+                series[-1]['expression'] = definitions.get(channel[len(DERIVED_PREFIX):])
+
+        traces, errors = build_traces(series, plot_width, x_range=x_range or None,
+                                      align='align' in (align or []))
+        return create_signal_figure(traces, errors, x_range=x_range or None)
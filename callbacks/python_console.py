@@ -2,171 +2,265 @@
 Python console callbacks for executing Python commands.
 """
 
-import sys
-import subprocess
-import re
-from io import StringIO
-import traceback
-from dash import Input, Output, State
+import json
+from dash import ALL, Input, Output, State, callback_context, html, no_update
+from dash.exceptions import PreventUpdate
+from utils.console_kernel import interrupt_published, kernel_pool, published_execution
+from utils.pip_jobs import is_pip_command, pip_runner
+from utils.session_store import session_store
 
 
-# Global namespace to persist variables between executions
-console_namespace = {}
+# Newest output characters shown; "Show more" multiplies this
+OUTPUT_DISPLAY_CHARS = 20_000
+
+SHOW_MORE_STYLE = {'fontSize': '11px', 'marginTop': '4px'}
 
 
 def register_console_callbacks(app):
     """Register Python console callbacks."""
 
+    # Give each browser session its own id, kept for the lifetime of the tab
+    app.clientside_callback(
+        """
+        function(id, session_id) {
+            if (session_id) return window.dash_clientside.no_update;
+            if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+            return Date.now().toString(16) + '-' + Math.random().toString(16).slice(2);
+        }
+        """,
+        Output('session-id-store', 'data'),
+        Input('session-id-store', 'id'),
+        State('session-id-store', 'data')
+    )
+
     @app.callback(
         [Output('python-output', 'children'),
          Output('python-context-store', 'data'),
-         Output('python-variables', 'children')],
+         Output('python-variables', 'children'),
+         Output('python-exec-store', 'data'),
+         Output('python-poll', 'disabled')],
         [Input('execute-python-btn', 'n_clicks'),
          Input('clear-python-btn', 'n_clicks')],
         [State('python-cmd-input', 'value'),
-         State('python-context-store', 'data')]
+         State('session-id-store', 'data'),
+         State('uploaded-file-mdf-data', 'data')]
     )
-    def execute_python_command(execute_clicks, clear_clicks, command, context_data):
-        """Execute Python command and return output."""
-        from dash import callback_context
+    def execute_python_command(execute_clicks, clear_clicks, command, session_id, mdf_data):
+        """Send a Python command to the session's kernel and start polling its output."""
+        # The browser only keeps the session handle; variables stay on the server
+        context_handle = {'session_id': session_id} if session_id else {}
+        context_data = session_store.get(session_id, 'console_context', {}) if session_id else {}
+        variables = session_store.get(session_id, 'console_variables', {}) if session_id else {}
 
         # Check which button was clicked
         if not callback_context.triggered:
-            return "Output will appear here...", {}, "Variables: none"
+            return "Output will appear here...", context_handle, "Variables: none", None, True
 
         button_id = callback_context.triggered[0]['prop_id'].split('.')[0]
 
         # Handle clear button
         if button_id == 'clear-python-btn' and clear_clicks:
-            console_namespace.clear()
-            return "Console cleared.", {}, "Variables: none"
+            if session_id:
+                kernel_pool.discard(session_id)
+                session_store.delete(session_id, 'console_context')
+                session_store.delete(session_id, 'console_variables')
+            return "Console cleared.", context_handle, "Variables: none", None, True
 
         # Handle execute button
+        variables_display = format_variables_display(variables)
         if button_id != 'execute-python-btn' or not execute_clicks or not command:
-            variables_display = format_variables_display(context_data or {})
-            return "Output will appear here...", context_data or {}, variables_display
+            return "Output will appear here...", context_handle, variables_display, None, True
+
+        if not session_id:
+            return "Error: session not initialised, reload the page", context_handle, \
+                variables_display, None, True
+
+        # pip runs in the background and streams into the console like a command
+        if is_pip_command(command):
+            try:
+                execution = pip_runner.start(command, session_id)
+            except (ValueError, RuntimeError) as e:
+                return f"Error: {e}", context_handle, variables_display, None, True
+            return "Running pip...", context_handle, variables_display, \
+                {'exec_id': execution.exec_id, 'kind': 'pip'}, False
+
+        file_info = session_store.get_file(mdf_data) or {}
+        try:
+            kernel = kernel_pool.get(session_id)
+            # Stored context only seeds a freshly started kernel
+            execution = kernel.execute(command, seed_context=context_data,
+                                       file_path=file_info.get('file_path'))
+        except RuntimeError as e:
+            return f"Error: {e}", context_handle, variables_display, None, True
 
-        # Check if command is a pip install
-        if command.strip().startswith('!pip ') or command.strip().startswith('pip '):
-            return handle_pip_command(command, context_data)
+        return "Running...", context_handle, variables_display, \
+            {'exec_id': execution.exec_id}, False
 
-        # Update global namespace with any stored context
-        if context_data:
-            console_namespace.update(context_data)
+    @app.callback(
+        [Output('python-output', 'children', allow_duplicate=True),
+         Output('python-variables', 'children', allow_duplicate=True),
+         Output('python-show-more-btn', 'style'),
+         Output('python-poll', 'disabled', allow_duplicate=True)],
+        [Input('python-poll', 'n_intervals')],
+        [State('python-exec-store', 'data'),
+         State('session-id-store', 'data')],
+        prevent_initial_call=True
+    )
+    def poll_python_output(n_intervals, exec_data, session_id):
+        """Stream the running command's output into the console."""
+        execution = find_execution(exec_data, session_id)
+        if execution is None:
+            return no_update, no_update, no_update, True
+
+        output_text, hidden = execution.render(output_limit(exec_data))
+        show_more_style = SHOW_MORE_STYLE if hidden else {'display': 'none'}
+        if not execution.done:
+            return output_text or "Running...", no_update, show_more_style, False
+
+        if execution.variables is None:
+            return output_text, no_update, show_more_style, True
+
+        # Small plain values seed a restarted kernel; everything else is only summarised
+        session_store.set(session_id, 'console_context', execution.seed or {})
+        session_store.set(session_id, 'console_variables', execution.variables)
+        variables_display = format_variables_display(execution.variables)
+        return output_text or "Command executed successfully (no output)", \
+            variables_display, show_more_style, True
 
-        # Capture stdout and stderr
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = mystdout = StringIO()
-        sys.stderr = mystderr = StringIO()
+    @app.callback(
+        [Output('python-output', 'children', allow_duplicate=True),
+         Output('python-exec-store', 'data', allow_duplicate=True),
+         Output('python-show-more-btn', 'style', allow_duplicate=True)],
+        [Input('python-show-more-btn', 'n_clicks')],
+        [State('python-exec-store', 'data'),
+         State('session-id-store', 'data')],
+        prevent_initial_call=True
+    )
+    def show_more_output(n_clicks, exec_data, session_id):
+        """Show a larger part of the buffered output."""
+        execution = find_execution(exec_data, session_id)
+        if execution is None:
+            return no_update, no_update, {'display': 'none'}
 
-        output_text = ""
+        exec_data = dict(exec_data, limit=output_limit(exec_data) * 4)
+        output_text, hidden = execution.render(exec_data['limit'])
+        return output_text, exec_data, SHOW_MORE_STYLE if hidden else {'display': 'none'}
 
-        try:
-            # Execute the command in the persistent namespace
-            exec(command, {"__builtins__": __builtins__}, console_namespace)
-
-            # Get any printed output
-            stdout_value = mystdout.getvalue()
-            stderr_value = mystderr.getvalue()
-
-            if stdout_value:
-                output_text += stdout_value
-            if stderr_value:
-                output_text += stderr_value
-
-            # If no output was printed, try to evaluate as expression
-            if not output_text.strip():
-                try:
-                    result = eval(command, {"__builtins__": __builtins__}, console_namespace)
-                    if result is not None:
-                        output_text = str(result)
-                except:
-                    # If eval fails and no output, show success message
-                    output_text = "Command executed successfully (no output)"
-
-        except Exception as e:
-            # Capture any errors
-            output_text = f"Error: {str(e)}\n{traceback.format_exc()}"
-
-        finally:
-            # Restore stdout and stderr
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-
-        # Store variables that can be serialized (basic types only)
-        storable_context = {}
-        for key, value in console_namespace.items():
-            if not key.startswith('_'):  # Skip private variables
-                try:
-                    # Try to store only serializable types
-                    if isinstance(value, (int, float, str, bool, list, dict, type(None))):
-                        storable_context[key] = value
-                    elif hasattr(value, '__name__'):  # Functions, classes
-                        storable_context[key] = f"<{type(value).__name__}: {value.__name__}>"
-                    else:
-                        storable_context[key] = f"<{type(value).__name__} object>"
-                except:
-                    continue
-
-        variables_display = format_variables_display(storable_context)
-        return output_text or "Command executed successfully (no output)", storable_context, variables_display
-
-
-def handle_pip_command(command, context_data):
-    """Handle pip install commands."""
-    try:
-        # Clean the command - remove ! if present and ensure proper format
-        clean_command = command.strip()
-        if clean_command.startswith('!'):
-            clean_command = clean_command[1:]
-
-        # Split into parts for subprocess
-        cmd_parts = clean_command.split()
-
-        # Run pip command
-        result = subprocess.run(
-            [sys.executable, '-m'] + cmd_parts,
-            capture_output=True,
-            text=True,
-            timeout=60  # 60 second timeout
-        )
-
-        output = ""
-        if result.stdout:
-            output += result.stdout
-        if result.stderr:
-            output += "\n" + result.stderr
-
-        if result.returncode == 0:
-            output += f"\n✓ Package installation completed successfully!"
+    @app.callback(
+        Output('python-poll', 'disabled', allow_duplicate=True),
+        [Input('cancel-python-btn', 'n_clicks')],
+        [State('python-exec-store', 'data'),
+         State('session-id-store', 'data')],
+        prevent_initial_call=True
+    )
+    def cancel_python_command(n_clicks, exec_data, session_id):
+        """Interrupt the running command or pip install."""
+        if not n_clicks or not exec_data:
+            return no_update
+        exec_id = exec_data.get('exec_id')
+        if exec_data.get('kind') == 'pip':
+            cancelled = pip_runner.cancel(exec_id)
         else:
-            output += f"\n✗ Installation failed (return code: {result.returncode})"
-
-        variables_display = format_variables_display(context_data or {})
-        return output, context_data or {}, variables_display
+            kernel = kernel_pool.get(session_id, create=False) if session_id else None
+            cancelled = kernel.interrupt() if kernel else False
+        # The command may be running in another server process
+        cancelled = cancelled or interrupt_published(exec_id)
+        # Keep polling so the interrupted result is shown
+        return False if cancelled else no_update
 
-    except subprocess.TimeoutExpired:
-        variables_display = format_variables_display(context_data or {})
-        return "Error: Pip command timed out (60s limit)", context_data or {}, variables_display
-    except Exception as e:
-        variables_display = format_variables_display(context_data or {})
-        return f"Error executing pip command: {str(e)}", context_data or {}, variables_display
+    @app.callback(
+        Output('python-inspect', 'children'),
+        [Input({'type': 'python-var', 'path': ALL}, 'n_clicks')],
+        [State('session-id-store', 'data')],
+        prevent_initial_call=True
+    )
+    def inspect_variable(n_clicks, session_id):
+        """Ask the kernel to describe a clicked variable and its children."""
+        # Rows being re-rendered also fire this callback, without a click
+        if not callback_context.triggered or not callback_context.triggered[0]['value'] \
+                or not session_id:
+            raise PreventUpdate
+
+        path = json.loads(callback_context.triggered_id['path'])
+        kernel = kernel_pool.get(session_id, create=False)
+        if kernel is None:
+            return html.Div("Kernel is not running", style={'color': '#dc3545'})
+        return format_inspection(path, kernel.inspect(path))
+
+
+def find_execution(exec_data, session_id):
+    """Return the Execution a python-exec-store entry refers to, or None."""
+    exec_id = (exec_data or {}).get('exec_id')
+    if (exec_data or {}).get('kind') == 'pip':
+        execution = pip_runner.get(exec_id)
+    else:
+        kernel = kernel_pool.get(session_id, create=False) if session_id else None
+        execution = kernel.get_execution(exec_id) if kernel else None
+    # Commands started by another server process are read from the shared store
+    return execution or published_execution(exec_id)
+
+
+def output_limit(exec_data):
+    """Return how many output characters the console currently shows."""
+    return (exec_data or {}).get('limit') or OUTPUT_DISPLAY_CHARS
+
+
+def format_size(nbytes):
+    """Return a byte count in human readable units."""
+    if nbytes is None:
+        return '?'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if nbytes < 1024 or unit == 'GB':
+            return f"{nbytes:.0f} {unit}" if unit == 'B' else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+
+
+def describe_summary(summary):
+    """Return a one-line description of a variable summary from the kernel."""
+    parts = [summary['type']]
+    if summary.get('shape') is not None:
+        parts.append('x'.join(str(n) for n in summary['shape']))
+    if summary.get('dtype'):
+        parts.append(summary['dtype'])
+    parts.append(format_size(summary.get('nbytes')))
+    return f"{' '.join(parts)} = {summary['preview']}"
+
+
+def variable_row(label, path, summary):
+    """Render one clickable variable summary; clicking drills into it."""
+    return html.Div(
+        f"{label}: {describe_summary(summary)}",
+        id={'type': 'python-var', 'path': json.dumps(path)},
+        n_clicks=0,
+        style={'cursor': 'pointer', 'whiteSpace': 'nowrap', 'overflow': 'hidden',
+               'textOverflow': 'ellipsis'}
+    )
 
 
 def format_variables_display(variables):
-    """Format variables for display in the variables panel."""
+    """Format variable summaries for the variables panel."""
     if not variables:
         return "Variables: none"
-
-    var_strings = []
-    for key, value in variables.items():
-        if isinstance(value, str) and len(value) > 30:
-            value_str = f'"{value[:27]}..."'
-        elif isinstance(value, list) and len(value) > 5:
-            value_str = f"[{', '.join(map(str, value[:3]))}, ...] (len={len(value)})"
-        else:
-            value_str = str(value)
-        var_strings.append(f"{key} = {value_str}")
-
-    return "Variables: " + ", ".join(var_strings)
\ No newline at end of file
+    return [html.Div("Variables (click to inspect):")] + \
+        [variable_row(name, [name], summary) for name, summary in variables.items()]
+
+
+def format_inspection(path, inspection):
+    """Render a kernel drill-down: the value's summary, stats and children."""
+    title = path[0] + ''.join(f".{step}" if kind == 'attr' else f"[{step!r}]"
+                              for kind, step in path[1:])
+    if inspection.get('error'):
+        return html.Div(f"{title}: {inspection['error']}", style={'color': '#dc3545'})
+
+    rows = [html.Div(f"{title}: {describe_summary(inspection['summary'])}",
+                     style={'fontWeight': 'bold'})]
+    if inspection.get('stats'):
+        stats = inspection['stats']
+        rows.append(html.Div(f"min {stats['min']:g}, max {stats['max']:g}, "
+                             f"mean {stats['mean']:g}"))
+    for child in inspection['children']:
+        rows.append(variable_row(f"  {child['label']}", path + [child['step']], child['summary']))
+    hidden = inspection['total'] - len(inspection['children'])
+    if hidden > 0:
+        rows.append(html.Div(f"  ... {hidden} more"))
+    return rows
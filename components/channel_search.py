@@ -0,0 +1,44 @@
+"""
+Channel search component for browsing the loaded file's signal names.
+"""
+
+from dash import dcc, html
+from styles.styles import SECTION_CONTAINER
+
+
+def create_channel_search_section():
+    """Create the channel search box with mode selection and paging."""
+    page_button_style = {'fontSize': '11px', 'padding': '2px 8px', 'marginLeft': '4px'}
+
+    return html.Div([
+        html.Div([
+            dcc.Input(
+                id='channel-search-input',
+                type='text',
+                placeholder='Search channels...',
+                debounce=True,
+                style={'flex': '1', 'fontSize': '12px', 'padding': '4px'}
+            ),
+            dcc.RadioItems(
+                id='channel-search-mode',
+                options=[
+                    {'label': 'Prefix', 'value': 'prefix'},
+                    {'label': 'Fuzzy', 'value': 'fuzzy'},
+                    {'label': 'Regex', 'value': 'regex'}
+                ],
+                value='prefix',
+                inline=True,
+                style={'fontSize': '11px', 'marginLeft': '8px'}
+            )
+        ], style={'display': 'flex', 'alignItems': 'center'}),
+        html.Div([
+            html.Span(
+                id='channel-search-page-label',
+                style={'fontSize': '11px', 'color': '#6c757d'}
+            ),
+            html.Button('◀', id='channel-search-prev', style=page_button_style),
+            html.Button('▶', id='channel-search-next', style=page_button_style)
+        ], style={'display': 'flex', 'alignItems': 'center', 'justifyContent': 'flex-end',
+                  'marginTop': '4px'}),
+        dcc.Store(id='channel-search-page', data=0)
+    ], style=SECTION_CONTAINER)
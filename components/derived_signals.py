@@ -0,0 +1,28 @@
+"""
+Derived channel editor: named expressions over the loaded file's channels.
+"""
+
+from dash import dcc, html
+from styles.styles import SECTION_CONTAINER, SECTION_HEADER, EXECUTE_BUTTON
+
+
+def create_derived_signals_section():
+    """Create the derived channel definitions box."""
+    return html.Div([
+        html.H4("Derived Channels", style=SECTION_HEADER),
+        dcc.Textarea(
+            id='derived-input',
+            placeholder='# One per line, plotted from the channel selector as =name\n'
+                        'speed_kmh = VehSpd * 3.6\n'
+                        'torque_avg = rolling_mean(EngTorque, 0.5s)\n'
+                        'power_kw = ch(\'Eng Speed\') * EngTorque / 9549',
+            style={'width': '100%', 'height': '70px', 'fontSize': '12px',
+                   'fontFamily': 'Consolas, Monaco, monospace'}
+        ),
+        html.Div([
+            html.Button('Apply', id='derived-apply', style=EXECUTE_BUTTON),
+            html.Span(id='derived-status',
+                      style={'fontSize': '11px', 'color': '#6c757d', 'marginLeft': '8px'})
+        ], style={'display': 'flex', 'alignItems': 'center'}),
+        dcc.Store(id='derived-store')
+    ], style=SECTION_CONTAINER)
@@ -19,7 +19,7 @@ def create_file_upload_section():
                 dcc.Input(
                     id='file-path-input',
                     type='text',
-                    placeholder='Enter file path or drag & drop files here...',
+                    placeholder='Enter file path (| channel globs | t0..t1) or drag & drop files here...',
                     disabled=False,
                     style=FILE_PATH_INPUT
                 ),
@@ -31,6 +31,53 @@ def create_file_upload_section():
                 )
             ],
             style=FILE_UPLOAD_CONTAINER,
-            multiple=False
+            multiple=True
+        ),
+        # Progress of chunked uploads, updated directly by the browser
+        html.Div(
+            id='upload-progress',
+            style={'fontSize': '11px', 'color': '#6c757d', 'marginTop': '4px'}
+        ),
+        # Recordings currently loaded; the selected one is searched and used by the console
+        dcc.Dropdown(
+            id='loaded-files-select',
+            options=[],
+            clearable=False,
+            placeholder='No files loaded',
+            style={'fontSize': '12px', 'marginTop': '4px'}
+        ),
+        # Status of the background load jobs
+        html.Div(
+            id='file-load-status',
+            style={'fontSize': '11px', 'color': '#6c757d'}
+        ),
+        # Columnar export of the active recording
+        html.Div([
+            dcc.Dropdown(
+                id='export-format',
+                options=[
+                    {'label': 'Parquet', 'value': 'parquet'},
+                    {'label': 'Arrow IPC', 'value': 'arrow'}
+                ],
+                value='parquet',
+                clearable=False,
+                style={'fontSize': '12px', 'width': '110px'}
+            ),
+            dcc.Checklist(
+                id='export-options',
+                options=[
+                    {'label': ' Plotted channels only', 'value': 'selected'},
+                    {'label': ' Visible window only', 'value': 'window'}
+                ],
+                value=[],
+                inline=True,
+                style={'fontSize': '11px'},
+                inputStyle={'marginLeft': '6px'}
+            ),
+            html.Button('Export', id='export-button', style={'fontSize': '12px'})
+        ], style={'display': 'flex', 'alignItems': 'center', 'gap': '6px', 'marginTop': '4px'}),
+        html.Div(
+            id='export-status',
+            style={'fontSize': '11px', 'color': '#6c757d'}
         ),
     ], style=SECTION_CONTAINER)
\ No newline at end of file
@@ -18,13 +18,18 @@ def create_python_console_section():
         'backgroundColor': '#dc3545',  # Red color
         'marginLeft': '10px'
     })
+    cancel_button_style = EXECUTE_BUTTON.copy()
+    cancel_button_style.update({
+        'backgroundColor': '#6c757d',
+        'marginLeft': '10px'
+    })
 
     return html.Div([
         html.H4("Python Console", style=SECTION_HEADER),
         html.Div([
             dcc.Textarea(
                 id='python-cmd-input',
-                placeholder='>>> Enter Python commands here...\n# Examples:\n# !pip install numpy\n# import numpy as np\n# x = [1, 2, 3, 4, 5]\n# print(sum(x))\n# y = [i**2 for i in x]',
+                placeholder='>>> Enter Python commands here...\n# Examples:\n# !pip install numpy\n# import numpy as np\n# x = [1, 2, 3, 4, 5]\n# print(sum(x))\n# y = [i**2 for i in x]\n# t, v = signal(\'VehSpd\')  # channel of the loaded file\n# signals[\'VehSpd\'].samples.max()\n# find_recordings(\'VehSpd\', 10, 20)  # other recordings with it',
                 style=PYTHON_CONSOLE_INPUT
             ),
             html.Div([
@@ -37,6 +42,12 @@ def create_python_console_section():
                     'Clear',
                     id='clear-python-btn',
                     style=clear_button_style
+                ),
+                html.Button(
+                    'Cancel',
+                    id='cancel-python-btn',
+                    title='Interrupt the running command; press again to force stop',
+                    style=cancel_button_style
                 )
             ], style={'display': 'flex', 'alignItems': 'center'})
         ]),
@@ -44,6 +55,12 @@ def create_python_console_section():
             id='python-output',
             style=PYTHON_OUTPUT
         ),
+        # Shown when older output was cut to keep the console responsive
+        html.Button(
+            'Show more',
+            id='python-show-more-btn',
+            style={'display': 'none'}
+        ),
         html.Div(
             id='python-variables',
             style={
@@ -57,5 +74,15 @@ def create_python_console_section():
                 'maxHeight': '100px',
                 'overflowY': 'auto'
             }
+        ),
+        # Drill-down into one variable, filled on request from the kernel
+        html.Div(
+            id='python-inspect',
+            style={
+                'fontSize': '11px',
+                'fontFamily': 'Consolas, Monaco, monospace',
+                'maxHeight': '160px',
+                'overflowY': 'auto'
+            }
         )
     ], style=SECTION_CONTAINER)
\ No newline at end of file
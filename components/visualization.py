@@ -2,18 +2,36 @@
 Data visualization component with plotly graph.
 """
 
-from dash import dcc
+from dash import dcc, html
 import plotly.graph_objects as go
 from styles.styles import PLOT_STYLE
 
 
 def create_visualization_section():
-    """Create the main plot visualization."""
-    return dcc.Graph(
-        id='main-plot',
-        style=PLOT_STYLE,
-        figure=create_default_figure()
-    )
+    """Create the main plot visualization with its channel selector."""
+    return html.Div([
+        dcc.Dropdown(
+            id='channel-select',
+            options=[],
+            multi=True,
+            placeholder='Select channels to plot...',
+            style={'marginBottom': '4px', 'fontSize': '12px'}
+        ),
+        dcc.Checklist(
+            id='plot-align',
+            options=[{'label': ' Align files (time relative to each file start)',
+                      'value': 'align'}],
+            value=[],
+            style={'fontSize': '11px', 'marginBottom': '4px'}
+        ),
+        dcc.Graph(
+            id='main-plot',
+            style=PLOT_STYLE,
+            figure=create_default_figure()
+        ),
+        # Plot width in pixels, measured in the browser to size the point budget
+        dcc.Store(id='plot-width-store')
+    ])
 
 
 def create_default_figure():
@@ -34,4 +52,43 @@ def create_default_figure():
                 font=dict(size=20, color="gray")
             )
         ]
-    )
\ No newline at end of file
+    )
+
+
+def create_signal_figure(traces, errors=None, x_range=None):
+    """Create a figure from downsampled signal traces."""
+    fig = go.Figure()
+    for trace in traces:
+        label = f"{trace['name']} [{trace['unit']}]" if trace['unit'] else trace['name']
+        fig.add_trace(go.Scattergl(
+            x=trace['x'],
+            y=trace['y'],
+            name=label,
+            mode='lines'
+        ))
+
+    fig.update_layout(
+        xaxis_title="Time [s]",
+        template="plotly_white",
+        margin=dict(l=50, r=20, t=40, b=40),
+        legend=dict(orientation='h', y=1.02, yanchor='bottom'),
+        # Keep zoom and legend state when traces are replaced
+        uirevision='signals'
+    )
+    if x_range:
+        fig.update_xaxes(range=list(x_range))
+
+    if errors:
+        fig.add_annotation(
+            text='<br>'.join(errors),
+            x=0,
+            y=0,
+            xref="paper",
+            yref="paper",
+            xanchor='left',
+            yanchor='bottom',
+            showarrow=False,
+            font=dict(size=11, color="#dc3545")
+        )
+
+    return fig
@@ -29,7 +29,21 @@ def create_main_layout():
         # Hidden stores for data
         dcc.Store(id='uploaded-files-store'),
         dcc.Store(id='uploaded-file-mdf-data'),
+        dcc.Store(id='chunked-upload-store'),
+        dcc.Store(id='file-load-job-store'),
+        dcc.Store(id='export-job-store'),
         dcc.Store(id='string-list-store'),
-        dcc.Store(id='python-context-store')
+        dcc.Store(id='python-context-store'),
+        dcc.Store(id='python-exec-store'),
+        dcc.Store(id='session-id-store', storage_type='session'),
+
+        # Polls background file load jobs while one is running
+        dcc.Interval(id='file-load-poll', interval=500, disabled=True),
+
+        # Polls the running export job
+        dcc.Interval(id='export-poll', interval=1000, disabled=True),
+
+        # Polls the console kernel for streamed output while a command runs
+        dcc.Interval(id='python-poll', interval=500, disabled=True)
 
     ], style=APP_CONTAINER)
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""
+Server route registration module.
+Registers plain Flask routes on the Dash app's underlying server.
+"""
+
+from .uploads import register_upload_routes
+from .metrics import register_metrics_routes
+
+
+def register_all_routes(app):
+    """Register all non-Dash server routes."""
+    register_upload_routes(app)
+    register_metrics_routes(app)
@@ -0,0 +1,119 @@
+"""
+Metrics endpoint and per-callback timing.
+Every Dash callback request is timed by callback name; /metrics serves the
+registry in the Prometheus text format. Optionally the next few requests can
+be profiled with cProfile.
+"""
+
+import cProfile
+import os
+import threading
+import time
+
+from flask import Response, g, jsonify, request
+from utils.metrics import registry
+from utils.upload_store import get_upload_dir
+
+
+# The profiling toggle is off unless the deployment allows it
+PROFILING_ALLOWED = os.environ.get('LOGSCOPE_PROFILING', '0').lower() in ('1', 'true', 'yes')
+
+# Upper bound on requests captured by one toggle
+MAX_PROFILED_REQUESTS = 100
+
+CALLBACK_SECONDS = registry.histogram(
+    'logscope_callback_seconds', 'Duration of Dash callback requests', ('callback',))
+CALLBACK_ERRORS = registry.counter(
+    'logscope_callback_errors_total', 'Dash callback requests that returned an error',
+    ('callback',))
+
+
+class _ProfileBudget:
+    """Number of upcoming requests still to be profiled."""
+
+    def __init__(self):
+        self.remaining = 0
+        self._lock = threading.Lock()
+
+    def set(self, count):
+        with self._lock:
+            self.remaining = max(0, min(count, MAX_PROFILED_REQUESTS))
+            return self.remaining
+
+    def take(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+_profile_budget = _ProfileBudget()
+
+
+def profile_dir():
+    path = os.path.join(get_upload_dir(), 'profiles')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _callback_name(app):
+    """Name of the callback function a _dash-update-component request targets."""
+    body = request.get_json(silent=True, cache=True) or {}
+    callback = app.callback_map.get(body.get('output'), {}).get('callback')
+    return getattr(callback, '__name__', None) or body.get('output') or 'unknown'
+
+
+def register_metrics_routes(app):
+    """Register /metrics, the profiling toggle and callback timing hooks."""
+    server = app.server
+    prefix = app.config.routes_pathname_prefix
+    update_path = f'{prefix}_dash-update-component'
+
+    @server.before_request
+    def start_request_timer():
+        g.logscope_started = time.perf_counter()
+        if PROFILING_ALLOWED and request.path != f'{prefix}metrics/profile' \
+                and _profile_budget.take():
+            g.logscope_profiler = cProfile.Profile()
+            g.logscope_profiler.enable()
+
+    @server.after_request
+    def record_request_time(response):
+        profiler = g.pop('logscope_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            name = _callback_name(app) if request.path == update_path else request.path
+            safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+            path = os.path.join(profile_dir(), f"{time.strftime('%Y%m%d-%H%M%S')}_"
+                                               f"{safe_name[:80]}_{os.getpid()}.prof")
+            try:
+                profiler.dump_stats(path)
+                print(f"Request profile written: {path}", flush=True)
+            except OSError as e:
+                print(f"Could not write request profile: {e}", flush=True)
+
+        started = g.pop('logscope_started', None)
+        if started is not None and request.path == update_path:
+            name = _callback_name(app)
+            CALLBACK_SECONDS.observe(time.perf_counter() - started, callback=name)
+            if response.status_code >= 500:
+                CALLBACK_ERRORS.inc(callback=name)
+        return response
+
+    @server.route(f'{prefix}metrics', methods=['GET'])
+    def metrics():
+        """Serve all metrics in the Prometheus text format."""
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    @server.route(f'{prefix}metrics/profile', methods=['GET', 'POST'])
+    def profile_requests():
+        """Profile the next `count` requests (default 1) with cProfile."""
+        if not PROFILING_ALLOWED:
+            return jsonify({'error': 'Profiling is disabled; set LOGSCOPE_PROFILING=1'}), 403
+        try:
+            count = int(request.args.get('count', 1))
+        except ValueError:
+            return jsonify({'error': 'Invalid count'}), 400
+        remaining = _profile_budget.set(count)
+        return jsonify({'profiling': remaining, 'directory': profile_dir()})
@@ -0,0 +1,51 @@
+"""
+Chunked, resumable upload endpoints.
+The browser posts raw file slices so nothing is base64 encoded or held in memory whole.
+"""
+
+from flask import jsonify, request
+from utils.upload_store import content_store, validate_upload_request, write_chunk, \
+    received_bytes
+
+
+def register_upload_routes(app):
+    """Register the chunked upload routes."""
+    server = app.server
+    prefix = app.config.routes_pathname_prefix
+    # Expire leftovers of earlier runs without waiting for the first upload
+    content_store.start_janitor()
+
+    @server.route(f'{prefix}upload/chunk', methods=['POST'])
+    def upload_chunk():
+        """Append one raw chunk to an upload."""
+        upload_id = request.args.get('upload_id', '')
+        filename = request.args.get('filename', '')
+        error = validate_upload_request(upload_id, filename)
+        if error:
+            return jsonify({'error': error}), 400
+
+        try:
+            offset = int(request.args.get('offset', 0))
+            total = int(request.args.get('total', 0))
+        except ValueError:
+            return jsonify({'error': 'Invalid offset or total'}), 400
+
+        try:
+            status = write_chunk(upload_id, filename, offset, total, request.stream)
+        except OSError as e:
+            print(f"Error writing upload chunk: {e}", flush=True)
+            return jsonify({'error': str(e)}), 500
+
+        if status.get('error'):
+            return jsonify(status), 400
+        if status.get('mismatch'):
+            return jsonify(status), 409
+        return jsonify(status)
+
+    @server.route(f'{prefix}upload/status/<upload_id>', methods=['GET'])
+    def upload_status(upload_id):
+        """Report how many bytes of an upload have been received."""
+        error = validate_upload_request(upload_id, 'status.mf4')
+        if error:
+            return jsonify({'error': error}), 400
+        return jsonify({'received': received_bytes(upload_id)})
@@ -0,0 +1,94 @@
+"""
+Production entry point.
+
+Serves the app behind a WSGI server with several worker processes and
+threads per worker:
+
+    python serve.py --workers 4 --threads 8 --bind 0.0.0.0:8050
+
+Uses gunicorn where available and falls back to waitress (threads only, one
+process), e.g. on Windows. With more than one worker, session state, load
+jobs, finished uploads and console output go through the disk session
+store, and decoded channels are shared through shared memory, so any worker
+can serve any session.
+"""
+
+import argparse
+import os
+
+
+DEFAULT_WORKERS = int(os.environ.get('LOGSCOPE_WORKERS', min(os.cpu_count() or 1, 4)))
+DEFAULT_THREADS = int(os.environ.get('LOGSCOPE_THREADS', 8))
+DEFAULT_BIND = os.environ.get('LOGSCOPE_BIND', '127.0.0.1:8050')
+DEFAULT_TIMEOUT = int(os.environ.get('LOGSCOPE_WORKER_TIMEOUT', 120))
+
+
+def create_server():
+    """Build the app and return its WSGI server."""
+    from app import create_app
+    return create_app().server
+
+
+def run_gunicorn(workers, threads, bind, timeout):
+    from gunicorn.app.base import BaseApplication
+
+    class LogscopeApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', timeout)
+
+        def load(self):
+            # Each worker builds its own app so no background thread is forked
+            return create_server()
+
+    if workers > 1:
+        # Workers forked after this share one resource tracker, so a worker
+        # attaching to another's shared memory does not take ownership of it
+        from multiprocessing import resource_tracker
+        resource_tracker.ensure_running()
+
+    LogscopeApplication().run()
+
+
+def run_waitress(threads, bind):
+    from waitress import serve
+    serve(create_server(), listen=bind, threads=threads)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run logscope behind a WSGI server.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='worker processes (LOGSCOPE_WORKERS)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help='threads per worker (LOGSCOPE_THREADS)')
+    parser.add_argument('--bind', default=DEFAULT_BIND, help='host:port (LOGSCOPE_BIND)')
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT,
+                        help='seconds before a stuck worker is restarted')
+    args = parser.parse_args(argv)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        if args.workers > 1:
+            print("gunicorn is not available, serving from one process with waitress",
+                  flush=True)
+        run_waitress(args.threads, args.bind)
+        return
+
+    if args.workers > 1:
+        # State must be visible to every worker; set before any module reads it
+        backend = os.environ.setdefault('LOGSCOPE_SESSION_BACKEND', 'disk')
+        if backend != 'disk':
+            print(f"Warning: session backend '{backend}' is per process; sessions may "
+                  f"lose state when requests land on another worker", flush=True)
+
+    print(f"Serving on {args.bind} with {args.workers} workers x {args.threads} threads",
+          flush=True)
+    run_gunicorn(args.workers, args.threads, args.bind, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from utils import alignment
+from utils.alignment import align_signals, common_time_base, resample
+
+
+def test_common_time_base_uses_finest_median_step():
+    base = common_time_base([np.arange(0, 10, 0.5), np.arange(0, 5, 0.1)])
+    assert base[0] == 0
+    assert base[-1] == pytest.approx(9.5)
+    assert np.diff(base)[0] == pytest.approx(0.1)
+
+
+def test_common_time_base_overlap():
+    base = common_time_base([np.arange(0, 10.0), np.arange(5, 20.0)], step=1.0, overlap=True)
+    assert base[0] == 5 and base[-1] == 9
+
+
+def test_common_time_base_disjoint_overlap_is_empty():
+    assert len(common_time_base([np.arange(0, 3.0), np.arange(5, 8.0)], overlap=True)) == 0
+
+
+def test_common_time_base_widens_step_past_sample_cap(monkeypatch):
+    monkeypatch.setattr(alignment, 'MAX_ALIGNED_SAMPLES', 10_000)
+    base = common_time_base([np.linspace(0, 7200, 1000)], step=1e-4)
+    assert len(base) == 10_000
+    assert base[0] == 0
+    assert base[-1] == pytest.approx(7200)
+
+
+def test_common_time_base_keeps_whole_range_at_default_cap():
+    base = common_time_base([np.linspace(0, 7200, 1000)], step=1e-2)
+    assert len(base) <= alignment.MAX_ALIGNED_SAMPLES
+    assert base[-1] == pytest.approx(7200)
+
+
+def test_resample_linear_and_zoh():
+    t = np.array([0.0, 1.0, 2.0])
+    y = np.array([0.0, 10.0, 20.0])
+    base = np.array([-1.0, 0.5, 1.5, 3.0])
+    linear = resample(t, y, base, 'linear')
+    zoh = resample(t, y, base, 'zoh')
+    np.testing.assert_array_equal(linear[1:3], [5.0, 15.0])
+    np.testing.assert_array_equal(zoh[1:3], [0.0, 10.0])
+    assert np.isnan(linear[[0, 3]]).all() and np.isnan(zoh[[0, 3]]).all()
+
+
+def test_resample_unknown_method():
+    with pytest.raises(ValueError):
+        resample(np.arange(3.0), np.arange(3.0), np.arange(3.0), 'cubic')
+
+
+def test_align_signals_relative():
+    a = (np.array([100.0, 101.0, 102.0]), np.array([1.0, 2.0, 3.0]))
+    b = (np.array([500.0, 501.0, 502.0]), np.array([4.0, 5.0, 6.0]))
+    base, (ya, yb) = align_signals([a, b], step=1.0, relative=True)
+    np.testing.assert_array_equal(base, [0.0, 1.0, 2.0])
+    np.testing.assert_array_equal(ya, [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(yb, [4.0, 5.0, 6.0])
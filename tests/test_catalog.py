@@ -0,0 +1,85 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+asammdf = pytest.importorskip('asammdf')
+
+from asammdf import MDF, Signal  # noqa: E402
+
+from utils.catalog import Catalog  # noqa: E402
+
+
+def _save(path, t0, speed_scale=1.0):
+    t = t0 + np.arange(1000) * 0.01
+    mdf = MDF(version='4.10')
+    mdf.append([Signal(np.sin(t) * speed_scale, t, name='Engine.Speed', unit='rpm'),
+                Signal(np.cos(t), t, name='Engine.Torque', unit='Nm')])
+    mdf.append([Signal(np.arange(10.0), np.arange(10.0), name='Rate')])
+    mdf.save(path, overwrite=True)
+    return str(path)
+
+
+def _record(catalog, path):
+    with MDF(path) as mdf:
+        names = [name for name in mdf.channels_db if name != 'time']
+        catalog.record(path, mdf, {'signal_names': names, 'groups_count': len(mdf.groups),
+                                   'mdf_version': mdf.version})
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return Catalog(str(tmp_path / 'catalog.sqlite'))
+
+
+def test_lookup_of_recorded_file(catalog, tmp_path):
+    path = _save(tmp_path / 'a.mf4', 0.0)
+    assert catalog.lookup(path) is None
+    _record(catalog, path)
+
+    metadata = catalog.lookup(path)
+    assert metadata['signal_names'] == ['Engine.Speed', 'Engine.Torque', 'Rate']
+    assert metadata['groups_count'] == 2 and metadata['mdf_version'] == '4.10'
+    assert catalog.time_ranges(path)['Engine.Speed'] == (0.0, pytest.approx(9.99))
+
+
+def test_copies_match_but_same_size_recordings_do_not(catalog, tmp_path):
+    path = _save(tmp_path / 'a.mf4', 0.0)
+    _record(catalog, path)
+    copy = str(tmp_path / 'copy.mf4')
+    shutil.copyfile(path, copy)
+    other = _save(tmp_path / 'b.mf4', 0.0, speed_scale=2.0)
+    assert os.path.getsize(other) == os.path.getsize(path)
+
+    assert catalog.lookup(copy)['signal_names'][0] == 'Engine.Speed'
+    assert catalog.lookup(other) is None
+
+
+def test_changed_file_is_not_served_stale(catalog, tmp_path):
+    path = _save(tmp_path / 'a.mf4', 0.0)
+    _record(catalog, path)
+    _save(path, 0.0, speed_scale=2.0)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert catalog.lookup(path) is None
+    _record(catalog, path)
+    assert len(catalog.files()) == 1
+
+
+def test_find_recordings_by_pattern_and_window(catalog, tmp_path):
+    early = _save(tmp_path / 'early.mf4', 0.0)
+    late = _save(tmp_path / 'late.mf4', 100.0)
+    _record(catalog, early)
+    _record(catalog, late)
+
+    found = catalog.find_recordings('Engine.*')
+    assert [(os.path.basename(r['path']), r['name']) for r in found] == [
+        ('early.mf4', 'Engine.Speed'), ('early.mf4', 'Engine.Torque'),
+        ('late.mf4', 'Engine.Speed'), ('late.mf4', 'Engine.Torque')]
+    assert found[0]['unit'] == 'rpm' and found[0]['samples'] == 1000
+
+    window = catalog.find_recordings('Engine.Speed', 50.0, 105.0)
+    assert [os.path.basename(r['path']) for r in window] == ['late.mf4']
+
+    os.remove(late)
+    assert catalog.find_recordings('Engine.Speed', 50.0) == []
@@ -0,0 +1,63 @@
+import re
+from collections import OrderedDict
+
+import pytest
+
+from utils import channel_index
+from utils.channel_index import ChannelIndex, get_channel_index
+
+
+NAMES = ['Engine.Speed', 'Engine.Torque', 'VehSpd', 'Brake_Pressure_FL',
+         'Brake_Pressure_FR', 'CAN1.EngineSpeedRaw', 'Gear']
+
+
+@pytest.fixture
+def index():
+    return ChannelIndex(NAMES)
+
+
+def test_empty_query_pages_in_file_order(index):
+    assert index.search('', limit=3) == (NAMES[:3], len(NAMES))
+    assert index.search('  ', offset=5, limit=3) == (NAMES[5:], len(NAMES))
+
+
+def test_prefix_matches_names_and_segments(index):
+    assert index.search('engine') == (['Engine.Speed', 'Engine.Torque',
+                                       'CAN1.EngineSpeedRaw'], 3)
+    assert index.search('pressure') == (['Brake_Pressure_FL', 'Brake_Pressure_FR'], 2)
+    assert index.search('SPEED') == (['Engine.Speed'], 1)
+    assert index.search('engine', offset=1, limit=1) == (['Engine.Torque'], 3)
+
+
+def test_fuzzy_ranks_closest_first(index):
+    names, total = index.search('engine sped', mode='fuzzy')
+    assert names[0] == 'Engine.Speed' and total >= 1
+    assert index.search('zzz', mode='fuzzy') == ([], 0)
+
+
+def test_regex(index):
+    assert index.search(r'_F[LR]$', mode='regex') == (['Brake_Pressure_FL',
+                                                       'Brake_Pressure_FR'], 2)
+    with pytest.raises(re.error):
+        index.search('(', mode='regex')
+
+
+def test_indexes_are_cached_per_file_and_selection(tmp_path, monkeypatch):
+    path = tmp_path / 'run.mf4'
+    path.write_bytes(b'MDF')
+    lookups = []
+
+    def lookup(file_path):
+        lookups.append(file_path)
+        return {'signal_names': NAMES}
+
+    monkeypatch.setattr(channel_index, '_indexes', OrderedDict())
+    monkeypatch.setattr(channel_index.catalog, 'lookup', lookup)
+    monkeypatch.setattr(channel_index, 'select_channels',
+                        lambda file_path, names, selection: [n for n in names if 'Brake' in n])
+
+    full = get_channel_index(str(path))
+    assert get_channel_index(str(path)) is full and len(lookups) == 1
+    subset = get_channel_index(str(path), selection={'channels': ['Brake*'], 'window': None})
+    assert subset.names == ['Brake_Pressure_FL', 'Brake_Pressure_FR']
+    assert len(lookups) == 2
@@ -0,0 +1,82 @@
+import threading
+
+from utils.console_kernel import ConsoleKernel, Execution, _execute
+
+
+class FakeConn:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+def run(code, namespace=None):
+    conn = FakeConn()
+    namespace = {} if namespace is None else namespace
+    _execute(conn, namespace, 'exec-1', code, set())
+    output = ''.join(payload for kind, _, payload in conn.sent if kind == 'output')
+    return output, conn.sent[-1][2], namespace
+
+
+def test_trailing_expression_is_shown():
+    _, done, _ = run('x = 2\nx * 21')
+    assert done['result'] == '42'
+    assert done['error'] is None
+
+
+def test_trailing_expression_runs_once():
+    namespace = {'calls': []}
+    _, done, _ = run('calls.append(1) or len(calls)', namespace)
+    assert namespace['calls'] == [1]
+    assert done['result'] == '1'
+
+
+def test_output_and_value_are_both_shown():
+    output, done, _ = run("print('hello')\n'value'")
+    assert output == 'hello\n'
+    assert done['result'] == 'value'
+
+
+def test_statements_and_errors():
+    _, done, namespace = run('y = 1')
+    assert done['result'] is None and namespace['y'] == 1
+    _, done, _ = run('1 / 0')
+    assert 'ZeroDivisionError' in done['error']
+    _, done, _ = run('def broken(:')
+    assert done['error'].startswith('Error:')
+
+
+def test_render_separates_output_from_value():
+    execution = Execution('exec-1', "print('a', end=''); 1")
+    execution.output.write('a')
+    execution.result = '1'
+    assert execution.render()[0] == 'a\n1'
+    execution.output.write('\n')
+    assert execution.render()[0] == 'a\n1'
+
+
+class ReplyConn:
+    def __init__(self, kernel, requests):
+        self.kernel = kernel
+        self.requests = list(requests)
+        self.locked = []
+
+    def recv(self):
+        if not self.requests:
+            raise EOFError
+        return self.requests.pop(0)
+
+    def send(self, message):
+        self.locked.append(self.kernel._send_lock.locked())
+
+
+def test_reader_replies_hold_the_send_lock():
+    kernel = ConsoleKernel.__new__(ConsoleKernel)
+    kernel._lock = threading.Lock()
+    kernel._send_lock = threading.Lock()
+    kernel._inspections, kernel._executions = {}, {}
+    kernel.current, kernel.file_path = None, None
+    conn = ReplyConn(kernel, [('signal_request', None, 'speed')])
+    kernel._read_loop(conn)
+    assert conn.locked == [True]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from utils.downsampling import minmax_downsample
+
+
+def test_short_signals_are_returned_unchanged():
+    t = np.arange(10.0)
+    y = np.arange(10.0)
+    x_out, y_out = minmax_downsample(t, y, 100)
+    assert x_out is t and y_out is y
+
+
+@pytest.mark.parametrize('n', [1000, 1001, 1999])
+def test_output_size_and_order(n):
+    t = np.arange(n, dtype=np.float64)
+    y = np.sin(t / 10)
+    x_out, y_out = minmax_downsample(t, y, 100)
+    assert len(x_out) <= 102
+    assert np.all(np.diff(x_out) >= 0)
+    np.testing.assert_array_equal(y_out, np.sin(x_out / 10))
+
+
+def test_spikes_survive():
+    t = np.arange(100_000, dtype=np.float64)
+    y = np.zeros(100_000)
+    y[12_345] = 50.0
+    y[77_777] = -50.0
+    x_out, y_out = minmax_downsample(t, y, 200)
+    assert 12_345 in x_out and 77_777 in x_out
+    assert y_out.max() == 50.0 and y_out.min() == -50.0
+
+
+def test_nans_do_not_hide_extremes():
+    y = np.full(1000, np.nan)
+    y[500] = 3.0
+    y[501] = -3.0
+    _, y_out = minmax_downsample(np.arange(1000.0), y, 10)
+    assert np.nanmax(y_out) == 3.0 and np.nanmin(y_out) == -3.0
+
+
+def test_integer_and_bool_samples():
+    t = np.arange(1000.0)
+    _, y_out = minmax_downsample(t, np.arange(1000, dtype=np.int16), 10)
+    assert y_out.dtype == np.int16 and y_out[0] == 0 and y_out[-1] == 999
+    _, flags = minmax_downsample(t, np.arange(1000) % 7 == 0, 10)
+    assert flags.dtype == np.bool_ and flags.any() and not flags.all()
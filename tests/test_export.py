@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+asammdf = pytest.importorskip('asammdf')
+
+from asammdf import MDF, Signal  # noqa: E402
+
+from utils import export, upload_store  # noqa: E402
+from utils.export import export_mdf, find_columnar_copy, read_columnar_channel  # noqa: E402
+from utils.mdf_cache import mdf_cache  # noqa: E402
+
+
+N = 5_000
+T = np.arange(N) * 0.01
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store, 'UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(export, 'BATCH_RECORDS', 1_000)
+    monkeypatch.setattr(export, '_manifest_cache', {})
+    mdf = MDF(version='4.10')
+    mdf.append([Signal(np.sin(T), T, name='Speed', unit='rpm'),
+                Signal((np.arange(N) % 7).astype(np.uint8), T, name='Gear')])
+    mdf.append([Signal(np.arange(100.0), np.arange(100.0), name='Rate', unit='Hz')])
+    path = str(tmp_path / 'run.mf4')
+    mdf.save(path, overwrite=True)
+    yield path
+    mdf_cache.evict_file(path)
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_full_export_round_trip(recording, fmt):
+    progress = []
+    out_dir = export_mdf(recording, fmt=fmt, progress=progress.append)
+    assert len(progress) == 6
+
+    manifest = find_columnar_copy(recording)
+    assert manifest['dir'] == out_dir and manifest['format'] == fmt
+    assert sorted(manifest['index']) == ['Gear', 'Rate', 'Speed']
+
+    timestamps, samples, unit = read_columnar_channel(recording, 'Speed')
+    np.testing.assert_array_equal(timestamps, T)
+    np.testing.assert_array_equal(samples, np.sin(T))
+    assert unit == 'rpm'
+    _, gears, _ = read_columnar_channel(recording, 'Gear')
+    np.testing.assert_array_equal(gears, np.arange(N) % 7)
+    assert read_columnar_channel(recording, 'Missing') is None
+
+
+def test_subset_and_window_are_not_served_as_copies(recording):
+    out_dir = export_mdf(recording, channels=['Speed'], t_range=[10.0, 20.0])
+    assert find_columnar_copy(recording) is None
+
+    [group] = [name for name in os.listdir(out_dir) if name.endswith('.parquet')]
+    table = pa.parquet.read_table(os.path.join(out_dir, group))
+    assert table.column_names == ['timestamps', 'Speed']
+    timestamps = table.column('timestamps').to_numpy()
+    assert timestamps[0] == 10.0 and timestamps[-1] == pytest.approx(20.0)
+    assert table.num_rows == 1001
+
+
+def test_unknown_format(recording):
+    with pytest.raises(ValueError):
+        export_mdf(recording, fmt='csv')
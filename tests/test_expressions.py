@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+import pytest
+
+from utils.expressions import (ExpressionError, compile_expression, derived_cache,
+                               evaluate_derived, parse_definitions)
+
+
+T = np.arange(0, 10, 0.5)
+CHANNELS = {
+    'speed': (T, T * 2, 'km/h'),
+    'Engine.Rpm': (T, T * 100, 'rpm'),
+    'Gear Pos': (T, np.floor(T / 2), ''),
+    'slow': (np.arange(0, 10, 1.0), np.arange(0, 10, 1.0), ''),
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    derived_cache._results.clear()
+
+
+def evaluate(source, x_range=None, calls=None):
+    def loader(channel, window=None):
+        if calls is not None:
+            calls.append((channel, window))
+        return CHANNELS[channel]
+    return evaluate_derived(source, loader, __file__, x_range)
+
+
+def test_arithmetic_and_channel_names():
+    t, y = evaluate("speed * 2 + Engine.Rpm / 100 - ch('Gear Pos')")
+    np.testing.assert_allclose(y, T * 4 + T - np.floor(T / 2))
+    assert compile_expression("speed + speed").channels == ['speed']
+
+
+def test_durations_and_rolling_mean():
+    t, y = evaluate('rolling_mean(speed, 1s)')
+    assert y[0] == 0 and y[-1] == pytest.approx(np.mean(T[-3:] * 2))
+
+
+def test_resamples_onto_densest_input():
+    t, y = evaluate('speed + slow')
+    np.testing.assert_array_equal(t, T)
+    np.testing.assert_allclose(y[:-1], T[:-1] * 3)
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('speed > 4 and speed < 10', (T * 2 > 4) & (T * 2 < 10)),
+    ('speed < 4 or speed > 16', (T * 2 < 4) | (T * 2 > 16)),
+    ('not speed > 4', ~(T * 2 > 4)),
+    ('4 < speed < 10', (T * 2 > 4) & (T * 2 < 10)),
+    ('0 <= speed <= 2 < Engine.Rpm', (T * 2 <= 2) & (T * 100 > 2)),
+])
+def test_boolean_logic_is_element_wise(source, expected):
+    _, y = evaluate(source)
+    np.testing.assert_array_equal(y, expected.astype(np.float64))
+
+
+def test_power():
+    _, y = evaluate('speed ** 2 + 2 ** 3')
+    np.testing.assert_allclose(y, (T * 2) ** 2 + 8)
+
+
+def test_huge_constant_power_returns_quickly():
+    start = time.perf_counter()
+    _, y = evaluate('speed + 9 ** 9 ** 9')
+    assert time.perf_counter() - start < 1
+    assert np.isinf(y).all()
+
+
+@pytest.mark.parametrize('source', [
+    '__import__("os")', 'speed.__class__()', "'text'", 'speed if speed else 0',
+    'speed in speed', 'open(speed)', 'abs', 'rolling_mean(speed, speed)', '1 + 2',
+    'lambda: speed', 'speed[0]', '_pow(speed, 2)',
+    'rolling_mean(speed, "abc")', 'rolling_std(speed, -1s)', 'rolling_mean(speed, 0)',
+    'rolling_mean(speed, True)', 'rolling_mean(speed, 1e999)', 'rolling_mean(speed)',
+])
+def test_rejected_expressions(source):
+    with pytest.raises(ExpressionError):
+        compile_expression(source)
+
+
+def test_window_reads_inputs_for_window_plus_history():
+    calls = []
+    t, y = evaluate('rolling_mean(speed, 1s)', x_range=(4.0, 6.0), calls=calls)
+    assert calls == [('speed', (3.0, 6.0))]
+    assert t[0] == 4.0 and t[-1] == 6.0
+    assert y[0] == pytest.approx(np.mean([6.0, 7.0, 8.0]))
+
+
+def test_windowed_results_are_cached():
+    evaluate('speed * 3', x_range=(1.0, 2.0))
+    calls = []
+    evaluate('speed * 3', x_range=(1.0, 2.0), calls=calls)
+    assert calls == []
+
+
+def test_parse_definitions():
+    assert parse_definitions("# power\np = speed * Engine.Rpm\n\nq = p2") == {
+        'p': 'speed * Engine.Rpm', 'q': 'p2'}
+    with pytest.raises(ExpressionError, match='Line 1'):
+        parse_definitions('nonsense')
+
+
+def test_bad_rolling_window_is_an_expression_error():
+    with pytest.raises(ExpressionError, match='Line 1 \\(r\\)'):
+        parse_definitions('r = rolling_mean(speed, "abc")')
@@ -0,0 +1,22 @@
+import shutil
+
+from utils import fingerprint
+from utils.fingerprint import file_fingerprint
+
+
+def test_copies_share_a_fingerprint(tmp_path):
+    original = tmp_path / 'a.mf4'
+    original.write_bytes(b'recording' * 1000)
+    copy = tmp_path / 'b.mf4'
+    shutil.copyfile(original, copy)
+    assert file_fingerprint(str(original)) == file_fingerprint(str(copy))
+
+
+def test_same_edges_different_middle_differ(tmp_path, monkeypatch):
+    monkeypatch.setattr(fingerprint, 'CHUNK_BYTES', 16)
+    head, tail = b'H' * 64, b'T' * 64
+    first = tmp_path / 'a.mf4'
+    first.write_bytes(head + b'\x00' * 64 + tail)
+    second = tmp_path / 'b.mf4'
+    second.write_bytes(head + b'\x01' * 64 + tail)
+    assert file_fingerprint(str(first)) != file_fingerprint(str(second))
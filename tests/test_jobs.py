@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from utils import jobs
+from utils.jobs import FAILED, INDEXED, LOADING, QUEUED, JobQueue
+from utils.session_store import DiskBackend, SessionStore
+
+
+def _wait(queue, job_id):
+    queue._executor.shutdown(wait=True)
+    return queue.get(job_id)
+
+
+def test_job_runs_and_reports_progress():
+    queue = JobQueue(max_workers=1)
+    seen = []
+
+    def work(job, value):
+        seen.append(job.status)
+        job.update(LOADING, 'Half way')
+        return value * 2
+
+    job = _wait(queue, queue.submit('load', work, 21))
+    assert seen == [LOADING]
+    assert (job.status, job.message, job.result) == (INDEXED, 'Done', 42)
+    assert job.finished is not None and queue.pending() == 0
+
+
+def test_failures_are_recorded():
+    queue = JobQueue(max_workers=1)
+
+    def work(job):
+        raise ValueError('bad file')
+
+    job = _wait(queue, queue.submit('load', work))
+    assert (job.status, job.error, job.message) == (FAILED, 'bad file', 'Error: bad file')
+    job = queue.get(queue.fail('load', 'No file'))
+    assert (job.status, job.error) == (FAILED, 'No file')
+    assert queue.get('unknown') is None
+
+
+def test_full_queue_rejects_and_reports_positions():
+    queue = JobQueue(max_workers=1, max_pending=3)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block(job):
+        started.set()
+        release.wait(5)
+
+    running = queue.submit('load', block)
+    started.wait(5)
+    first = queue.submit('load', lambda job: None)
+    second = queue.submit('load', lambda job: None)
+    assert queue.get(second).status == QUEUED
+    assert (queue.queue_position(first), queue.queue_position(second)) == (0, 1)
+
+    rejected = queue.get(queue.submit('load', lambda job: None))
+    assert (rejected.status, rejected.error) == (FAILED, 'Server busy')
+    release.set()
+    assert _wait(queue, running).status == INDEXED
+
+
+def test_finished_jobs_are_pruned(monkeypatch):
+    monkeypatch.setattr(jobs, 'MAX_FINISHED_JOBS', 2)
+    queue = JobQueue()
+    ids = [queue.fail('load', 'No file') for _ in range(4)]
+    assert [queue.get(job_id) is not None for job_id in ids] == [False, True, True, True]
+
+
+@pytest.fixture
+def shared_store(tmp_path, monkeypatch):
+    store = SessionStore(DiskBackend(str(tmp_path / 'sessions')))
+    monkeypatch.setattr(jobs, 'session_store', store)
+    return store
+
+
+def test_other_processes_see_published_snapshots(shared_store):
+    queue = JobQueue(max_workers=1)
+    job_id = queue.submit('load', lambda job: {'file_id': 'abc'})
+    _wait(queue, job_id)
+
+    other_process = JobQueue(max_workers=1)
+    job = other_process.get(job_id)
+    assert (job.status, job.result) == (INDEXED, {'file_id': 'abc'})
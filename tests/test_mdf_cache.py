@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils import mdf_cache as cache_module
+from utils.mdf_cache import MDFCache
+
+
+class FakeMDF:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    handles = []
+
+    def open_mdf(path):
+        handles.append(FakeMDF(path))
+        return handles[-1]
+
+    monkeypatch.setattr(cache_module, 'open_mdf', open_mdf)
+    return handles
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"run{i}.mf4"
+        path.write_bytes(b'MDF' * (i + 1))
+        paths.append(str(path))
+    return paths
+
+
+def _use(cache, path, file_id=None):
+    with cache.checkout(path, file_id=file_id) as entry:
+        return entry
+
+
+def test_handles_are_reused(opened, files):
+    cache = MDFCache(max_handles=2)
+    first = _use(cache, files[0])
+    assert _use(cache, files[0]) is first
+    assert len(opened) == 1
+
+
+def test_least_recently_used_handle_is_closed(opened, files):
+    cache = MDFCache(max_handles=2)
+    _use(cache, files[0])
+    _use(cache, files[1])
+    _use(cache, files[0])
+    _use(cache, files[2])
+    closed = [os.path.basename(mdf.path) for mdf in opened if mdf.closed]
+    assert closed == ['run1.mf4']
+    assert cache.stats()['handles'] == 2
+
+
+def test_byte_budget_evicts_older_entries(opened, files):
+    cache = MDFCache(max_handles=8, max_bytes=1000)
+    with cache.checkout(files[0]) as entry:
+        cache.store_array(entry, 'master', np.zeros(100))
+    with cache.checkout(files[1]) as entry:
+        cache.store_array(entry, 'master', np.zeros(100))
+    assert opened[0].closed and not opened[1].closed
+
+
+def test_last_entry_drops_arrays_instead_of_closing(opened, files):
+    cache = MDFCache(max_bytes=100)
+    with cache.checkout(files[0]) as entry:
+        cache.store_array(entry, 'master', np.zeros(100))
+    assert entry.arrays == {} and not opened[0].closed
+
+
+def test_checked_out_handle_stays_open_until_released(opened, files):
+    cache = MDFCache(max_handles=1)
+    with cache.checkout(files[0]) as pinned:
+        _use(cache, files[1])
+        assert pinned.evicted and not opened[0].closed
+    assert opened[0].closed
+
+
+def test_file_id_resolves_to_its_path(opened, files):
+    cache = MDFCache()
+    entry = _use(cache, files[0], file_id='abc')
+    assert cache.path_for('abc') == files[0]
+    assert _use(cache, None, file_id='abc') is entry
+    with pytest.raises(KeyError):
+        cache.path_for('unknown')
+
+
+def test_changed_file_invalidates_its_handle(opened, files):
+    cache = MDFCache()
+    stale = _use(cache, files[0], file_id='abc')
+    with open(files[0], 'ab') as f:
+        f.write(b'more data')
+    fresh = _use(cache, None, file_id='abc')
+    assert fresh is not stale
+    assert opened[0].closed and not opened[1].closed
+
+
+def test_evict_file_and_close_all(opened, files):
+    cache = MDFCache()
+    _use(cache, files[0])
+    _use(cache, files[1])
+    cache.evict_file(files[0])
+    assert opened[0].closed and not opened[1].closed
+    cache.close_all()
+    assert opened[1].closed and cache.stats()['handles'] == 0
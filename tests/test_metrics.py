@@ -0,0 +1,73 @@
+import pytest
+
+from utils import metrics
+from utils.metrics import Registry
+
+
+def test_counters_and_labels_render():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests', ('path',))
+    assert registry.counter('requests_total', 'Requests', ('path',)) is requests
+    requests.inc(path='/a')
+    requests.inc(2, path='/a')
+    requests.inc(path='say "hi"\n')
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP requests_total Requests', '# TYPE requests_total counter']
+    assert 'requests_total{path="/a"} 3' in lines
+    assert 'requests_total{path="say \\"hi\\"\\n"} 1' in lines
+
+
+def test_gauges_set_or_read_at_scrape_time():
+    registry = Registry()
+    registry.gauge('temperature', 'Temperature').set(21.5)
+    registry.gauge('handles', 'Open handles', ('kind',), function=lambda: {('mdf',): 3})
+
+    def broken():
+        raise RuntimeError('gone')
+
+    registry.gauge('broken', 'Fails', function=broken)
+    text = registry.render()
+    assert 'temperature 21.5' in text
+    assert 'handles{kind="mdf"} 3' in text
+    assert 'broken' not in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1.0"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 5.65',
+        'latency_seconds_count 4',
+    ]
+
+
+def test_span_times_and_counts_errors(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(metrics, 'SPAN_SECONDS', registry.histogram('span', 'Spans', ('span',)))
+    monkeypatch.setattr(metrics, 'SPAN_ERRORS', registry.counter('errors', 'Errors', ('span',)))
+    with metrics.span('load'):
+        pass
+    with pytest.raises(KeyError):
+        with metrics.span('load'):
+            raise KeyError('x')
+    text = registry.render()
+    assert 'span_count{span="load"} 2' in text
+    assert 'errors{span="load"} 1' in text
+
+
+def test_cache_result_counts_hits_and_misses(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr(metrics, 'CACHE_REQUESTS',
+                        registry.counter('cache', 'Lookups', ('cache', 'result')))
+    metrics.cache_result('catalog', True)
+    metrics.cache_result('catalog', False)
+    metrics.cache_result('catalog', False)
+    text = registry.render()
+    assert 'cache{cache="catalog",result="hit"} 1' in text
+    assert 'cache{cache="catalog",result="miss"} 2' in text
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+asammdf = pytest.importorskip('asammdf')
+
+from asammdf import MDF, Signal  # noqa: E402
+from asammdf.blocks import v4_blocks  # noqa: E402
+
+from utils import mmap_reader  # noqa: E402
+from utils.mmap_reader import mapped_master, read_mapped  # noqa: E402
+
+
+N = 20_000
+T = np.arange(N) * 0.01
+
+
+def _signals():
+    linear = v4_blocks.ChannelConversion(conversion_type=1, a=0.5, b=-10.0)
+    rational = v4_blocks.ChannelConversion(conversion_type=2, P1=0.0, P2=2.0, P3=1.0,
+                                           P4=0.0, P5=0.0, P6=4.0)
+    raw = (np.arange(N) % 1000).astype(np.uint16)
+    return [
+        Signal(np.sin(T) * 100, T, name='Engine.Speed', unit='rpm'),
+        Signal(raw, T, name='lin', unit='V', conversion=linear),
+        Signal(raw, T, name='rat', conversion=rational),
+        Signal((T * 3).astype(np.float32), T, name='f32'),
+        Signal((np.arange(N) % 300 - 150).astype('>i2'), T, name='be16'),
+        Signal((np.arange(N) % 2).astype(bool), T, name='flag'),
+    ]
+
+
+def _save(path, compression=0, fragment_size=None):
+    mdf = MDF(version='4.10')
+    if fragment_size:
+        mdf.configure(write_fragment_size=fragment_size)
+    mdf.append(_signals())
+    mdf.append([Signal(np.arange(100.0), np.arange(100.0), name='Other.Rate')])
+    mdf.save(path, overwrite=True, compression=compression)
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('mdf')
+    return {
+        'plain': _save(directory / 'plain.mf4'),
+        'fragmented': _save(directory / 'fragmented.mf4', fragment_size=64 * 1024),
+        'compressed': _save(directory / 'compressed.mf4', compression=2),
+    }
+
+
+@pytest.mark.parametrize('kind', ['plain', 'fragmented'])
+@pytest.mark.parametrize('channel', ['Engine.Speed', 'lin', 'rat', 'f32', 'be16', 'Other.Rate'])
+def test_matches_asammdf(files, kind, channel):
+    expected = MDF(files[kind]).get(channel)
+    timestamps, samples, unit = read_mapped(files[kind], channel)
+    np.testing.assert_allclose(timestamps, expected.timestamps)
+    np.testing.assert_allclose(samples, expected.samples, rtol=1e-6)
+    assert unit == expected.unit
+
+
+def test_windowed_read_matches_asammdf(files):
+    expected = MDF(files['fragmented']).get('lin')
+    timestamps, samples, _ = read_mapped(files['fragmented'], 'lin', 5000, 12000)
+    np.testing.assert_array_equal(timestamps, expected.timestamps[5000:12000])
+    np.testing.assert_allclose(samples, expected.samples[5000:12000])
+
+
+def test_single_block_reads_are_views(files):
+    _, samples, _ = read_mapped(files['plain'], 'Engine.Speed')
+    assert mmap_reader.is_mapped_view(samples)
+    assert mmap_reader.is_mapped_view(mapped_master(files['plain'], 'Engine.Speed'))
+
+
+@pytest.mark.parametrize('kind, channel', [
+    ('plain', 'flag'), ('plain', 'time'), ('plain', 'missing'),
+    ('compressed', 'Engine.Speed'),
+])
+def test_falls_back_to_asammdf(files, kind, channel):
+    assert read_mapped(files[kind], channel) is None
+
+
+def test_computed_masters_respect_budget(files, monkeypatch):
+    cache = mmap_reader._MasterCache(max_bytes=N * 8)
+    monkeypatch.setattr(mmap_reader, '_masters', cache)
+    first = mapped_master(files['fragmented'], 'Engine.Speed')
+    assert not mmap_reader.is_mapped_view(first)
+    assert mapped_master(files['fragmented'], 'Engine.Speed') is first
+    mapped_master(files['fragmented'], 'Other.Rate')
+    assert cache.nbytes() <= N * 8
@@ -0,0 +1,62 @@
+import sys
+
+import pytest
+
+from utils import pip_jobs
+from utils.pip_jobs import build_pip_args, is_pip_command, pip_env
+
+
+@pytest.fixture(autouse=True)
+def site_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pip_jobs, 'session_site_dir', lambda session_id: str(tmp_path))
+    return str(tmp_path)
+
+
+def test_is_pip_command():
+    assert is_pip_command('pip install numpy')
+    assert is_pip_command('!pip list')
+    assert not is_pip_command('pipe = 1')
+
+
+def test_install_targets_session_dir(site_dir):
+    args = build_pip_args('pip install numpy', 'session')
+    assert args[:4] == [sys.executable, '-m', 'pip', 'install']
+    assert args[args.index('--target') + 1] == site_dir
+
+
+@pytest.mark.parametrize('subcommand', ['list', 'freeze'])
+def test_path_for_list_and_freeze(subcommand, site_dir):
+    args = build_pip_args(f'pip {subcommand}', 'session')
+    assert args[args.index('--path') + 1] == site_dir
+
+
+def test_show_has_no_path_option_but_sees_session_packages(site_dir):
+    args = build_pip_args('pip show numpy', 'session')
+    assert '--path' not in args
+    assert pip_env(args, 'session')['PYTHONPATH'].split(':')[0] == site_dir
+    assert pip_env(build_pip_args('pip install numpy', 'session'), 'session') is None
+
+
+def test_unsupported_subcommand():
+    with pytest.raises(ValueError):
+        build_pip_args('pip uninstall numpy', 'session')
+
+
+@pytest.mark.parametrize('option', [
+    '-t /tmp/x', '-t/tmp/x', '--target /tmp/x', '--target=/tmp/x', '--targ /tmp/x',
+    '--t=/tmp/x', '--prefix /tmp', '--pref /tmp', '--root /', '--ro /', '--user',
+    '--us', '-e .', '-e.', '-eDIR', '--editable .', '--edit .', '-Ut /tmp/x',
+    '-qe .', '-- -t',
+])
+def test_forbidden_options_are_rejected(option):
+    with pytest.raises(ValueError):
+        build_pip_args(f'pip install {option} numpy', 'session')
+
+
+@pytest.mark.parametrize('option', [
+    '--pre', '-U', '-q', '--upgrade', '--no-deps', '-r requirements.txt',
+    '-rrequirements-test.txt', '-i https://example.org/simple', '--index-url=https://te.st',
+    '--root-user-action=ignore', '--timeout 5',
+])
+def test_allowed_options(option):
+    build_pip_args(f'pip install {option} numpy', 'session')
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+asammdf = pytest.importorskip('asammdf')
+
+from asammdf import MDF, Signal  # noqa: E402
+
+from utils import pyramid, upload_store  # noqa: E402
+from utils.mdf_cache import mdf_cache  # noqa: E402
+from utils.pyramid import build_pyramid, read_pyramid_trace, remove_pyramid  # noqa: E402
+
+
+N = 200_000
+T = np.arange(N) * 0.001
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store, 'UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(pyramid, '_open_pyramids', type(pyramid._open_pyramids)())
+    values = np.sin(T) * 100
+    values[N // 2] = 500.0
+    mdf = MDF(version='4.10')
+    mdf.append([Signal(values, T, name='Speed', unit='rpm')])
+    path = str(tmp_path / 'run.mf4')
+    mdf.save(path, overwrite=True)
+    yield path, values
+    mdf_cache.evict_file(path)
+
+
+def test_round_trip_keeps_extremes(recording):
+    path, values = recording
+    target = build_pyramid(path)
+    assert build_pyramid(path) == target
+
+    x, y, unit = read_pyramid_trace(path, 'Speed', 1000)
+    assert unit == 'rpm'
+    assert 1000 <= len(y) < N
+    assert np.nanmax(y) == 500.0 and np.nanmin(y) == values.min()
+    assert np.all(np.diff(x) >= 0)
+
+
+def test_window_reads_only_its_buckets(recording):
+    path, _ = recording
+    build_pyramid(path)
+    x, y, _ = read_pyramid_trace(path, 'Speed', 200, x_range=(50.0, 60.0))
+    assert x[0] < 50.5 and x[-1] > 59.5
+    assert x[-1] - x[0] < 12.0
+
+
+def test_missing_channels_and_removal(recording):
+    path, _ = recording
+    assert read_pyramid_trace(path, 'Speed', 1000) is None
+    target = build_pyramid(path)
+    assert read_pyramid_trace(path, 'Missing', 1000) is None
+    assert read_pyramid_trace(path, 'Speed', N) is None
+    remove_pyramid(path)
+    assert not os.path.exists(target)
+    assert read_pyramid_trace(path, 'Speed', 1000) is None
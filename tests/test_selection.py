@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from utils import selection as selection_module
+from utils.selection import (format_path_spec, parse_path_spec, select_channels,
+                             selection_key, selection_window)
+
+
+def test_plain_path_has_no_selection():
+    assert parse_path_spec('  /data/run.mf4 ') == ('/data/run.mf4', None)
+    assert parse_path_spec('/data/run.mf4 | ') == ('/data/run.mf4', None)
+    assert parse_path_spec(None) == ('', None)
+
+
+def test_patterns_and_window():
+    path, selection = parse_path_spec('/data/run.mf4 | Engine.* VehSpd, Gear | 120..150')
+    assert path == '/data/run.mf4'
+    assert selection == {'channels': ['Engine.*', 'VehSpd', 'Gear'], 'window': [120.0, 150.0]}
+    assert format_path_spec(path, selection) == '/data/run.mf4 | Engine.* VehSpd Gear | 120..150'
+    assert parse_path_spec(format_path_spec(path, selection)) == (path, selection)
+
+
+@pytest.mark.parametrize('text, window', [
+    ('run.mf4 | 120..', [120.0, None]),
+    ('run.mf4 | ..1.5e2', [None, 150.0]),
+    ('run.mf4 | -5 .. .5', [-5.0, 0.5]),
+])
+def test_open_and_signed_windows(text, window):
+    assert parse_path_spec(text)[1] == {'channels': [], 'window': window}
+
+
+@pytest.mark.parametrize('text', ['run.mf4 | 150..120', 'run.mf4 | 1..2 | 3..4'])
+def test_malformed_windows(text):
+    with pytest.raises(ValueError):
+        parse_path_spec(text)
+
+
+def test_window_and_key():
+    assert selection_window(None) is None
+    assert selection_window({'channels': ['a'], 'window': None}) is None
+    assert selection_window({'channels': [], 'window': [None, 5.0]}) == (-math.inf, 5.0)
+    assert selection_key({'channels': ['a'], 'window': [1.0, 2.0]}) == (('a',), (1.0, 2.0))
+    assert selection_key(None) is None
+
+
+def test_select_channels_filters_by_pattern_and_time_range(monkeypatch):
+    ranges = {'Engine.Speed': (0.0, 100.0), 'Engine.Torque': (200.0, 300.0),
+              'VehSpd': (None, None)}
+    monkeypatch.setattr(selection_module.catalog, 'time_ranges', lambda path: ranges)
+    names = ['VehSpd', 'Engine.Speed', 'Engine.Torque', 'Gear']
+
+    assert select_channels('run.mf4', names, None) == names
+    _, selection = parse_path_spec('run.mf4 | Engine.*')
+    assert select_channels('run.mf4', names, selection) == ['Engine.Speed', 'Engine.Torque']
+    _, selection = parse_path_spec('run.mf4 | 150..')
+    assert select_channels('run.mf4', names, selection) == ['VehSpd', 'Engine.Torque', 'Gear']
+    _, selection = parse_path_spec('run.mf4 | engine.* | 0..10')
+    assert select_channels('run.mf4', names, selection) == []
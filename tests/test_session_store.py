@@ -0,0 +1,97 @@
+import json
+import os
+import stat
+import time
+
+import pytest
+
+from utils import session_store as store_module
+from utils.session_store import DiskBackend, MemoryBackend, SessionStore
+
+
+def test_memory_backend_drops_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('session-a-x', 1)
+    backend.set('session-b-x', 2)
+    backend.get('session-a-x')
+    backend.set('session-c-x', 3)
+    assert backend.get('session-b-x') is None
+    assert backend.get('session-a-x') == 1
+
+
+def test_memory_backend_keeps_file_metadata_when_full():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('file-1', {'file_path': 'a.mf4'})
+    for i in range(5):
+        backend.set(f'session-{i}-x', i)
+    assert backend.get('file-1') == {'file_path': 'a.mf4'}
+
+
+def test_memory_backend_expires_unused_entries(monkeypatch):
+    backend = MemoryBackend(ttl=10)
+    backend.set('file-1', {'file_path': 'a.mf4'})
+    later = time.monotonic() + store_module.SWEEP_INTERVAL_SECONDS + 11
+    monkeypatch.setattr(store_module.time, 'monotonic', lambda: later)
+    backend.set('session-a-x', 1)
+    assert backend.get('file-1') is None
+
+
+@pytest.fixture
+def disk(tmp_path, monkeypatch):
+    backend = DiskBackend(str(tmp_path / 'sessions'), ttl=60)
+    monkeypatch.setattr(backend, '_start_janitor', lambda: None)
+    return backend
+
+
+def test_disk_backend_is_private_json(disk):
+    disk.set('file-1', {'file_path': 'a.mf4', 'window': (1, 2)})
+    assert stat.S_IMODE(os.stat(disk.directory).st_mode) == 0o700
+    with open(disk._path('file-1')) as f:
+        assert json.load(f) == {'file_path': 'a.mf4', 'window': [1, 2]}
+    assert disk.get('file-1')['file_path'] == 'a.mf4'
+    disk.delete('file-1')
+    assert disk.get('file-1') is None
+
+
+def test_disk_backend_tightens_existing_directory(tmp_path):
+    directory = tmp_path / 'sessions'
+    directory.mkdir(mode=0o755)
+    DiskBackend(str(directory))
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_disk_backend_ignores_corrupt_entries(disk):
+    with open(disk._path('job-1'), 'w') as f:
+        f.write('{not json')
+    assert disk.get('job-1') is None
+
+
+def test_disk_backend_sweep_expires_unused_entries(disk):
+    disk.set('signal-old', {'channel': 'a'})
+    disk.set('signal-new', {'channel': 'b'})
+    old = time.time() - 120
+    os.utime(disk._path('signal-old'), (old, old))
+    disk.sweep()
+    assert disk.get('signal-old') is None
+    assert disk.get('signal-new') == {'channel': 'b'}
+
+
+def test_disk_backend_reads_keep_entries_alive(disk):
+    disk.set('file-1', {'file_path': 'a.mf4'})
+    old = time.time() - 120
+    os.utime(disk._path('file-1'), (old, old))
+    assert disk.get('file-1')
+    disk.sweep()
+    assert disk.get('file-1')
+
+
+def test_publish_only_when_shared(disk):
+    memory = SessionStore(MemoryBackend())
+    memory.publish('job', 'abc', {'status': 'queued'})
+    assert memory.published('job', 'abc') is None
+
+    shared = SessionStore(disk)
+    shared.publish('job', 'abc', {'status': 'queued'})
+    assert shared.published('job', 'abc') == {'status': 'queued'}
+    shared.unpublish('job', 'abc')
+    assert shared.published('job', 'abc') is None
@@ -0,0 +1,103 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from utils import upload_store
+from utils.upload_store import ContentStore, received_bytes, write_chunk
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store, 'UPLOAD_DIR', str(tmp_path))
+    store = ContentStore(max_bytes=0, lease_seconds=3600)
+    monkeypatch.setattr(upload_store, 'content_store', store)
+    # The janitor thread is not needed; tests sweep explicitly
+    monkeypatch.setattr(store, 'start_janitor', lambda: None)
+    return tmp_path
+
+
+def _upload(upload_id, payload, chunk=4):
+    for offset in range(0, len(payload), chunk):
+        status = write_chunk(upload_id, 'run.mf4', offset, len(payload),
+                             io.BytesIO(payload[offset:offset + chunk]))
+    return status
+
+
+def test_chunked_upload_lands_in_content_store():
+    payload = b'0123456789abcdef'
+    assert _upload('upload-0001', payload) == {'received': len(payload), 'complete': True}
+    completed = upload_store.pop_completed_upload('upload-0001')
+    assert completed['digest'] == hashlib.sha256(payload).hexdigest()
+    assert os.path.basename(completed['path']) == f"{completed['digest']}.mf4"
+    with open(completed['path'], 'rb') as f:
+        assert f.read() == payload
+
+
+def test_identical_uploads_are_stored_once():
+    _upload('upload-0001', b'same content')
+    _upload('upload-0002', b'same content')
+    first = upload_store.pop_completed_upload('upload-0001')['path']
+    assert upload_store.pop_completed_upload('upload-0002')['path'] == first
+    assert upload_store.content_store.stats()['blobs'] == 1
+
+
+def test_wrong_offset_reports_received_bytes():
+    write_chunk('upload-0001', 'run.mf4', 0, 8, io.BytesIO(b'abcd'))
+    status = write_chunk('upload-0001', 'run.mf4', 0, 8, io.BytesIO(b'abcd'))
+    assert status == {'received': 4, 'complete': False, 'mismatch': True}
+    assert received_bytes('upload-0001') == 4
+
+
+def test_chunk_during_another_write_is_rejected():
+    write_chunk('upload-0001', 'run.mf4', 0, 8, io.BytesIO(b'abcd'))
+    upload_store._writing.add('upload-0001')
+    try:
+        status = write_chunk('upload-0001', 'run.mf4', 4, 8, io.BytesIO(b'efgh'))
+    finally:
+        upload_store._writing.discard('upload-0001')
+    assert status['mismatch']
+    assert received_bytes('upload-0001') == 4
+
+
+def test_oversized_upload_is_discarded():
+    status = write_chunk('upload-0001', 'run.mf4', 0, 4, io.BytesIO(b'abcdefgh'))
+    assert status['error']
+    assert received_bytes('upload-0001') == 0
+
+
+def test_abandoned_hashes_are_forgotten():
+    write_chunk('upload-0001', 'run.mf4', 0, 8, io.BytesIO(b'abcd'))
+    assert 'upload-0001' in upload_store._upload_hashes
+    os.remove(upload_store._partial_path('upload-0001'))
+    upload_store.content_store.sweep()
+    assert 'upload-0001' not in upload_store._upload_hashes
+
+
+def test_blob_is_kept_while_any_holder_uses_it():
+    _upload('upload-0001', b'recording')
+    path = upload_store.pop_completed_upload('upload-0001')['path']
+    store = upload_store.content_store
+    evicted = []
+    store.on_evict(evicted.append)
+
+    store.acquire(path, 'session-a')
+    store.acquire(path, 'session-b')
+    store.release(path, 'session-a')
+    store.sweep()
+    assert os.path.exists(path) and not evicted
+
+    store.release(path, 'session-b')
+    store.sweep()
+    assert not os.path.exists(path)
+    assert evicted == [path]
+
+
+def test_release_remove_unused():
+    _upload('upload-0001', b'broken recording')
+    path = upload_store.pop_completed_upload('upload-0001')['path']
+    store = ContentStore()
+    store.acquire(path, 'session-a')
+    store.release(path, 'session-a', remove_unused=True)
+    assert not os.path.exists(path)
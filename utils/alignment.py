@@ -0,0 +1,93 @@
+"""
+Vectorised resampling of signals from one or more files onto a common time base.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+RESAMPLE_METHODS = ('linear', 'zoh')
+
+# Upper bound on the common time base length
+MAX_ALIGNED_SAMPLES = 20_000_000
+
+
+def resample(timestamps, samples, time_base, method='linear'):
+    """Resample one signal onto time_base.
+
+    'linear' interpolates with np.interp; 'zoh' holds the last sample at or
+    before each new timestamp. Points outside the signal's range are NaN.
+    """
+    samples = np.asarray(samples)
+    if not len(timestamps):
+        return np.full(len(time_base), np.nan)
+
+    if method == 'zoh':
+        idx = np.searchsorted(timestamps, time_base, side='right') - 1
+        result = samples[np.clip(idx, 0, len(samples) - 1)].astype(np.float64)
+    elif method == 'linear':
+        result = np.interp(time_base, timestamps, samples.astype(np.float64))
+    else:
+        raise ValueError(f"Unknown resample method: {method}")
+
+    outside = (time_base < timestamps[0]) | (time_base > timestamps[-1])
+    result[outside] = np.nan
+    return result
+
+
+def common_time_base(timestamps_list, step=None, overlap=False):
+    """Build an evenly spaced time base covering the given timestamp arrays.
+
+    The default step is the finest median sample interval of the inputs.
+    With overlap=True only the range shared by all inputs is covered. A step
+    that would need more than MAX_ALIGNED_SAMPLES points is widened so the
+    base still spans the whole range.
+    """
+    non_empty = [t for t in timestamps_list if len(t)]
+    if not non_empty:
+        return np.empty(0)
+
+    starts = [t[0] for t in non_empty]
+    ends = [t[-1] for t in non_empty]
+    t0, t1 = (max(starts), min(ends)) if overlap else (min(starts), max(ends))
+    if t1 <= t0:
+        return np.empty(0)
+
+    if step is None:
+        steps = [np.median(np.diff(t)) for t in non_empty if len(t) > 1]
+        step = min((s for s in steps if s > 0), default=(t1 - t0) / 1000)
+
+    # The tolerance keeps t1 when the span is a float-rounded multiple of step
+    count = int((t1 - t0) / step + 1e-9) + 1
+    if count > MAX_ALIGNED_SAMPLES:
+        print(f"Aligned step {step:g}s needs {count} samples; "
+              f"widening it to {(t1 - t0) / (MAX_ALIGNED_SAMPLES - 1):g}s", flush=True)
+        return np.linspace(t0, t1, MAX_ALIGNED_SAMPLES)
+    return np.linspace(t0, t0 + step * (count - 1), count)
+
+
+def align_signals(signals, step=None, method='linear', overlap=False, relative=False):
+    """Resample several (timestamps, samples) pairs onto one time base.
+
+    With relative=True each signal's time starts at zero, which lines up
+    recordings made at different absolute times (e.g. a regression run
+    against a golden run). Returns (time_base, [resampled arrays]).
+    """
+    pairs = []
+    for timestamps, samples in signals:
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if relative and len(timestamps):
+            timestamps = timestamps - timestamps[0]
+        pairs.append((timestamps, samples))
+
+    time_base = common_time_base([t for t, _ in pairs], step=step, overlap=overlap)
+    return time_base, [resample(t, y, time_base, method) for t, y in pairs]
+
+
+def load_parallel(loader, keys, max_workers=4):
+    """Call loader(key) for each key on a thread pool and return results in order."""
+    if len(keys) <= 1:
+        return [loader(key) for key in keys]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as pool:
+        return list(pool.map(loader, keys))
@@ -0,0 +1,211 @@
+"""
+Persistent SQLite catalog of opened MDF files and their channels.
+Reopening a known file answers its metadata from here without asammdf, and
+the catalog can be queried across all recordings seen so far.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from utils.fingerprint import file_fingerprint
+from utils.metrics import cache_result
+from utils.upload_store import get_upload_dir
+
+
+CATALOG_PATH = os.environ.get('LOGSCOPE_CATALOG', '')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    mdf_version TEXT,
+    groups_count INTEGER,
+    start_time TEXT,
+    indexed_time REAL,
+    UNIQUE (path, mtime_ns, size)
+);
+CREATE INDEX IF NOT EXISTS files_fingerprint ON files (fingerprint);
+CREATE TABLE IF NOT EXISTS channels (
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    unit TEXT,
+    group_index INTEGER,
+    channel_index INTEGER,
+    samples INTEGER,
+    t_min REAL,
+    t_max REAL
+);
+CREATE INDEX IF NOT EXISTS channels_name ON channels (name);
+CREATE INDEX IF NOT EXISTS channels_file ON channels (file_id, position);
+"""
+
+
+def _group_summary(mdf, group_index, group):
+    """Return (samples, t_min, t_max) of a group from its first and last master values."""
+    try:
+        samples = int(group.channel_group.cycles_nr)
+    except AttributeError:
+        return None, None, None
+    if not samples:
+        return 0, None, None
+    try:
+        first = mdf.get_master(group_index, record_offset=0, record_count=1)
+        last = mdf.get_master(group_index, record_offset=samples - 1, record_count=1)
+        return samples, float(first[0]), float(last[-1])
+    except Exception:
+        return samples, None, None
+
+
+class Catalog:
+    """Thread-safe access to the catalog database (one connection per thread)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            path = self.path or CATALOG_PATH or os.path.join(get_upload_dir(), 'catalog.sqlite')
+            conn = sqlite3.connect(path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _find_file(self, conn, file_path):
+        real_path = os.path.realpath(file_path)
+        stats = os.stat(real_path)
+        row = conn.execute(
+            'SELECT * FROM files WHERE path = ? AND mtime_ns = ? AND size = ?',
+            (real_path, stats.st_mtime_ns, stats.st_size)
+        ).fetchone()
+        if row is None:
+            # A copy of a known recording under another path
+            row = conn.execute(
+                'SELECT * FROM files WHERE fingerprint = ? ORDER BY indexed_time DESC LIMIT 1',
+                (file_fingerprint(real_path),)
+            ).fetchone()
+        return row
+
+    def lookup(self, file_path):
+        """Return cached file metadata like scan_mdf_metadata's, or None if unknown."""
+        try:
+            conn = self._connect()
+            row = self._find_file(conn, file_path)
+            cache_result('catalog', row is not None)
+            if row is None:
+                return None
+            names = [r['name'] for r in conn.execute(
+                'SELECT name FROM channels WHERE file_id = ? '
+                'GROUP BY name ORDER BY MIN(position)', (row['id'],))]
+        except (OSError, sqlite3.Error) as e:
+            print(f"Catalog lookup failed for {file_path}: {e}", flush=True)
+            return None
+
+        return {
+            'signal_names': names,
+            'groups_count': row['groups_count'],
+            'mdf_version': row['mdf_version'],
+        }
+
+    def time_ranges(self, file_path):
+        """Return {channel name: (t_min, t_max)} of a catalogued file, empty if unknown."""
+        try:
+            conn = self._connect()
+            row = self._find_file(conn, file_path)
+            if row is None:
+                return {}
+            rows = conn.execute(
+                'SELECT name, MIN(t_min) AS t_min, MAX(t_max) AS t_max FROM channels '
+                'WHERE file_id = ? GROUP BY name', (row['id'],)).fetchall()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Catalog lookup failed for {file_path}: {e}", flush=True)
+            return {}
+        return {r['name']: (r['t_min'], r['t_max']) for r in rows}
+
+    def record(self, file_path, mdf, metadata):
+        """Store a file's channels, units, locations, sample counts and time ranges."""
+        real_path = os.path.realpath(file_path)
+        stats = os.stat(real_path)
+        channels_db = getattr(mdf, 'channels_db', None) or {}
+
+        summaries = {}
+        for group_index, group in enumerate(mdf.groups):
+            summaries[group_index] = _group_summary(mdf, group_index, group)
+
+        rows = []
+        for position, name in enumerate(metadata['signal_names']):
+            for group_index, channel_index in channels_db.get(name) or [(None, None)]:
+                unit = ''
+                samples = t_min = t_max = None
+                if group_index is not None:
+                    try:
+                        channel = mdf.groups[group_index].channels[channel_index]
+                        unit = getattr(channel, 'unit', '') or ''
+                    except (IndexError, AttributeError):
+                        pass
+                    samples, t_min, t_max = summaries.get(group_index, (None, None, None))
+                rows.append((position, name, unit, group_index, channel_index,
+                             samples, t_min, t_max))
+
+        start_time = getattr(getattr(mdf, 'header', None), 'start_time', None)
+        conn = self._connect()
+        with conn:
+            # Only the current version of a path is kept
+            conn.execute('DELETE FROM files WHERE path = ?', (real_path,))
+            cursor = conn.execute(
+                'INSERT INTO files (path, mtime_ns, size, fingerprint, mdf_version, '
+                'groups_count, start_time, indexed_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (real_path, stats.st_mtime_ns, stats.st_size, file_fingerprint(real_path),
+                 str(metadata['mdf_version']), metadata['groups_count'],
+                 start_time.isoformat() if start_time else None, time.time())
+            )
+            conn.executemany(
+                'INSERT INTO channels (file_id, position, name, unit, group_index, '
+                'channel_index, samples, t_min, t_max) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(cursor.lastrowid,) + row for row in rows]
+            )
+        print(f"Catalogued {len(rows)} channel locations of {real_path}", flush=True)
+
+    def find_recordings(self, channel, t0=None, t1=None):
+        """Return recordings holding a channel with data overlapping [t0, t1].
+
+        channel may be a glob pattern (e.g. 'Eng*Speed'). Times are relative
+        to each recording's start, as stored in the file. Files that no
+        longer exist are left out.
+        """
+        query = ('SELECT f.path, f.start_time, c.name, c.unit, c.samples, c.t_min, c.t_max '
+                 'FROM channels c JOIN files f ON f.id = c.file_id WHERE c.name GLOB ?')
+        params = [channel]
+        if t1 is not None:
+            query += ' AND c.t_min <= ?'
+            params.append(t1)
+        if t0 is not None:
+            query += ' AND c.t_max >= ?'
+            params.append(t0)
+        query += ' ORDER BY f.path, c.position'
+
+        rows = self._connect().execute(query, params).fetchall()
+        return [dict(row) for row in rows if os.path.exists(row['path'])]
+
+    def files(self):
+        """Return all catalogued files, newest first."""
+        rows = self._connect().execute(
+            'SELECT f.*, COUNT(DISTINCT c.name) AS channel_count FROM files f '
+            'LEFT JOIN channels c ON c.file_id = f.id GROUP BY f.id '
+            'ORDER BY f.indexed_time DESC'
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+# Shared catalog used by the file callbacks and console kernels
+catalog = Catalog()
@@ -0,0 +1,149 @@
+"""
+Server-side channel name index with prefix, fuzzy (trigram) and regex search.
+Built once per file so the browser only ever receives a page of matches.
+"""
+
+import bisect
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.fingerprint import file_fingerprint
+from utils.mdf_cache import mdf_cache
+from utils.export import find_columnar_copy, columnar_signal_names
+from utils.catalog import catalog
+from utils.metrics import cache_result, span
+from utils.selection import select_channels, selection_key
+
+
+# Indexes kept in memory, one per distinct file
+MAX_INDEXES = 16
+
+# Characters separating the parts of hierarchical channel names
+_SEGMENT_SPLIT = re.compile(r'[.\/_:\s\[\]]+')
+
+SEARCH_MODES = ('prefix', 'fuzzy', 'regex')
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ChannelIndex:
+    """Searchable index over one file's channel names."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        lowered = [name.lower() for name in self.names]
+
+        # Sorted (key, id) lists give prefix lookups by binary search, for
+        # whole names and for each segment of dotted/underscored names
+        prefix_keys = []
+        for idx, name in enumerate(lowered):
+            prefix_keys.append((name, idx))
+            for segment in _SEGMENT_SPLIT.split(name)[1:]:
+                if segment:
+                    prefix_keys.append((segment, idx))
+        prefix_keys.sort()
+        self._prefix_keys = [key for key, _ in prefix_keys]
+        self._prefix_ids = np.array([idx for _, idx in prefix_keys], dtype=np.int64)
+
+        # Trigram -> ids of names containing it
+        postings = {}
+        for idx, name in enumerate(lowered):
+            for gram in _trigrams(name):
+                postings.setdefault(gram, []).append(idx)
+        self._trigrams = {gram: np.array(ids, dtype=np.int64)
+                          for gram, ids in postings.items()}
+        self._gram_counts = np.array([len(_trigrams(name)) for name in lowered],
+                                     dtype=np.int64)
+
+    def _prefix(self, query):
+        query = query.lower()
+        start = bisect.bisect_left(self._prefix_keys, query)
+        stop = bisect.bisect_left(self._prefix_keys, query + '\uffff')
+        # A name can match through several segments; report it once, in file order
+        return np.unique(self._prefix_ids[start:stop])
+
+    def _fuzzy(self, query, min_score=0.2):
+        grams = [g for g in _trigrams(query.lower()) if g in self._trigrams]
+        if not grams:
+            return np.empty(0, dtype=np.int64)
+
+        hits = np.bincount(np.concatenate([self._trigrams[g] for g in grams]),
+                           minlength=len(self.names))
+        query_count = len(_trigrams(query.lower()))
+        # Jaccard similarity between the query's and each name's trigrams
+        scores = hits / (query_count + self._gram_counts - hits)
+        candidates = np.nonzero(scores >= min_score)[0]
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def _regex(self, query):
+        pattern = re.compile(query, re.IGNORECASE)
+        return np.array([idx for idx, name in enumerate(self.names) if pattern.search(name)],
+                        dtype=np.int64)
+
+    def search(self, query, mode='prefix', offset=0, limit=100):
+        """Return (names, total) for one page of matches.
+
+        An empty query pages through all channels in file order. Raises
+        re.error for an invalid regex.
+        """
+        query = (query or '').strip()
+        if not query:
+            ids = np.arange(len(self.names))
+        elif mode == 'regex':
+            ids = self._regex(query)
+        elif mode == 'fuzzy':
+            ids = self._fuzzy(query)
+        else:
+            ids = self._prefix(query)
+
+        page = ids[offset:offset + limit]
+        return [self.names[i] for i in page], len(ids)
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_channel_index(file_path=None, file_id=None, selection=None):
+    """Return the index for a file, building it on first use.
+
+    With a selection (see utils.selection) only the channels it keeps are indexed.
+    """
+    file_path = file_path or mdf_cache.path_for(file_id)
+    key = (file_fingerprint(file_path), selection_key(selection))
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            cache_result('channel_index', True)
+            return index
+
+    cache_result('channel_index', False)
+    cached = catalog.lookup(file_path)
+    manifest = find_columnar_copy(file_path) if cached is None else None
+    if cached is not None:
+        names = cached['signal_names']
+    elif manifest is not None:
+        names = columnar_signal_names(manifest)
+    else:
+        with mdf_cache.checkout(file_path, file_id=file_id) as entry:
+            names = entry.metadata.get('signal_names')
+            if names is None:
+                names = list(entry.mdf.channels_db)
+    if selection:
+        names = select_channels(file_path, names, selection)
+    with span('channel_index_build'):
+        index = ChannelIndex(names)
+
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,782 @@
+"""
+Per-session Python console kernels running in separate worker processes.
+Each browser session gets its own namespace, resource limits and output stream.
+"""
+
+import ast
+import atexit
+import importlib
+import multiprocessing
+import os
+import reprlib
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+
+from utils.shared_signals import shared_signals, attach_signal
+from utils.alignment import align_signals
+from utils.catalog import catalog
+from utils.metrics import registry
+from utils.session_store import session_store
+
+
+MAX_KERNELS = int(os.environ.get('LOGSCOPE_MAX_KERNELS', 8))
+KERNEL_MEMORY_MB = int(os.environ.get('LOGSCOPE_KERNEL_MEMORY_MB', 2048))
+KERNEL_CPU_SECONDS = int(os.environ.get('LOGSCOPE_KERNEL_CPU_SECONDS', 3600))
+EXECUTION_TIMEOUT = float(os.environ.get('LOGSCOPE_KERNEL_TIMEOUT', 300))
+KERNEL_IDLE_SECONDS = float(os.environ.get('LOGSCOPE_KERNEL_IDLE', 1800))
+
+# Packages installed from the console go to a per-session directory under here
+SITE_DIR = os.environ.get('LOGSCOPE_SITE_DIR',
+                          os.path.join(tempfile.gettempdir(), 'logscope_site'))
+
+# Output is sent to the parent once this many characters are buffered
+OUTPUT_FLUSH_CHARS = 4096
+OUTPUT_FLUSH_SECONDS = 0.2
+
+# Characters of output kept per execution on the server; older output is dropped
+OUTPUT_BUFFER_CHARS = int(os.environ.get('LOGSCOPE_CONSOLE_OUTPUT_CHARS', 1_000_000))
+
+# Seconds a variable drill-down waits for the worker
+INSPECT_TIMEOUT = 5
+
+# How often running output is republished for polls served by other processes
+PUBLISH_INTERVAL_SECONDS = 0.5
+
+
+def session_site_dir(session_id):
+    """Return the directory holding a session's pip-installed packages."""
+    safe_id = ''.join(c for c in session_id if c.isalnum() or c == '-')
+    path = os.path.join(SITE_DIR, safe_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------------------------
+
+def _apply_limits(memory_mb, cpu_seconds):
+    """Apply address space and CPU time limits to the current process."""
+    try:
+        import resource
+    except ImportError:
+        return  # Not available on Windows
+
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+
+
+class _StreamWriter:
+    """File-like object forwarding writes to the parent in small batches."""
+
+    def __init__(self, conn, exec_id):
+        self.conn = conn
+        self.exec_id = exec_id
+        self.buffer = []
+        self.size = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, text):
+        if not text:
+            return 0
+        self.buffer.append(text)
+        self.size += len(text)
+        if (self.size >= OUTPUT_FLUSH_CHARS
+                or time.monotonic() - self.last_flush >= OUTPUT_FLUSH_SECONDS):
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            self.conn.send(('output', self.exec_id, ''.join(self.buffer)))
+            self.buffer = []
+            self.size = 0
+        self.last_flush = time.monotonic()
+
+    def isatty(self):
+        return False
+
+
+class SharedChannel:
+    """A channel of the loaded file mapped read-only from shared memory."""
+
+    def __init__(self, name, unit, timestamps, samples, blocks):
+        self.name = name
+        self.unit = unit
+        self.timestamps = timestamps
+        self.samples = samples
+        self._blocks = blocks
+
+    def __iter__(self):
+        return iter((self.timestamps, self.samples))
+
+    def __repr__(self):
+        return (f"<SharedChannel {self.name} [{self.unit}] "
+                f"{self.samples.shape} {self.samples.dtype}>")
+
+
+class _SignalAccessor:
+    """Maps channels of the session's loaded file from the shared signal store.
+
+    Channels are decoded once in the Dash process; the first access from the
+    kernel asks for the shared memory descriptor and maps it without copying.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.file_path = None
+        self._channels = {}
+
+    def set_file(self, file_path):
+        if file_path != self.file_path:
+            self.file_path = file_path
+            self._channels = {}
+
+    def __getitem__(self, name):
+        """Return the SharedChannel for a channel of the loaded file."""
+        if not self.file_path:
+            raise RuntimeError("No MDF file loaded")
+        if name not in self._channels:
+            self.conn.send(('signal_request', None, name))
+            _, descriptor = self.conn.recv()
+            if descriptor.get('error'):
+                raise KeyError(f"{name}: {descriptor['error']}")
+            blocks, timestamps, samples = attach_signal(descriptor)
+            self._channels[name] = SharedChannel(name, descriptor['unit'], timestamps,
+                                                 samples, tuple(blocks))
+        return self._channels[name]
+
+    def __call__(self, name):
+        """Return (timestamps, samples) of a channel of the loaded file."""
+        channel = self[name]
+        return channel.timestamps, channel.samples
+
+    def __repr__(self):
+        loaded = ', '.join(self._channels) or 'none mapped yet'
+        return f"<signals of {self.file_path or 'no file'}: {loaded}>"
+
+
+def _make_find_recordings(conn):
+    """Build the console's find_recordings helper, answered by the Dash process."""
+    def find_recordings(channel, t0=None, t1=None):
+        """List catalogued recordings holding channel (glob allowed) within [t0, t1]."""
+        conn.send(('catalog_request', None, (channel, t0, t1)))
+        _, rows = conn.recv()
+        if isinstance(rows, dict):
+            raise RuntimeError(rows['error'])
+        return rows
+    return find_recordings
+
+
+# Variables summarised after each command, and children listed per drill-down
+MAX_SUMMARISED_VARIABLES = 200
+MAX_INSPECT_CHILDREN = 50
+PREVIEW_CHARS = 80
+
+# Values carried over when a kernel restarts; larger ones are only summarised
+SEED_STRING_CHARS = 1000
+
+_preview = reprlib.Repr()
+_preview.maxlist = _preview.maxtuple = _preview.maxset = _preview.maxdict = 5
+_preview.maxstring = _preview.maxother = PREVIEW_CHARS
+_preview.maxlevel = 2
+
+
+def _summarise(value):
+    """Return a small description of a value: type, shape, dtype, size and preview."""
+    summary = {'type': type(value).__name__}
+
+    shape = getattr(value, 'shape', None)
+    if isinstance(shape, tuple):
+        summary['shape'] = list(shape)
+    elif isinstance(value, (list, tuple, dict, set, frozenset)):
+        summary['shape'] = [len(value)]
+
+    dtype = getattr(value, 'dtype', None)
+    if dtype is not None:
+        summary['dtype'] = str(dtype)
+
+    nbytes = getattr(value, 'nbytes', None)
+    if not isinstance(nbytes, int):
+        try:
+            nbytes = sys.getsizeof(value)  # Shallow size for containers
+        except TypeError:
+            nbytes = None
+    summary['nbytes'] = nbytes
+
+    try:
+        if isinstance(value, (list, tuple, dict, set, frozenset, str, bytes)):
+            preview = _preview.repr(value)
+        else:
+            preview = repr(value)
+    except Exception:
+        preview = f"<{summary['type']} object>"
+    preview = ' '.join(preview.split())
+    if len(preview) > PREVIEW_CHARS:
+        preview = preview[:PREVIEW_CHARS - 3] + '...'
+    summary['preview'] = preview
+    return summary
+
+
+def _summarise_namespace(namespace, hidden):
+    """Summarise user variables of the namespace, skipping private names and helpers."""
+    names = [key for key in namespace if not key.startswith('_') and key not in hidden]
+    return {key: _summarise(namespace[key]) for key in names[:MAX_SUMMARISED_VARIABLES]}
+
+
+def _seed_values(namespace, hidden):
+    """Return the small plain values worth restoring into a restarted kernel."""
+    seed = {}
+    for key, value in namespace.items():
+        if key.startswith('_') or key in hidden:
+            continue
+        if isinstance(value, (bool, int, float, type(None))) or \
+                (isinstance(value, str) and len(value) <= SEED_STRING_CHARS):
+            seed[key] = value
+    return seed
+
+
+def _children(value):
+    """Return [(label, step, child)] for the first children of a value and their count."""
+    if isinstance(value, dict):
+        keys = [k for k in value if isinstance(k, (str, int, float, bool))]
+        return [(repr(k), ['key', k], value[k]) for k in keys[:MAX_INSPECT_CHILDREN]], len(value)
+    if isinstance(value, (list, tuple)):
+        return [(f"[{i}]", ['index', i], value[i])
+                for i in range(min(len(value), MAX_INSPECT_CHILDREN))], len(value)
+    columns = getattr(value, 'columns', None)
+    if columns is not None and hasattr(value, '__getitem__'):
+        # DataFrame-like: one child per column
+        names = [c for c in list(columns) if isinstance(c, (str, int, float, bool))]
+        return [(repr(c), ['key', c], value[c]) for c in names[:MAX_INSPECT_CHILDREN]], \
+            len(columns)
+    shape = getattr(value, 'shape', None)
+    if isinstance(shape, tuple) and len(shape) > 1:
+        return [(f"[{i}]", ['index', i], value[i])
+                for i in range(min(shape[0], MAX_INSPECT_CHILDREN))], shape[0]
+    attributes = [k for k in getattr(value, '__dict__', {}) if not k.startswith('_')]
+    return [(k, ['attr', k], getattr(value, k)) for k in attributes[:MAX_INSPECT_CHILDREN]], \
+        len(attributes)
+
+
+def _inspect(namespace, path):
+    """Describe the value at path (a variable name followed by steps) and its children."""
+    try:
+        value = namespace[path[0]]
+        for kind, step in path[1:]:
+            value = getattr(value, step) if kind == 'attr' else value[step]
+
+        children, total = _children(value)
+        result = {
+            'summary': _summarise(value),
+            'children': [{'label': label, 'step': step, 'summary': _summarise(child)}
+                         for label, step, child in children],
+            'total': total
+        }
+
+        # Min / max / mean of 1-D numeric arrays
+        if getattr(value, 'ndim', None) == 1 and getattr(value, 'dtype', None) is not None \
+                and value.dtype.kind in 'biuf' and len(value):
+            result['stats'] = {'min': float(value.min()), 'max': float(value.max()),
+                               'mean': float(value.mean())}
+        return result
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+def _execute(conn, namespace, exec_id, code, hidden):
+    """Run one command, streaming its output, and report the result."""
+    writer = _StreamWriter(conn, exec_id)
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = writer
+    result_text = None
+    error_text = None
+
+    try:
+        # Pick up packages installed into the session directory since the last command
+        importlib.invalidate_caches()
+
+        # Execute the command in the persistent namespace; a trailing
+        # expression is compiled on its own so its value can be shown
+        # without running it twice
+        tree = ast.parse(code, '<console>', 'exec')
+        last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+        exec(compile(tree, '<console>', 'exec'), namespace)
+        if last is not None:
+            result = eval(compile(ast.Expression(last.value), '<console>', 'eval'), namespace)
+            if result is not None:
+                result_text = str(result)
+    except KeyboardInterrupt:
+        error_text = "Interrupted"
+    except BaseException as e:
+        error_text = f"Error: {str(e)}\n{traceback.format_exc()}"
+    finally:
+        writer.flush()
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+
+    conn.send(('done', exec_id, {
+        'result': result_text,
+        'error': error_text,
+        'variables': _summarise_namespace(namespace, hidden),
+        'seed': _seed_values(namespace, hidden)
+    }))
+
+
+def _kernel_main(conn, memory_mb, cpu_seconds, site_dir=None):
+    """Entry point of a kernel worker process."""
+    _apply_limits(memory_mb, cpu_seconds)
+    if site_dir:
+        sys.path.insert(0, site_dir)
+
+    signal_accessor = _SignalAccessor(conn)
+    namespace = {'__builtins__': __builtins__, 'signal': signal_accessor,
+                 'signals': signal_accessor, 'align': align_signals,
+                 'find_recordings': _make_find_recordings(conn)}
+    hidden = set(namespace)
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        except KeyboardInterrupt:
+            continue  # A cancel that arrived after the command finished
+
+        kind = message[0]
+        if kind == 'shutdown':
+            break
+        elif kind == 'seed':
+            # Never let stored summaries shadow the kernel's own helpers
+            namespace.update({k: v for k, v in message[1].items() if k not in namespace})
+        elif kind == 'file':
+            signal_accessor.set_file(message[1])
+            namespace['mdf_path'] = message[1]
+        elif kind == 'execute':
+            _execute(conn, namespace, message[1], message[2], hidden)
+        elif kind == 'inspect':
+            conn.send(('inspected', message[1], _inspect(namespace, message[2])))
+
+
+# ---------------------------------------------------------------------------
+# Dash server side
+# ---------------------------------------------------------------------------
+
+class OutputBuffer:
+    """Ring buffer keeping the newest max_chars characters of an output stream."""
+
+    def __init__(self, max_chars=OUTPUT_BUFFER_CHARS):
+        self.max_chars = max_chars
+        self.dropped = 0
+        self._chunks = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self._chunks.append(text)
+            self._size += len(text)
+            while self._size > self.max_chars:
+                oldest = self._chunks.popleft()
+                excess = self._size - self.max_chars
+                if len(oldest) > excess:
+                    self._chunks.appendleft(oldest[excess:])
+                    oldest = oldest[:excess]
+                self._size -= len(oldest)
+                self.dropped += len(oldest)
+
+    def tail(self, limit=None):
+        """Return (text, hidden): the newest limit characters and how many are not shown."""
+        with self._lock:
+            text = ''.join(self._chunks)
+            self._chunks = deque([text]) if text else deque()
+            dropped = self.dropped
+        shown = text[-limit:] if limit else text
+        return shown, dropped + len(text) - len(shown)
+
+    def to_dict(self):
+        text, hidden = self.tail()
+        return {'max_chars': self.max_chars, 'text': text, 'dropped': hidden}
+
+    @classmethod
+    def from_dict(cls, state):
+        output = cls(state['max_chars'])
+        output.write(state['text'])
+        output.dropped += state['dropped']
+        return output
+
+
+class Execution:
+    """Output and outcome of one command sent to a kernel."""
+
+    def __init__(self, exec_id, code):
+        self.exec_id = exec_id
+        self.code = code
+        self.started = time.monotonic()
+        self.output = OutputBuffer()
+        self.result = None
+        self.error = None
+        self.variables = None
+        self.seed = None
+        self.done = False
+        self.cancelled = False
+        # Process that stops this execution when signalled, for cancels from other processes
+        self.pid = None
+        self.stop_signal = signal.SIGINT
+        self._published = 0.0
+
+    def write(self, text):
+        self.output.write(text)
+        if time.monotonic() - self._published > PUBLISH_INTERVAL_SECONDS:
+            self.publish()
+
+    def publish(self):
+        """Let polls served by other server processes see this execution."""
+        self._published = time.monotonic()
+        session_store.publish('execution', self.exec_id, self.to_dict())
+
+    def to_dict(self):
+        return {
+            'exec_id': self.exec_id,
+            'code': self.code,
+            'started': self.started,
+            'output': self.output.to_dict(),
+            'result': self.result,
+            'error': self.error,
+            'variables': self.variables,
+            'seed': self.seed,
+            'done': self.done,
+            'cancelled': self.cancelled,
+            'pid': self.pid,
+            'stop_signal': int(self.stop_signal)
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild an execution snapshot published by another server process."""
+        execution = cls(state['exec_id'], state['code'])
+        execution.output = OutputBuffer.from_dict(state['output'])
+        for name in ('started', 'result', 'error', 'variables', 'seed', 'done', 'cancelled',
+                     'pid', 'stop_signal'):
+            setattr(execution, name, state[name])
+        return execution
+
+    def render(self, limit=None):
+        """Return (text, hidden) for the newest limit characters of output and outcome."""
+        text, hidden = self.output.tail(limit)
+        outcome = (self.result or '') + (self.error or '')
+        if outcome and text and not text.endswith('\n'):
+            text += '\n'
+        text += outcome
+        if hidden:
+            text = f"[{hidden:,} earlier characters not shown]\n" + text
+        return text, hidden
+
+    def text(self):
+        """Return the output produced so far."""
+        return self.render()[0]
+
+    def finish(self, result=None, error=None, variables=None, seed=None):
+        self.result = result
+        self.error = error
+        self.variables = variables
+        self.seed = seed
+        self.done = True
+        self.publish()
+
+
+def published_execution(exec_id):
+    """Return the last published state of an execution run by any server process."""
+    state = session_store.published('execution', exec_id)
+    return Execution.from_dict(state) if state else None
+
+
+def interrupt_published(exec_id):
+    """Signal an execution owned by another server process to stop."""
+    execution = published_execution(exec_id)
+    if execution is None or execution.done or not execution.pid or os.name != 'posix':
+        return False
+    try:
+        os.kill(execution.pid, execution.stop_signal)
+    except OSError:
+        return False
+    return True
+
+
+class ConsoleKernel:
+    """Handle on one worker process holding a session's namespace."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.last_used = time.monotonic()
+        self.file_path = None
+        self.fresh = True
+        self.current = None
+        self._executions = {}
+        self._inspections = {}
+        self._lock = threading.Lock()
+        # The reader thread and callers both write to the pipe
+        self._send_lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        ctx = multiprocessing.get_context('spawn')
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_kernel_main,
+            args=(child_conn, KERNEL_MEMORY_MB, KERNEL_CPU_SECONDS,
+                  session_site_dir(self.session_id)),
+            name=f'logscope-kernel-{self.session_id[:8]}',
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.fresh = True
+        self.file_path = None
+        self._reader = threading.Thread(target=self._read_loop, args=(self._conn,),
+                                        daemon=True)
+        self._reader.start()
+
+    def _send(self, message, conn=None):
+        with self._send_lock:
+            (conn or self._conn).send(message)
+
+    def _read_loop(self, conn):
+        """Collect messages from the worker until it exits."""
+        while True:
+            try:
+                kind, exec_id, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if kind == 'signal_request':
+                self._send(('signal', self._resolve_signal(payload)), conn)
+                continue
+            if kind == 'catalog_request':
+                self._send(('catalog', self._query_catalog(payload)), conn)
+                continue
+            if kind == 'inspected':
+                waiter = self._inspections.get(exec_id)
+                if waiter is not None:
+                    waiter[1] = payload
+                    waiter[0].set()
+                continue
+
+            execution = self._executions.get(exec_id)
+            if execution is None:
+                continue
+            if kind == 'output':
+                execution.write(payload)
+            elif kind == 'done':
+                execution.finish(payload['result'], payload['error'], payload['variables'],
+                                 payload['seed'])
+
+        # The worker died: fail whatever was running
+        with self._lock:
+            if self.current is not None and not self.current.done:
+                self.current.finish(error="Error: kernel stopped (time, CPU or memory limit "
+                                          "reached). Variables were reset.")
+
+    def _resolve_signal(self, channel):
+        """Decode a channel into shared memory and describe it for the worker."""
+        if not self.file_path:
+            return {'error': 'No MDF file loaded'}
+        try:
+            return shared_signals.get(self.file_path, channel).descriptor()
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _query_catalog(self, query):
+        """Answer a find_recordings call from the worker."""
+        try:
+            return catalog.find_recordings(*query)
+        except Exception as e:
+            return {'error': str(e)}
+
+    @property
+    def busy(self):
+        return self.current is not None and not self.current.done
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def execute(self, code, seed_context=None, file_path=None):
+        """Send a command to the worker and return its Execution."""
+        with self._lock:
+            if self.busy:
+                raise RuntimeError("Previous command is still running")
+            if not self.alive():
+                self._start()
+
+            if self.fresh and seed_context:
+                self._send(('seed', seed_context))
+            self.fresh = False
+            if file_path != self.file_path:
+                self._send(('file', file_path))
+                self.file_path = file_path
+
+            execution = Execution(str(uuid.uuid4()), code)
+            execution.pid = self.process.pid
+            self._executions = {execution.exec_id: execution}
+            self.current = execution
+            self.last_used = time.monotonic()
+            self._send(('execute', execution.exec_id, code))
+            execution.publish()
+            return execution
+
+    def inspect(self, path, timeout=INSPECT_TIMEOUT):
+        """Return the worker's description of a variable and its children.
+
+        path is a variable name followed by ['key'|'index'|'attr', step]
+        pairs. Only bounded summaries come back, never the value itself.
+        """
+        with self._lock:
+            if self.busy:
+                return {'error': 'A command is running, try again when it finishes'}
+            if not self.alive():
+                return {'error': 'Kernel is not running'}
+            request_id = str(uuid.uuid4())
+            waiter = self._inspections[request_id] = [threading.Event(), None]
+            self._send(('inspect', request_id, path))
+
+        try:
+            if not waiter[0].wait(timeout):
+                return {'error': 'Inspection timed out'}
+            return waiter[1]
+        finally:
+            self._inspections.pop(request_id, None)
+
+    def interrupt(self):
+        """Cancel the running command.
+
+        The first call raises KeyboardInterrupt inside the command and keeps
+        the namespace; calling again while it is still running kills the
+        worker.
+        """
+        with self._lock:
+            execution = self.current
+            if execution is None or execution.done:
+                return False
+            first = not execution.cancelled
+            execution.cancelled = True
+
+        if first and os.name == 'posix':
+            os.kill(self.process.pid, signal.SIGINT)
+        else:
+            self.kill()
+        return True
+
+    def get_execution(self, exec_id):
+        self.last_used = time.monotonic()
+        return self._executions.get(exec_id)
+
+    def kill(self):
+        """Terminate the worker process."""
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+        try:
+            self._conn.close()
+        except OSError:
+            pass
+
+    def shutdown(self):
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self._send(('shutdown',))
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=2)
+        self.kill()
+
+
+class KernelPool:
+    """Bounded set of kernels keyed by browser session id."""
+
+    def __init__(self, max_kernels=MAX_KERNELS):
+        self.max_kernels = max_kernels
+        self._kernels = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def _start_reaper(self):
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop, name='kernel-reaper',
+                                            daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(1)
+            self.reap()
+
+    def reap(self):
+        """Kill timed out executions and shut down idle kernels."""
+        now = time.monotonic()
+        with self._lock:
+            kernels = list(self._kernels.items())
+
+        for session_id, kernel in kernels:
+            if kernel.busy and now - kernel.current.started > EXECUTION_TIMEOUT:
+                print(f"Kernel {session_id[:8]} exceeded {EXECUTION_TIMEOUT:.0f}s, killing",
+                      flush=True)
+                kernel.kill()
+            elif not kernel.busy and now - kernel.last_used > KERNEL_IDLE_SECONDS:
+                with self._lock:
+                    self._kernels.pop(session_id, None)
+                kernel.shutdown()
+
+    def get(self, session_id, create=True):
+        """Return the session's kernel, starting one if needed."""
+        with self._lock:
+            kernel = self._kernels.get(session_id)
+            if kernel is not None or not create:
+                return kernel
+
+            if len(self._kernels) >= self.max_kernels:
+                idle = [k for k in self._kernels.values() if not k.busy]
+                if not idle:
+                    raise RuntimeError("All console kernels are busy, try again shortly")
+                oldest = min(idle, key=lambda k: k.last_used)
+                del self._kernels[oldest.session_id]
+                oldest.shutdown()
+
+            kernel = self._kernels[session_id] = ConsoleKernel(session_id)
+            self._start_reaper()
+            return kernel
+
+    def discard(self, session_id):
+        """Shut down and forget a session's kernel."""
+        with self._lock:
+            kernel = self._kernels.pop(session_id, None)
+        if kernel is not None:
+            kernel.shutdown()
+
+    def count(self):
+        with self._lock:
+            return len(self._kernels)
+
+    def shutdown_all(self):
+        with self._lock:
+            kernels = list(self._kernels.values())
+            self._kernels.clear()
+        for kernel in kernels:
+            kernel.shutdown()
+
+
+# Shared pool used by the console callbacks
+kernel_pool = KernelPool()
+atexit.register(kernel_pool.shutdown_all)
+
+registry.gauge('logscope_console_kernels', 'Running console kernels',
+               function=kernel_pool.count)
@@ -0,0 +1,46 @@
+"""
+Vectorised min/max downsampling for plotting long signals.
+"""
+
+import numpy as np
+
+
+def minmax_downsample(timestamps, samples, n_out):
+    """Reduce a signal to about n_out points keeping each bucket's min and max.
+
+    Samples are split into n_out // 2 buckets; each bucket contributes its
+    minimum and maximum in their original order, so spikes survive the
+    reduction. Returns (timestamps, samples) views or copies.
+    """
+    n = len(samples)
+    if n <= n_out or n_out < 2:
+        return timestamps, samples
+
+    n_buckets = n_out // 2
+    bucket_size = -(-n // n_buckets)  # ceil division
+    full_buckets = n // bucket_size
+    body_len = full_buckets * bucket_size
+
+    values = samples
+    if np.issubdtype(values.dtype, np.floating):
+        # Let NaNs lose both comparisons instead of poisoning argmin/argmax
+        low = np.where(np.isnan(values), np.inf, values)
+        high = np.where(np.isnan(values), -np.inf, values)
+    else:
+        low = high = values
+
+    min_idx = np.argmin(low[:body_len].reshape(full_buckets, bucket_size), axis=1)
+    max_idx = np.argmax(high[:body_len].reshape(full_buckets, bucket_size), axis=1)
+    offsets = np.arange(full_buckets) * bucket_size
+    min_idx += offsets
+    max_idx += offsets
+
+    if body_len < n:
+        min_idx = np.append(min_idx, body_len + np.argmin(low[body_len:]))
+        max_idx = np.append(max_idx, body_len + np.argmax(high[body_len:]))
+
+    # Emit each bucket's two extremes in time order
+    pairs = np.sort(np.stack([min_idx, max_idx]), axis=0)
+    indices = pairs.ravel(order='F')
+
+    return timestamps[indices], samples[indices]
@@ -0,0 +1,258 @@
+"""
+Columnar export of MDF files to Parquet or Arrow IPC.
+Writes one file per channel group in bounded record batches, and serves
+full exports back as a fast source for channel listing and plotting.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from utils.fingerprint import file_fingerprint
+from utils.mdf_cache import mdf_cache
+from utils.upload_store import get_upload_dir
+
+
+EXPORT_FORMATS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+# Records read from the MDF and written per batch
+BATCH_RECORDS = int(os.environ.get('LOGSCOPE_EXPORT_BATCH_RECORDS', 100_000))
+
+MANIFEST_NAME = 'manifest.json'
+
+_manifest_cache = {}
+_manifest_lock = threading.Lock()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Columnar export needs pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def export_dir(file_path, channels=None, t_range=None):
+    """Return the output directory for an export of a file.
+
+    Full exports live under the file fingerprint so they can be found again;
+    subset or windowed exports get a directory of their own.
+    """
+    name = file_fingerprint(file_path)
+    if channels or t_range:
+        spec = json.dumps({'channels': sorted(channels or []), 't_range': t_range})
+        name += '_' + hashlib.sha256(spec.encode()).hexdigest()[:12]
+    return os.path.join(get_upload_dir(), 'exports', name)
+
+
+def _group_channels(mdf, wanted=None):
+    """Return {group_index: [(channel_index, name), ...]} excluding master channels."""
+    groups = {}
+    for name, locations in mdf.channels_db.items():
+        if wanted is not None and name not in wanted:
+            continue
+        for group_index, channel_index in locations:
+            groups.setdefault(group_index, []).append((channel_index, name))
+
+    for group_index, members in groups.items():
+        master_index = mdf.masters_db.get(group_index) if hasattr(mdf, 'masters_db') else None
+        groups[group_index] = sorted(m for m in members if m[0] != master_index)
+    return {g: members for g, members in sorted(groups.items()) if members}
+
+
+def _unique_columns(names):
+    seen = {}
+    columns = []
+    for name in names:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        columns.append(name if count == 0 else f"{name}__{count}")
+    return columns
+
+
+def _column_array(pa, samples):
+    """Convert decoded samples to an Arrow array, or None if unsupported."""
+    samples = np.asarray(samples)
+    if samples.ndim != 1 or samples.dtype.names:
+        return None
+    if samples.dtype.kind == 'S':
+        return pa.array(samples.tolist(), type=pa.binary())
+    if samples.dtype.kind == 'O':
+        return pa.array([None if v is None else str(v) for v in samples], type=pa.string())
+    return pa.array(samples)
+
+
+def export_mdf(file_path, fmt='parquet', channels=None, t_range=None, file_id=None,
+               progress=None):
+    """Export a file, a channel subset or a time window to columnar files.
+
+    Each channel group is written to its own file in record batches of
+    BATCH_RECORDS, so memory stays bounded by one batch of one group.
+    progress(message) is called after each batch. Returns the output
+    directory, which also holds a manifest describing the groups.
+    """
+    pa = _require_pyarrow()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    out_dir = export_dir(file_path, channels, t_range)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {
+        'source_path': os.path.realpath(file_path),
+        'fingerprint': file_fingerprint(file_path),
+        'format': fmt,
+        'channels': sorted(channels) if channels else None,
+        't_range': t_range,
+        'groups': [],
+        'complete': False
+    }
+
+    with mdf_cache.checkout(file_path, file_id=file_id) as entry:
+        mdf = entry.mdf
+        with entry.lock:
+            groups = _group_channels(mdf, set(channels) if channels else None)
+
+        for group_index, members in groups.items():
+            with entry.lock:
+                master = np.asarray(mdf.get_master(group_index))
+
+            start, stop = 0, len(master)
+            if t_range:
+                start = int(np.searchsorted(master, t_range[0], side='left'))
+                stop = int(np.searchsorted(master, t_range[1], side='right'))
+            if stop <= start:
+                continue
+
+            target = os.path.join(out_dir, f"group_{group_index}{EXPORT_FORMATS[fmt]}")
+            temp_target = f"{target}.tmp"
+            columns = _unique_columns([name for _, name in members])
+            writer = None
+            units = {}
+            written_columns = None
+
+            try:
+                for offset in range(start, stop, BATCH_RECORDS):
+                    count = min(BATCH_RECORDS, stop - offset)
+                    arrays = [pa.array(master[offset:offset + count])]
+                    names = ['timestamps']
+
+                    with entry.lock:
+                        for (channel_index, name), column in zip(members, columns):
+                            if written_columns is not None and column not in written_columns:
+                                continue
+                            signal = mdf.get(name, group=group_index, index=channel_index,
+                                             record_offset=offset, record_count=count)
+                            array = _column_array(pa, signal.samples)
+                            if array is None or len(array) != count:
+                                if writer is None:
+                                    continue
+                                # Keep the schema fixed once the writer exists
+                                array = pa.nulls(count, writer.schema.field(column).type)
+                            arrays.append(array)
+                            names.append(column)
+                            units[column] = getattr(signal, 'unit', '') or ''
+
+                    batch = pa.RecordBatch.from_arrays(arrays, names=names)
+                    if writer is None:
+                        written_columns = set(names)
+                        if fmt == 'parquet':
+                            writer = pa.parquet.ParquetWriter(temp_target, batch.schema)
+                        else:
+                            writer = pa.ipc.new_file(temp_target, batch.schema)
+                    if fmt == 'parquet':
+                        writer.write_table(pa.Table.from_batches([batch]))
+                    else:
+                        writer.write_batch(batch)
+
+                    if progress:
+                        progress(f"Exporting group {group_index}: "
+                                 f"{offset + count - start}/{stop - start} records")
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if writer is None:
+                continue
+            os.replace(temp_target, target)
+            manifest['groups'].append({
+                'group': group_index,
+                'file': os.path.basename(target),
+                'channels': [c for c in columns if c in written_columns],
+                'units': units,
+                'samples': stop - start,
+                't_min': float(master[start]),
+                't_max': float(master[stop - 1])
+            })
+
+    manifest['complete'] = True
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f)
+
+    print(f"Exported {file_path} to {out_dir}", flush=True)
+    return out_dir
+
+
+def find_columnar_copy(file_path):
+    """Return the manifest of a complete full export of a file, or None."""
+    try:
+        manifest_path = os.path.join(export_dir(file_path), MANIFEST_NAME)
+        mtime = os.path.getmtime(manifest_path)
+    except OSError:
+        return None
+
+    with _manifest_lock:
+        cached = _manifest_cache.get(manifest_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if not manifest.get('complete') or manifest.get('channels') or manifest.get('t_range'):
+        return None
+
+    manifest['dir'] = os.path.dirname(manifest_path)
+    manifest['index'] = {name: group for group in manifest['groups']
+                         for name in group['channels']}
+    with _manifest_lock:
+        _manifest_cache[manifest_path] = (mtime, manifest)
+    return manifest
+
+
+def columnar_signal_names(manifest):
+    """Return channel names of a columnar copy in group order."""
+    return [name for group in manifest['groups'] for name in group['channels']]
+
+
+def has_columnar_channel(file_path, channel):
+    """Return True if a full columnar copy of the file holds the channel."""
+    manifest = find_columnar_copy(file_path)
+    return manifest is not None and channel in manifest['index']
+
+
+def read_columnar_channel(file_path, channel):
+    """Return (timestamps, samples, unit) of a channel from its columnar copy, or None."""
+    manifest = find_columnar_copy(file_path)
+    if manifest is None or channel not in manifest['index']:
+        return None
+
+    pa = _require_pyarrow()
+    group = manifest['index'][channel]
+    path = os.path.join(manifest['dir'], group['file'])
+    if manifest['format'] == 'parquet':
+        table = pa.parquet.read_table(path, columns=['timestamps', channel],
+                                      memory_map=True)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all().select(['timestamps', channel])
+
+    timestamps = table.column('timestamps').to_numpy()
+    samples = table.column(channel).to_numpy(zero_copy_only=False)
+    return timestamps, samples, group['units'].get(channel, '')
@@ -0,0 +1,365 @@
+"""
+Derived channels defined by arithmetic expressions over the loaded file's channels.
+Expressions are parsed against a whitelist, compiled once, evaluated
+vectorised for the plotted window and memoised per window.
+"""
+
+import ast
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache, partial
+
+import numpy as np
+
+from utils.alignment import resample
+from utils.fingerprint import file_fingerprint
+from utils.metrics import cache_result, span
+
+
+# Derived channels are selected as channel_key(file_id, DERIVED_PREFIX + name)
+DERIVED_PREFIX = '='
+
+DERIVED_CACHE_BYTES = int(os.environ.get('LOGSCOPE_DERIVED_CACHE_MB', 256)) * 1024 * 1024
+
+# Durations such as 0.5s, 200ms or 2min become seconds
+_DURATION = re.compile(r'(?<![\w.])(\d+(?:\.\d*)?|\.\d+)\s*(ms|s|min)\b')
+_DURATION_SCALE = {'ms': 1e-3, 's': 1.0, 'min': 60.0}
+
+_DEFINITION = re.compile(r'^\s*([A-Za-z_]\w*)\s*=(?!=)\s*(.+?)\s*$')
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that do not parse or use unsupported syntax."""
+
+
+def _rolling_sums(t, x, window):
+    x = np.asarray(x, dtype=np.float64)
+    start = np.searchsorted(t, t - float(window), side='left')
+    count = np.arange(1, len(x) + 1) - start
+    return x, start, count
+
+
+def _rolling_mean(t, x, window):
+    """Mean of x over the preceding window seconds, via cumulative sums."""
+    x, start, count = _rolling_sums(t, x, window)
+    cumsum = np.concatenate(([0.0], np.cumsum(x)))
+    return (cumsum[1:] - cumsum[start]) / count
+
+
+def _rolling_std(t, x, window):
+    """Standard deviation of x over the preceding window seconds."""
+    x, start, count = _rolling_sums(t, x, window)
+    cumsum = np.concatenate(([0.0], np.cumsum(x)))
+    cumsq = np.concatenate(([0.0], np.cumsum(x * x)))
+    mean = (cumsum[1:] - cumsum[start]) / count
+    variance = (cumsq[1:] - cumsq[start]) / count - mean * mean
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def _derivative(t, x):
+    """Time derivative of x."""
+    if len(t) < 2:
+        return np.full(len(t), np.nan)
+    return np.gradient(np.asarray(x, dtype=np.float64), t)
+
+
+def _integral(t, x):
+    """Cumulative trapezoidal integral of x over time."""
+    x = np.asarray(x, dtype=np.float64)
+    steps = np.diff(t) * (x[1:] + x[:-1]) / 2
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+# Element-wise functions callable from expressions
+FUNCTIONS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arctan2': np.arctan2,
+    'minimum': np.minimum, 'maximum': np.maximum, 'clip': np.clip, 'where': np.where,
+    'round': np.round, 'floor': np.floor, 'ceil': np.ceil,
+}
+
+# Functions that also need the time base; the window argument is in seconds
+TIME_FUNCTIONS = {
+    'rolling_mean': _rolling_mean,
+    'rolling_std': _rolling_std,
+    'derivative': _derivative,
+    'integral': _integral,
+}
+
+CONSTANTS = {'pi': np.pi, 'e': np.e, 'nan': np.nan}
+
+
+def _power(base, exponent):
+    """a ** b; scalar operands are raised as floats so 9**9**9 overflows to inf at once."""
+    if np.ndim(base) == 0 and np.ndim(exponent) == 0:
+        return np.float64(base) ** np.float64(exponent)
+    return np.power(base, exponent)
+
+
+# Operators the rewriter turns into calls, so they work element-wise on arrays
+_OPERATORS = {
+    '_and': np.logical_and, '_or': np.logical_or, '_not': np.logical_not, '_pow': _power,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call,
+    ast.Name, ast.Load, ast.Constant, ast.Attribute,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.USub, ast.UAdd, ast.Invert, ast.BitAnd, ast.BitOr,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+
+def _dotted_name(node):
+    """Return 'a.b.c' for a chain of attribute accesses on a name, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return '.'.join(reversed(parts))
+
+
+class _ChannelRewriter(ast.NodeTransformer):
+    """Replace channel references with placeholders and check every node."""
+
+    def __init__(self):
+        self.channels = []
+        self.max_window = 0.0
+
+    def _placeholder(self, channel, node):
+        if channel not in self.channels:
+            self.channels.append(channel)
+        return ast.copy_location(
+            ast.Name(id=f"_c{self.channels.index(channel)}", ctx=ast.Load()), node)
+
+    @staticmethod
+    def _operator(name, args, node):
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[]), node)
+
+    def visit_BoolOp(self, node):
+        # and/or/not would ask arrays for a single truth value
+        name = '_and' if isinstance(node.op, ast.And) else '_or'
+        values = [self.visit(value) for value in node.values]
+        result = values[0]
+        for value in values[1:]:
+            result = self._operator(name, [result, value], node)
+        return result
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.op, ast.Not):
+            return self._operator('_not', [self.visit(node.operand)], node)
+        return self.generic_visit(node)
+
+    def visit_Compare(self, node):
+        # a < b < c becomes (a < b) and (b < c), element-wise
+        operands = [self.visit(node.left)] + [self.visit(value) for value in node.comparators]
+        for op in node.ops:
+            if not isinstance(op, _ALLOWED_NODES):
+                raise ExpressionError(f"Unsupported syntax: {type(op).__name__}")
+        pairs = [ast.copy_location(ast.Compare(left=left, ops=[op], comparators=[right]), node)
+                 for left, op, right in zip(operands, node.ops, operands[1:])]
+        result = pairs[0]
+        for pair in pairs[1:]:
+            result = self._operator('_and', [result, pair], node)
+        return result
+
+    def visit_BinOp(self, node):
+        if isinstance(node.op, ast.Pow):
+            return self._operator('_pow', [self.visit(node.left), self.visit(node.right)], node)
+        return self.generic_visit(node)
+
+    def generic_visit(self, node):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (int, float, bool)):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        return node
+
+    def visit_Name(self, node):
+        if node.id in CONSTANTS:
+            return node
+        if node.id in FUNCTIONS or node.id in TIME_FUNCTIONS:
+            raise ExpressionError(f"{node.id} must be called")
+        return self._placeholder(node.id, node)
+
+    def visit_Attribute(self, node):
+        # Hierarchical channel names such as Engine.Speed
+        channel = _dotted_name(node)
+        if channel is None:
+            raise ExpressionError("Attribute access is only allowed in channel names")
+        return self._placeholder(channel, node)
+
+    def visit_Call(self, node):
+        if node.keywords or not isinstance(node.func, ast.Name):
+            raise ExpressionError("Only plain calls of known functions are allowed")
+        name = node.func.id
+
+        # ch('Name with spaces') refers to a channel by its exact name
+        if name == 'ch':
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) \
+                    or not isinstance(node.args[0].value, str):
+                raise ExpressionError("ch() takes one channel name string")
+            return self._placeholder(node.args[0].value, node)
+
+        if name not in FUNCTIONS and name not in TIME_FUNCTIONS:
+            raise ExpressionError(f"Unknown function: {name}")
+        if name.startswith('rolling_'):
+            window = node.args[1].value if len(node.args) == 2 \
+                and isinstance(node.args[1], ast.Constant) else None
+            if isinstance(window, bool) or not isinstance(window, (int, float)) \
+                    or not 0 < window < float('inf'):
+                raise ExpressionError(f"{name}(signal, window) needs a positive constant "
+                                      f"window, e.g. 0.5s")
+            self.max_window = max(self.max_window, float(window))
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+class CompiledExpression:
+    """A validated expression, ready to evaluate against channel arrays."""
+
+    def __init__(self, source, code, channels, max_window):
+        self.source = source
+        self.code = code
+        self.channels = channels
+        self.max_window = max_window
+
+    def evaluate(self, time_base, inputs):
+        """Evaluate on arrays already resampled onto time_base."""
+        namespace = {'__builtins__': {}}
+        namespace.update(FUNCTIONS)
+        namespace.update(_OPERATORS)
+        namespace.update(CONSTANTS)
+        namespace.update({name: partial(fn, time_base) for name, fn in TIME_FUNCTIONS.items()})
+        namespace.update({f"_c{i}": values for i, values in enumerate(inputs)})
+        with np.errstate(all='ignore'):
+            result = eval(self.code, namespace)
+        return np.broadcast_to(np.asarray(result, dtype=np.float64), time_base.shape)
+
+
+@lru_cache(maxsize=256)
+def compile_expression(source):
+    """Parse, validate and compile an expression. Raises ExpressionError."""
+    text = _DURATION.sub(
+        lambda m: repr(float(m.group(1)) * _DURATION_SCALE[m.group(2)]), source)
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"Syntax error: {e.msg}")
+
+    rewriter = _ChannelRewriter()
+    tree = ast.fix_missing_locations(rewriter.visit(tree))
+    if not rewriter.channels:
+        raise ExpressionError("Expression uses no channels")
+    code = compile(tree, '<derived>', 'eval')
+    return CompiledExpression(source, code, rewriter.channels, rewriter.max_window)
+
+
+def parse_definitions(text):
+    """Parse 'name = expression' lines into an ordered {name: source} dict.
+
+    Blank lines and # comments are skipped. Raises ExpressionError naming
+    the offending line.
+    """
+    definitions = {}
+    for line_no, line in enumerate((text or '').splitlines(), start=1):
+        line = line.split('#', 1)[0]
+        if not line.strip():
+            continue
+        match = _DEFINITION.match(line)
+        if not match:
+            raise ExpressionError(f"Line {line_no}: expected 'name = expression'")
+        name, source = match.groups()
+        try:
+            compile_expression(source)
+        except ExpressionError as e:
+            raise ExpressionError(f"Line {line_no} ({name}): {e}")
+        definitions[name] = source
+    return definitions
+
+
+def _window(timestamps, samples, t0, t1):
+    start = int(np.searchsorted(timestamps, t0, side='left'))
+    stop = int(np.searchsorted(timestamps, t1, side='right'))
+    return timestamps[start:stop], samples[start:stop]
+
+
+class DerivedCache:
+    """LRU of evaluated windows keyed by expression, input file and window."""
+
+    def __init__(self, max_bytes=DERIVED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            total = sum(t.nbytes + y.nbytes for t, y in self._results.values())
+            while len(self._results) > 1 and total > self.max_bytes:
+                _, (t, y) = self._results.popitem(last=False)
+                total -= t.nbytes + y.nbytes
+
+
+def evaluate_derived(source, loader, file_path, x_range=None):
+    """Evaluate an expression over a file's channels, optionally for a window only.
+
+    loader(channel, window=None) returns (timestamps, samples, unit) of a
+    channel, only around window=(t0, t1) when one is given. All inputs are resampled onto the timestamps of the input with the most
+    samples in the window; rolling windows read that much extra history.
+    Returns (timestamps, values).
+    """
+    compiled = compile_expression(source)
+    key = (compiled.source, file_fingerprint(file_path), x_range)
+    cached = derived_cache.get(key)
+    cache_result('derived', cached is not None)
+    if cached is not None:
+        return cached
+
+    # Rolling windows need their length of history before the view
+    window = (x_range[0] - compiled.max_window, x_range[1]) if x_range else None
+    inputs = []
+    for channel in compiled.channels:
+        timestamps, samples, _ = loader(channel, window) if window else loader(channel)
+        samples = np.asarray(samples)
+        if samples.ndim != 1 or not (np.issubdtype(samples.dtype, np.number)
+                                     or samples.dtype == np.bool_):
+            raise ExpressionError(f"{channel} is not a numeric signal")
+        if window:
+            timestamps, samples = _window(np.asarray(timestamps), samples, *window)
+        inputs.append((timestamps, samples))
+
+    time_base = np.asarray(max((t for t, _ in inputs), key=len), dtype=np.float64)
+    with span('derived_evaluate'):
+        values = compiled.evaluate(time_base, [
+            samples if t is time_base else resample(t, samples, time_base)
+            for t, samples in inputs
+        ])
+
+    if x_range and compiled.max_window:
+        # Drop the extra history read for rolling windows
+        time_base, values = _window(time_base, values, x_range[0], x_range[1])
+
+    result = (time_base, np.ascontiguousarray(values))
+    derived_cache.put(key, result)
+    return result
+
+
+# Shared cache of evaluated derived channels
+derived_cache = DerivedCache()
@@ -0,0 +1,33 @@
+"""
+Content fingerprints for identifying files across paths and restarts.
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+
+# Read size while hashing
+CHUNK_BYTES = 1024 * 1024
+
+
+@lru_cache(maxsize=256)
+def _fingerprint_for_key(real_path, mtime_ns, size):
+    digest = hashlib.sha256()
+    digest.update(str(size).encode())
+    with open(real_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path):
+    """Return a hash of a file's size and full contents.
+
+    Identical copies of a recording under different names share a
+    fingerprint; recordings that differ anywhere do not. Results are
+    memoised per path, mtime and size, so each version is read once.
+    """
+    real_path = os.path.realpath(file_path)
+    stats = os.stat(real_path)
+    return _fingerprint_for_key(real_path, stats.st_mtime_ns, stats.st_size)
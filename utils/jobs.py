@@ -0,0 +1,179 @@
+"""
+Bounded background job queue with pollable job status.
+Keeps slow work such as MDF loading out of the Dash callback threads.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import registry
+from utils.session_store import session_store
+
+
+DEFAULT_MAX_WORKERS = int(os.environ.get('LOGSCOPE_JOB_WORKERS', 2))
+DEFAULT_MAX_PENDING = int(os.environ.get('LOGSCOPE_JOB_QUEUE', 32))
+
+# Finished jobs kept around for late polls
+MAX_FINISHED_JOBS = 256
+
+QUEUED = 'queued'
+LOADING = 'loading'
+INDEXED = 'indexed'
+FAILED = 'failed'
+
+FINISHED_STATES = (INDEXED, FAILED)
+
+
+class Job:
+    """Status record for one submitted job."""
+
+    def __init__(self, job_id, kind):
+        self.job_id = job_id
+        self.kind = kind
+        self.status = QUEUED
+        self.message = 'Queued'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self.running = False
+
+    def update(self, status, message=None):
+        """Move the job to a new status."""
+        self.status = status
+        if message is not None:
+            self.message = message
+        if status in FINISHED_STATES:
+            self.finished = time.time()
+        # A finishing job is published once its result is set
+        if not (self.running and status in FINISHED_STATES):
+            self.publish()
+
+    def publish(self):
+        """Let other server processes poll this job."""
+        session_store.publish('job', self.job_id, self.to_dict())
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'submitted': self.submitted,
+            'finished': self.finished
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild a job snapshot published by another server process."""
+        job = cls(state['job_id'], state['kind'])
+        for name in ('status', 'message', 'result', 'error', 'submitted', 'finished'):
+            setattr(job, name, state[name])
+        return job
+
+
+class JobQueue:
+    """Thread pool with a bounded backlog and a registry of job statuses."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='logscope-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pending_count(self):
+        return sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATES)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in FINISHED_STATES]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+            session_store.unpublish('job', job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.running = True
+        try:
+            job.update(LOADING, 'Running')
+            job.result = fn(job, *args, **kwargs)
+            if job.status not in FINISHED_STATES:
+                job.update(INDEXED, 'Done')
+        except Exception as e:
+            job.error = str(e)
+            job.update(FAILED, f"Error: {e}")
+            print(f"Job {job.job_id} failed: {e}", flush=True)
+        finally:
+            job.running = False
+            job.publish()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return its job id.
+
+        The function may call job.update() to report progress; its return
+        value becomes job.result.
+        """
+        job = Job(str(uuid.uuid4()), kind)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+            if self._pending_count() > self.max_pending:
+                job.error = 'Server busy'
+                job.update(FAILED, 'Error: too many jobs queued, try again shortly')
+                return job.job_id
+
+        job.publish()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.job_id
+
+    def fail(self, kind, message):
+        """Record a job that failed before it could be queued."""
+        job = Job(str(uuid.uuid4()), kind)
+        job.error = message
+        job.update(FAILED, message)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        return job.job_id
+
+    def get(self, job_id):
+        """Return the Job for an id, or None if unknown.
+
+        Jobs run by another server process are returned as their last
+        published snapshot.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        state = session_store.published('job', job_id)
+        return Job.from_dict(state) if state else None
+
+    def queue_position(self, job_id):
+        """Return how many queued jobs were submitted before this one."""
+        with self._lock:
+            position = 0
+            for other_id, job in self._jobs.items():
+                if other_id == job_id:
+                    return position
+                if job.status == QUEUED:
+                    position += 1
+        return 0
+
+    def pending(self):
+        """Return how many jobs are queued or running."""
+        with self._lock:
+            return self._pending_count()
+
+
+# Shared queue used by file loading callbacks
+job_queue = JobQueue()
+
+registry.gauge('logscope_jobs_pending', 'Background jobs queued or running',
+               function=job_queue.pending)
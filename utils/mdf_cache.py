@@ -0,0 +1,239 @@
+"""
+Process-wide cache of open MDF handles and their parsed channel metadata.
+Entries are keyed by file path, mtime and size; file_ids are aliases onto them.
+"""
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from utils.metrics import cache_result, registry, span
+from utils.session_store import session_store
+
+
+# Budget defaults, overridable through the environment
+DEFAULT_MAX_HANDLES = int(os.environ.get('LOGSCOPE_MDF_CACHE_HANDLES', 8))
+DEFAULT_MAX_BYTES = int(os.environ.get('LOGSCOPE_MDF_CACHE_MB', 2048)) * 1024 * 1024
+
+# Rough resident cost of one parsed channel block inside asammdf
+CHANNEL_METADATA_BYTES = 2048
+
+# How many file_id -> path aliases to remember after their entry is gone
+MAX_ALIASES = 1024
+
+
+def open_mdf(file_path):
+    """Open an MDF file, importing asammdf on first use.
+
+    asammdf pulls in pandas and takes seconds to import; most requests never
+    open a file, so the server starts without it.
+    """
+    import asammdf
+    return asammdf.MDF(file_path)
+
+
+def file_cache_key(file_path):
+    """Build the cache key for a file from its resolved path, mtime and size."""
+    real_path = os.path.realpath(file_path)
+    stats = os.stat(real_path)
+    return (real_path, stats.st_mtime_ns, stats.st_size)
+
+
+class MDFCacheEntry:
+    """An open MDF handle together with the metadata parsed from it."""
+
+    def __init__(self, key, mdf):
+        self.key = key
+        self.mdf = mdf
+        self.metadata = {}
+        self.arrays = {}
+        self.lock = threading.RLock()
+        self.users = 0
+        self.evicted = False
+
+    @property
+    def file_path(self):
+        return self.key[0]
+
+    @property
+    def nbytes(self):
+        """Estimated resident size of the handle and everything cached on it."""
+        channel_count = len(self.metadata.get('signal_names', ()))
+        array_bytes = sum(getattr(arr, 'nbytes', 0) for arr in self.arrays.values())
+        return channel_count * CHANNEL_METADATA_BYTES + array_bytes
+
+    def close(self):
+        """Close the underlying MDF handle and drop cached arrays."""
+        self.arrays.clear()
+        try:
+            with span('mdf_close'):
+                self.mdf.close()
+        except Exception as e:
+            print(f"Error closing MDF {self.file_path}: {e}", flush=True)
+
+
+class MDFCache:
+    """LRU cache of open MDF files with a handle count and memory budget."""
+
+    def __init__(self, max_handles=DEFAULT_MAX_HANDLES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_handles = max_handles
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._aliases = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _resolve_path(self, file_path, file_id):
+        """Work out which path a lookup refers to."""
+        if file_path:
+            return file_path
+        with self._lock:
+            path = self._aliases.get(file_id)
+        if path is None and file_id:
+            # Loaded by another server process; its metadata is in the shared store
+            file_info = session_store.get_file(file_id)
+            path = file_info.get('file_path') if file_info else None
+        return path
+
+    def path_for(self, file_id):
+        """Return the path last opened under a file_id."""
+        path = self._resolve_path(None, file_id)
+        if not path:
+            raise KeyError(f"Unknown file_id: {file_id}")
+        return path
+
+    def remember(self, file_id, file_path):
+        """Record which path a file_id refers to without opening it."""
+        with self._lock:
+            self._remember_alias(file_id, file_path)
+
+    def _remember_alias(self, file_id, file_path):
+        if not file_id:
+            return
+        self._aliases[file_id] = file_path
+        self._aliases.move_to_end(file_id)
+        while len(self._aliases) > MAX_ALIASES:
+            self._aliases.popitem(last=False)
+
+    def _open_entry(self, file_path, file_id):
+        """Return a pinned entry for the file, opening it on a miss."""
+        key = file_cache_key(file_path)
+
+        with self._lock:
+            self._remember_alias(file_id, file_path)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.users += 1
+                cache_result('mdf_handle', True)
+                return entry
+
+            # Drop stale entries for the same path (file changed on disk)
+            for stale_key in [k for k in self._entries if k[0] == key[0]]:
+                self._evict(stale_key)
+
+        # Open outside the lock so a slow file does not block other lookups
+        print(f"Opening MDF handle: {file_path}", flush=True)
+        cache_result('mdf_handle', False)
+        with span('mdf_open'):
+            mdf = open_mdf(file_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Another thread opened it meanwhile; keep theirs
+                mdf.close()
+            else:
+                entry = MDFCacheEntry(key, mdf)
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            entry.users += 1
+            self._enforce_budget()
+            return entry
+
+    def _release(self, entry):
+        with self._lock:
+            entry.users -= 1
+            if entry.evicted and entry.users <= 0:
+                entry.close()
+            else:
+                self._enforce_budget()
+
+    @contextmanager
+    def checkout(self, file_path=None, file_id=None):
+        """Yield the cache entry for a file path or a previously seen file_id."""
+        resolved = self._resolve_path(file_path, file_id)
+        if not resolved:
+            raise KeyError(f"Unknown file_id: {file_id}")
+
+        entry = self._open_entry(resolved, file_id)
+        try:
+            yield entry
+        finally:
+            self._release(entry)
+
+    def store_array(self, entry, name, array):
+        """Cache a decoded array on an entry and re-check the memory budget."""
+        with self._lock:
+            entry.arrays[name] = array
+            self._enforce_budget()
+
+    def _evict(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        entry.evicted = True
+        print(f"Evicting MDF handle: {entry.file_path}", flush=True)
+        if entry.users <= 0:
+            entry.close()
+
+    def _enforce_budget(self):
+        """Evict least recently used entries until both budgets are met."""
+        while self._entries:
+            total_bytes = sum(e.nbytes for e in self._entries.values())
+            if len(self._entries) <= self.max_handles and total_bytes <= self.max_bytes:
+                return
+
+            # Never evict the most recently used entry to make room for itself
+            if len(self._entries) == 1:
+                oldest = next(iter(self._entries.values()))
+                if oldest.arrays and total_bytes > self.max_bytes:
+                    oldest.arrays.clear()
+                return
+
+            oldest_key = next(iter(self._entries))
+            self._evict(oldest_key)
+
+    def evict_file(self, file_path):
+        """Explicitly close every cached handle for a path."""
+        real_path = os.path.realpath(file_path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == real_path]:
+                self._evict(key)
+
+    def close_all(self):
+        """Close every cached handle."""
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+    def stats(self):
+        """Return a summary of the cache contents."""
+        with self._lock:
+            return {
+                'handles': len(self._entries),
+                'bytes': sum(e.nbytes for e in self._entries.values()),
+                'max_handles': self.max_handles,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Shared cache used by all callbacks in this process
+mdf_cache = MDFCache()
+atexit.register(mdf_cache.close_all)
+
+registry.gauge('logscope_mdf_open_handles', 'Open MDF handles in the cache',
+               function=lambda: mdf_cache.stats()['handles'])
+registry.gauge('logscope_mdf_cache_bytes', 'Estimated bytes held by the MDF cache',
+               function=lambda: mdf_cache.stats()['bytes'])
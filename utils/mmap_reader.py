@@ -0,0 +1,408 @@
+"""
+Memory-mapped channel reads for uncompressed MDF 4 files.
+
+The file is mapped read-only and a channel's samples are exposed as a strided
+NumPy view over its records, so decoding is a view plus the channel's
+conversion instead of a read and copy. Pages come from the OS page cache, so
+several processes reading the same file share them.
+
+Only plain layouts are handled here: sorted data groups, DT blocks (directly
+or through DL/HL lists) holding whole records, byte-aligned integer and float
+channels and identity, linear or rational conversions. Anything else raises
+UnsupportedLayout internally and the read functions return None, so callers
+fall back to asammdf.
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.mdf_cache import DEFAULT_MAX_BYTES, file_cache_key
+from utils.metrics import cache_result, registry
+
+
+MMAP_ENABLED = os.environ.get('LOGSCOPE_MMAP_READS', '1').lower() in ('1', 'true', 'yes')
+
+# Mapped files kept open; each costs address space, not memory
+MAX_MAPPED_FILES = 16
+
+# Timestamps that had to be computed rather than viewed share the MDF cache's budget
+MASTER_CACHE_BYTES = DEFAULT_MAX_BYTES
+
+_HEADER = struct.Struct('<4s4xQQ')
+_DG_DATA = struct.Struct('<B')
+_CG_DATA = struct.Struct('<QQHH4xII')
+_CN_DATA = struct.Struct('<BBBBIIIIBBH')
+_CC_DATA = struct.Struct('<BBHHH')
+
+# cn_data_type -> (NumPy kind, byte order) for the byte-aligned numeric types
+_DATA_TYPES = {0: ('u', '<'), 1: ('u', '>'), 2: ('i', '<'), 3: ('i', '>'),
+               4: ('f', '<'), 5: ('f', '>')}
+
+_CN_MASTER = 2
+_CN_VIRTUAL_MASTER = 3
+
+# cc_type values that are evaluated here
+_CC_IDENTITY, _CC_LINEAR, _CC_RATIONAL = 0, 1, 2
+
+_MD_TEXT = re.compile(rb'<TX>(.*?)</TX>', re.DOTALL)
+
+
+class UnsupportedLayout(Exception):
+    """The file or channel needs asammdf to decode."""
+
+
+class _MasterCache:
+    """LRU of computed group timestamps with a byte budget."""
+
+    def __init__(self, max_bytes=MASTER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is not None:
+                self._arrays.move_to_end(key)
+            return array
+
+    def put(self, key, array):
+        with self._lock:
+            self._arrays[key] = array
+            total = sum(a.nbytes for a in self._arrays.values())
+            while len(self._arrays) > 1 and total > self.max_bytes:
+                _, oldest = self._arrays.popitem(last=False)
+                total -= oldest.nbytes
+
+    def nbytes(self):
+        with self._lock:
+            return sum(a.nbytes for a in self._arrays.values())
+
+
+_masters = _MasterCache()
+
+
+class _Column:
+    """One channel inside a group's records, possibly spread over several DT blocks."""
+
+    def __init__(self, group, cn):
+        self.group = group
+        self.cn = cn
+
+    def raw(self, start, stop):
+        """Return raw values of records [start, stop); a view when they sit in one block."""
+        if self.cn['type'] == _CN_VIRTUAL_MASTER:
+            return np.arange(start, stop, dtype=np.uint64)
+        dtype = np.dtype({'names': ['v'], 'formats': [self.cn['dtype']],
+                          'offsets': [self.group['record_id_size'] + self.cn['byte_offset']],
+                          'itemsize': self.group['record_size']})
+        parts = []
+        first = 0
+        for offset, count in self.group['segments']:
+            lo, hi = max(start - first, 0), min(stop - first, count)
+            if lo < hi:
+                records = np.frombuffer(self.group['buffer'], dtype=dtype, count=hi - lo,
+                                        offset=offset + lo * dtype.itemsize)
+                parts.append(records['v'])
+            first += count
+        if not parts:
+            return np.empty(0, dtype=self.cn['dtype'])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def read(self, start, stop):
+        return _convert(self.raw(start, stop), self.cn['conversion'])
+
+
+def _convert(values, conversion):
+    if conversion is None:
+        return values
+    kind, params = conversion
+    if kind == _CC_LINEAR:
+        b, a = params[:2]
+        if a == 1 and b == 0:
+            return values
+        return values * a + b
+    p1, p2, p3, p4, p5, p6 = params[:6]
+    x = values.astype(np.float64)
+    with np.errstate(all='ignore'):
+        return (p1 * x * x + p2 * x + p3) / (p4 * x * x + p5 * x + p6)
+
+
+class MappedMDF:
+    """Read-only mapping of an MDF 4 file with a channel name index."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.key = file_cache_key(file_path)
+        with open(file_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != b'MDF     ' or not self._mm[8:10].startswith(b'4'):
+            raise UnsupportedLayout("not an MDF 4 file")
+        self._channels = {}   # name -> list of (group, cn)
+        self._index_file()
+
+    def _block(self, address, expected=None):
+        block_id, length, link_count = _HEADER.unpack_from(self._mm, address)
+        if expected and block_id != expected:
+            raise UnsupportedLayout(f"expected {expected!r} at {address}, found {block_id!r}")
+        links = struct.unpack_from(f'<{link_count}Q', self._mm, address + 24)
+        return block_id, links, address + 24 + 8 * link_count, address + length
+
+    def _text(self, address):
+        if not address:
+            return ''
+        block_id, _, start, end = self._block(address)
+        text = self._mm[start:end]
+        if block_id == b'##MD':
+            match = _MD_TEXT.search(text)
+            text = match.group(1) if match else b''
+        return text.split(b'\0', 1)[0].decode('utf-8', 'replace').strip()
+
+    def _index_file(self):
+        _, hd_links, _, _ = self._block(64, b'##HD')
+        dg_address = hd_links[0]
+        while dg_address:
+            _, dg_links, dg_data, _ = self._block(dg_address, b'##DG')
+            record_id_size, = _DG_DATA.unpack_from(self._mm, dg_data)
+            cg_addresses = []
+            cg_address = dg_links[1]
+            while cg_address:
+                cg_addresses.append(cg_address)
+                cg_address = self._block(cg_address, b'##CG')[1][0]
+            # Several channel groups in one data group means unsorted records
+            if len(cg_addresses) == 1:
+                self._index_group(cg_addresses[0], dg_links[2], record_id_size)
+            dg_address = dg_links[0]
+
+    def _index_group(self, cg_address, data_address, record_id_size):
+        _, cg_links, cg_data, _ = self._block(cg_address, b'##CG')
+        _, cycles, flags, _, data_bytes, inval_bytes = _CG_DATA.unpack_from(self._mm, cg_data)
+        group = {
+            'record_id_size': record_id_size,
+            'record_size': record_id_size + data_bytes + inval_bytes,
+            'data_bytes': data_bytes,
+            'cycles': cycles,
+            'data_address': data_address,
+            'segments': None,
+            'master': None,
+            'buffer': self._mm,
+        }
+        if flags & 1:
+            return  # VLSD channel group, holds variable length data only
+
+        cn_address = cg_links[1]
+        while cn_address:
+            _, cn_links, cn_data, _ = self._block(cn_address, b'##CN')
+            (cn_type, _, data_type, bit_offset, byte_offset, bit_count,
+             _, _, _, _, _) = _CN_DATA.unpack_from(self._mm, cn_data)
+            cn = {
+                'name': self._text(cn_links[2]),
+                'type': cn_type,
+                'data_type': data_type,
+                'bit_offset': bit_offset,
+                'byte_offset': byte_offset,
+                'bit_count': bit_count,
+                'composed': bool(cn_links[1]),
+                'signal_data': cn_links[5],
+                'conversion_address': cn_links[4],
+                'unit_address': cn_links[6],
+                'conversion': None,
+            }
+            if cn_type in (_CN_MASTER, _CN_VIRTUAL_MASTER) and group['master'] is None:
+                group['master'] = cn
+            self._channels.setdefault(cn['name'], []).append((group, cn))
+            cn_address = cn_links[0]
+
+    def _prepare(self, group, cn):
+        """Check a channel can be read from the mapping and fill in its dtype and conversion."""
+        if 'dtype' in cn:
+            return
+        if cn['type'] not in (0, _CN_MASTER, _CN_VIRTUAL_MASTER) or cn['composed'] \
+                or cn['signal_data']:
+            raise UnsupportedLayout(f"{cn['name']}: not a fixed length scalar channel")
+        if cn['type'] != _CN_VIRTUAL_MASTER:
+            kind, order = _DATA_TYPES.get(cn['data_type'], (None, None))
+            sizes = (32, 64) if kind == 'f' else (8, 16, 32, 64)
+            if kind is None or cn['bit_offset'] or cn['bit_count'] not in sizes:
+                raise UnsupportedLayout(f"{cn['name']}: not a byte aligned numeric channel")
+            if cn['byte_offset'] + cn['bit_count'] // 8 > group['data_bytes']:
+                raise UnsupportedLayout(f"{cn['name']}: outside the record")
+            dtype = np.dtype(f"{order}{kind}{cn['bit_count'] // 8}")
+        else:
+            dtype = np.dtype(np.uint64)
+        conversion = self._conversion(cn['conversion_address'], cn['name'])
+        unit = self._text(cn['unit_address'])
+        if not unit and cn['conversion_address']:
+            unit = self._text(self._block(cn['conversion_address'])[1][1])
+        if group['segments'] is None:
+            group['segments'] = self._segments(group)
+        # dtype goes in last: other threads treat its presence as "prepared"
+        cn.update(conversion=conversion, unit=unit)
+        cn['dtype'] = dtype
+
+    def _conversion(self, address, name):
+        if not address:
+            return None
+        _, _, data, _ = self._block(address, b'##CC')
+        cc_type, _, _, _, val_count = _CC_DATA.unpack_from(self._mm, data)
+        values = struct.unpack_from(f'<{val_count}d', self._mm, data + _CC_DATA.size + 16)
+        if cc_type == _CC_IDENTITY:
+            return None
+        if cc_type == _CC_LINEAR and val_count >= 2:
+            return cc_type, values
+        if cc_type == _CC_RATIONAL and val_count >= 6:
+            return cc_type, values
+        raise UnsupportedLayout(f"{name}: conversion type {cc_type}")
+
+    def _data_blocks(self, address):
+        """Yield the DT blocks holding a group's records, in order."""
+        if not address:
+            return
+        block_id, links, _, _ = self._block(address)
+        if block_id == b'##DT':
+            yield address
+        elif block_id == b'##HL':
+            yield from self._data_blocks(links[0])
+        elif block_id == b'##DL':
+            while address:
+                _, links, _, _ = self._block(address, b'##DL')
+                for data_address in links[1:]:
+                    if self._block(data_address)[0] != b'##DT':
+                        raise UnsupportedLayout("compressed or column oriented data")
+                    yield data_address
+                address = links[0]
+        else:
+            raise UnsupportedLayout(f"data block {block_id!r}")
+
+    def _segments(self, group):
+        """Return (offset, record count) of each DT block of a group."""
+        record_size = group['record_size']
+        segments = []
+        remaining = group['cycles']
+        for address in self._data_blocks(group['data_address']):
+            _, _, start, end = self._block(address, b'##DT')
+            if (end - start) % record_size and remaining * record_size > end - start:
+                raise UnsupportedLayout("records split across data blocks")
+            count = min((end - start) // record_size, remaining)
+            segments.append((start, count))
+            remaining -= count
+            if not remaining:
+                break
+        return segments
+
+    def _locate(self, name):
+        locations = self._channels.get(name)
+        if not locations or len(locations) > 1:
+            # Unknown here, or ambiguous without a group: leave it to asammdf
+            raise UnsupportedLayout(f"{name}: not a unique channel of a sorted group")
+        group, cn = locations[0]
+        if group['master'] is None:
+            raise UnsupportedLayout(f"{name}: group has no master channel")
+        self._prepare(group, cn)
+        self._prepare(group, group['master'])
+        return group, cn
+
+    def master(self, name):
+        """Return the timestamps of a channel's group as float64.
+
+        float64 masters in a single block are views of the mapping; others are
+        computed once and kept in a budgeted cache.
+        """
+        group, _ = self._locate(name)
+        key = (self.key, group['data_address'])
+        timestamps = _masters.get(key)
+        if timestamps is None:
+            count = sum(c for _, c in group['segments'])
+            timestamps = _Column(group, group['master']).read(0, count)
+            timestamps = timestamps.astype(np.float64, copy=False)
+            if not is_mapped_view(timestamps):
+                _masters.put(key, timestamps)
+        return timestamps
+
+    def get(self, name, start=0, stop=None):
+        """Return (timestamps, samples, unit) of records [start, stop) of a channel."""
+        group, cn = self._locate(name)
+        count = sum(c for _, c in group['segments'])
+        stop = count if stop is None else min(stop, count)
+        start = min(max(start, 0), stop)
+        timestamps = _Column(group, group['master']).read(start, stop)
+        if timestamps.dtype != np.float64:
+            timestamps = timestamps.astype(np.float64)
+        return timestamps, _Column(group, cn).read(start, stop), cn['unit']
+
+
+_mapped = OrderedDict()   # file cache key -> MappedMDF, or None for unsupported files
+_mapped_lock = threading.Lock()
+
+
+def mapped_file(file_path):
+    """Return the MappedMDF for a file, or None if it cannot be mapped."""
+    if not MMAP_ENABLED or not file_path.lower().endswith('.mf4'):
+        return None
+    try:
+        key = file_cache_key(file_path)
+    except OSError:
+        return None
+
+    with _mapped_lock:
+        if key in _mapped:
+            _mapped.move_to_end(key)
+            return _mapped[key]
+
+    try:
+        mapped = MappedMDF(file_path)
+    except (UnsupportedLayout, struct.error, ValueError, OSError) as e:
+        print(f"Memory mapped reads unavailable for {file_path}: {e}", flush=True)
+        mapped = None
+
+    with _mapped_lock:
+        _mapped[key] = mapped
+        while len(_mapped) > MAX_MAPPED_FILES:
+            # Views into an evicted mapping keep it alive until they are gone
+            _mapped.popitem(last=False)
+    return mapped
+
+
+def is_mapped_view(array):
+    """Return True if an array is a view into a file mapping rather than its own memory."""
+    base = array
+    while isinstance(base, np.ndarray):
+        base = base.base
+    if isinstance(base, memoryview):
+        base = base.obj
+    return isinstance(base, mmap.mmap)
+
+
+def read_mapped(file_path, channel, start=0, stop=None):
+    """Return (timestamps, samples, unit) through the mapping, or None to fall back."""
+    mapped = mapped_file(file_path)
+    if mapped is None:
+        return None
+    try:
+        result = mapped.get(channel, start, stop)
+    except (UnsupportedLayout, struct.error, ValueError):
+        cache_result('mmap_read', False)
+        return None
+    cache_result('mmap_read', True)
+    return result
+
+
+def mapped_master(file_path, channel):
+    """Return the float64 timestamps of a channel's group through the mapping, or None."""
+    mapped = mapped_file(file_path)
+    if mapped is None:
+        return None
+    try:
+        return mapped.master(channel)
+    except (UnsupportedLayout, struct.error, ValueError):
+        return None
+
+
+registry.gauge('logscope_mmap_master_bytes', 'Bytes of computed timestamps of mapped files',
+               function=_masters.nbytes)
@@ -0,0 +1,206 @@
+"""
+Background pip runs for the console.
+Installs go into the session's own package directory, stream their output
+while running and are bounded by a timeout, so no callback thread waits on pip.
+"""
+
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from utils.console_kernel import Execution, session_site_dir
+
+
+PIP_TIMEOUT = float(os.environ.get('LOGSCOPE_PIP_TIMEOUT', 600))
+
+# Pip runs allowed at once across all sessions; others wait their turn
+PIP_WORKERS = int(os.environ.get('LOGSCOPE_PIP_WORKERS', 2))
+
+# Directory of wheels used as an extra (or, offline, the only) package source
+WHEEL_DIR = os.environ.get('LOGSCOPE_WHEEL_DIR', '')
+PIP_OFFLINE = os.environ.get('LOGSCOPE_PIP_OFFLINE', '0').lower() in ('1', 'true', 'yes')
+
+SUBCOMMANDS = ('install', 'list', 'show', 'freeze')
+
+# Options that would install outside the session directory
+_FORBIDDEN_LONG = ('--target', '--prefix', '--root', '--user', '--editable')
+_FORBIDDEN_SHORT = 't', 'e'
+
+# Real pip options that are also abbreviations of a forbidden one; pip's
+# parser takes an exact match over an abbreviation
+_EXACT_LONG = ('--pre',)
+
+# Short options that consume the rest of their token as a value (-rFILE)
+_VALUE_SHORT = 'rcifdb'
+
+# Subcommands that take --path to look only at the session directory
+_PATH_SUBCOMMANDS = ('list', 'freeze')
+
+
+def is_pip_command(command):
+    """Return True if a console command is a pip invocation."""
+    stripped = (command or '').strip().lstrip('!')
+    return stripped == 'pip' or stripped.startswith('pip ')
+
+
+def _is_forbidden(part):
+    """Return True if an argument sets a forbidden option the way pip would parse it.
+
+    Long options may be abbreviated to any prefix (--targ) and short options
+    may be joined to their value or to other flags (-tDIR, -Ut).
+    """
+    if part == '--':
+        # Everything after it would be taken as a requirement; keep it simple
+        return True
+    if part.startswith('--'):
+        name = part.split('=', 1)[0]
+        return name not in _EXACT_LONG and any(option.startswith(name)
+                                               for option in _FORBIDDEN_LONG)
+    if part.startswith('-'):
+        for letter in part[1:]:
+            if letter in _FORBIDDEN_SHORT:
+                return True
+            if letter in _VALUE_SHORT:
+                return False
+    return False
+
+
+def build_pip_args(command, session_id):
+    """Translate a console pip command into a pip argument list.
+
+    Raises ValueError for unsupported subcommands or options.
+    """
+    parts = shlex.split(command.strip().lstrip('!'))[1:]
+    if not parts or parts[0] not in SUBCOMMANDS:
+        raise ValueError(f"Supported pip commands: {', '.join(SUBCOMMANDS)}")
+    for part in parts[1:]:
+        if _is_forbidden(part):
+            raise ValueError(f"{part} is not allowed; packages install into the session")
+
+    site_dir = session_site_dir(session_id)
+    args = [sys.executable, '-m', 'pip', parts[0]] + parts[1:] + [
+        '--disable-pip-version-check', '--no-input']
+    if parts[0] == 'install':
+        args += ['--target', site_dir, '--progress-bar', 'off']
+        if WHEEL_DIR:
+            args += ['--find-links', WHEEL_DIR]
+        if PIP_OFFLINE:
+            args += ['--no-index']
+    elif parts[0] in _PATH_SUBCOMMANDS:
+        args += ['--path', site_dir]
+    return args
+
+
+def pip_env(args, session_id):
+    """Return the environment for a pip run, or None to inherit the server's.
+
+    pip show has no --path, so it finds session packages through PYTHONPATH.
+    Other subcommands keep them off the path so they cannot shadow pip's own.
+    """
+    if args[3] != 'show':
+        return None
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [session_site_dir(session_id),
+                                                      env.get('PYTHONPATH')]))
+    return env
+
+
+class PipRunner:
+    """Runs pip commands on background threads, one at a time per session."""
+
+    def __init__(self, max_workers=PIP_WORKERS, timeout=PIP_TIMEOUT):
+        self.timeout = timeout
+        self._slots = threading.Semaphore(max_workers)
+        self._executions = {}   # exec_id -> Execution
+        self._running = {}      # session_id -> Execution
+        self._lock = threading.Lock()
+
+    def start(self, command, session_id):
+        """Start a pip command for a session and return its Execution."""
+        args = build_pip_args(command, session_id)
+        with self._lock:
+            running = self._running.get(session_id)
+            if running is not None and not running.done:
+                raise RuntimeError("A pip command is already running for this session")
+            execution = Execution(str(uuid.uuid4()), command)
+            # Finished runs are kept for an hour of late polls
+            self._executions = {exec_id: e for exec_id, e in self._executions.items()
+                                if not e.done or time.monotonic() - e.started < 3600}
+            self._running = {sid: e for sid, e in self._running.items() if not e.done}
+            self._executions[execution.exec_id] = execution
+            self._running[session_id] = execution
+
+        execution.publish()
+        threading.Thread(target=self._run, args=(execution, args, pip_env(args, session_id)),
+                         name=f'pip-{session_id[:8]}', daemon=True).start()
+        return execution
+
+    def get(self, exec_id):
+        with self._lock:
+            return self._executions.get(exec_id)
+
+    def cancel(self, exec_id):
+        """Stop a running pip command."""
+        execution = self.get(exec_id)
+        if execution is None or execution.done:
+            return False
+        execution.cancelled = True
+        process = getattr(execution, 'process', None)
+        if process is not None:
+            process.kill()
+        return True
+
+    def _run(self, execution, args, env=None):
+        if not self._slots.acquire(blocking=False):
+            execution.write("Waiting for another pip command to finish...\n")
+            self._slots.acquire()
+
+        try:
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       text=True, bufsize=1, env=env)
+        except OSError as e:
+            self._slots.release()
+            execution.finish(error=f"Error executing pip command: {e}")
+            return
+
+        execution.process = process
+        execution.pid = process.pid
+        execution.stop_signal = signal.SIGTERM
+        execution.publish()
+        if execution.cancelled:
+            process.kill()
+
+        # Kill pip if it runs past the timeout; reading stdout then ends
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(self.timeout, kill)
+        timer.start()
+        try:
+            for line in process.stdout:
+                execution.write(line)
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            self._slots.release()
+
+        if returncode == 0:
+            execution.finish(result="\n✓ pip command completed successfully!")
+        elif execution.cancelled or returncode == -signal.SIGTERM:
+            execution.finish(error="\n✗ pip command cancelled")
+        elif timed_out.is_set():
+            execution.finish(error=f"\n✗ pip command timed out ({self.timeout:.0f}s limit)")
+        else:
+            execution.finish(error=f"\n✗ pip command failed (return code: {returncode})")
+
+
+# Shared runner used by the console callbacks
+pip_runner = PipRunner()
@@ -0,0 +1,285 @@
+"""
+Plot engine: pulls channels from cached MDF handles and reduces them to a
+bounded number of points for the main plot.
+"""
+
+import numpy as np
+
+from utils.mdf_cache import mdf_cache
+from utils.downsampling import minmax_downsample
+from utils.pyramid import read_pyramid_trace
+from utils.shared_signals import shared_signals
+from utils.alignment import align_signals, load_parallel
+from utils.export import has_columnar_channel
+from utils.expressions import evaluate_derived
+from utils.mmap_reader import mapped_master, read_mapped
+
+
+# Fallback when the browser has not reported the plot width yet
+DEFAULT_PLOT_WIDTH = 1200
+
+# Points per pixel of plot width kept after downsampling
+POINTS_PER_PIXEL = 2
+
+# Upper bound on channels plotted at once
+MAX_PLOT_CHANNELS = 16
+
+
+def channel_key(file_id, channel):
+    """Return the selector value identifying a channel of a loaded file."""
+    return f"{file_id}|{channel}"
+
+
+def split_channel_key(key):
+    """Split a selector value into (file_id, channel)."""
+    file_id, _, channel = key.partition('|')
+    return file_id, channel
+
+
+def point_budget(width_px):
+    """Return how many points a trace may carry for a given plot width."""
+    try:
+        width = int(width_px or DEFAULT_PLOT_WIDTH)
+    except (TypeError, ValueError):
+        width = DEFAULT_PLOT_WIDTH
+    return max(width, 100) * POINTS_PER_PIXEL
+
+
+def load_signal(file_id, channel, file_path=None):
+    """Return (timestamps, samples, unit) for a channel from the shared signal store."""
+    file_path = file_path or mdf_cache.path_for(file_id)
+    shared = shared_signals.get(file_path, channel, file_id=file_id)
+    return shared.timestamps, shared.samples, shared.unit
+
+
+def _load_master(entry, group_index):
+    """Return the master timestamps of a channel group, decoding them once."""
+    key = ('master', group_index)
+    master = entry.arrays.get(key)
+    if master is None:
+        master = np.asarray(entry.mdf.get_master(group_index))
+        mdf_cache.store_array(entry, key, master)
+    return master
+
+
+def window_bounds(timestamps, t0, t1):
+    """Return the [start, stop) sample range covering t0..t1.
+
+    One extra sample is kept on each side so lines run to the plot edges.
+    """
+    start = int(np.searchsorted(timestamps, t0, side='left'))
+    stop = int(np.searchsorted(timestamps, t1, side='right'))
+    return max(start - 1, 0), min(stop + 1, len(timestamps))
+
+
+def load_window(file_id, channel, t0, t1, file_path=None):
+    """Return (timestamps, samples, unit) for the part of a channel inside t0..t1.
+
+    Slices the shared decoded channel if it exists; otherwise binary-searches
+    the group's master timestamps and reads only the overlapping records,
+    straight from the mapped file when its layout allows.
+    """
+    file_path = file_path or mdf_cache.path_for(file_id)
+    shared = shared_signals.peek(file_path, channel)
+    if shared is None and has_columnar_channel(file_path, channel):
+        # Reading the whole column is cheaper than seeking MDF records
+        shared = shared_signals.get(file_path, channel, file_id=file_id)
+    if shared is not None:
+        start, stop = window_bounds(shared.timestamps, t0, t1)
+        return shared.timestamps[start:stop], shared.samples[start:stop], shared.unit
+
+    master = mapped_master(file_path, channel)
+    if master is not None:
+        start, stop = window_bounds(master, t0, t1)
+        mapped = read_mapped(file_path, channel, start, stop)
+        if mapped is not None:
+            return mapped
+
+    with mdf_cache.checkout(file_path, file_id=file_id) as entry:
+        with entry.lock:
+            units = entry.metadata.setdefault('units', {})
+
+            group_index, channel_index = entry.mdf.whereis(channel)[0]
+            master = _load_master(entry, group_index)
+            start, stop = window_bounds(master, t0, t1)
+            if stop <= start:
+                return master[:0], np.empty(0), units.get(channel, '')
+
+            signal = entry.mdf.get(
+                channel,
+                group=group_index,
+                index=channel_index,
+                record_offset=start,
+                record_count=stop - start
+            )
+            unit = getattr(signal, 'unit', '') or ''
+            units[channel] = unit
+            return np.asarray(signal.timestamps), np.asarray(signal.samples), unit
+
+
+def parse_x_range(relayout_data):
+    """Extract the visible x range from a plotly relayoutData event.
+
+    Returns (t0, t1) for a zoom or pan, None when the axis was reset to
+    autorange, and False when the event does not touch the x axis.
+    """
+    if not relayout_data:
+        return False
+    if relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range' in relayout_data:
+        t0, t1 = relayout_data['xaxis.range'][:2]
+    elif 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        t0, t1 = relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    else:
+        return False
+    try:
+        return float(t0), float(t1)
+    except (TypeError, ValueError):
+        return False
+
+
+def load_derived(item, x_range=None):
+    """Return (timestamps, values, unit) of a derived series item."""
+    if item.get('expression') is None:
+        raise KeyError("derived channel is not defined in this session")
+    file_id, file_path = item['file_id'], item['file_path'] or mdf_cache.path_for(item['file_id'])
+
+    def loader(channel, window=None):
+        # Inputs of a windowed evaluation are read for the window only
+        if window:
+            return load_window(file_id, channel, window[0], window[1], file_path)
+        return load_signal(file_id, channel, file_path)
+
+    timestamps, values = evaluate_derived(item['expression'], loader, file_path, x_range)
+    return timestamps, values, ''
+
+
+def _read_range(item, x_range):
+    """Return the time range to read for an item: the view, clipped to the item's window."""
+    window = item.get('window')
+    if not window:
+        return x_range
+    if not x_range:
+        return window
+    return max(x_range[0], window[0]), min(x_range[1], window[1])
+
+
+def _is_plottable(samples):
+    return samples.ndim == 1 and (np.issubdtype(samples.dtype, np.number)
+                                  or samples.dtype == np.bool_)
+
+
+def _clip(timestamps, samples, bounds):
+    start, stop = window_bounds(timestamps, *bounds)
+    return timestamps[start:stop], samples[start:stop]
+
+
+def _aligned_input(item, timestamps, samples, x_range):
+    """Return an item's samples on its file's relative time, cut to what is shown.
+
+    The item's partial-load window is applied first, then the visible range,
+    so only the shown records are resampled rather than the whole recording.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if not len(timestamps):
+        return timestamps, samples
+    origin = timestamps[0]
+    if item.get('window'):
+        timestamps, samples = _clip(timestamps, samples, item['window'])
+    timestamps = timestamps - origin
+    if x_range:
+        timestamps, samples = _clip(timestamps, samples, x_range)
+    return timestamps, samples
+
+
+def _build_aligned_traces(series, n_out, x_range):
+    """Resample channels of several files onto one relative time base."""
+    def load(item):
+        try:
+            if 'expression' in item:
+                return load_derived(item)
+            return load_signal(item['file_id'], item['channel'], item['file_path'])
+        except Exception as e:
+            return e
+
+    loaded = load_parallel(load, series)
+    traces = []
+    errors = []
+    usable = []
+    for item, result in zip(series, loaded):
+        if isinstance(result, Exception):
+            errors.append(f"{item['label']}: {result}")
+        elif not _is_plottable(result[1]):
+            errors.append(f"{item['label']}: not a numeric signal")
+        else:
+            usable.append((item, result))
+
+    # Each input is already relative to its file's start and cut to the view
+    time_base, aligned = align_signals(
+        [_aligned_input(item, t, y, x_range) for item, (t, y, _) in usable])
+    for (item, (_, _, unit)), samples in zip(usable, aligned):
+        x, y = minmax_downsample(time_base, samples, n_out)
+        traces.append({'name': item['label'], 'unit': unit, 'x': x, 'y': y})
+    return traces, errors
+
+
+def build_traces(series, width_px=None, x_range=None, align=False):
+    """Return downsampled trace data for the selected channels.
+
+    series is a list of dicts with file_id, file_path, channel and label,
+    so channels of several loaded files can be plotted together; items
+    with an 'expression' are derived channels. Each trace
+    is a dict with name, unit, x and y. With x_range only the visible window
+    is read, at full resolution up to the point budget; an item's 'window'
+    (from a partial load) bounds what is read the same way. With align=True all
+    series are resampled onto a common time base relative to each file's
+    start, covering only the visible part of each item's window. Channels that cannot be decoded or are not numeric are reported
+    in the returned error list.
+    """
+    n_out = point_budget(width_px)
+    series = (series or [])[:MAX_PLOT_CHANNELS]
+    if align:
+        return _build_aligned_traces(series, n_out, x_range)
+
+    traces = []
+    errors = []
+    for item in series:
+        file_id, file_path, channel = item['file_id'], item['file_path'], item['channel']
+        read_range = _read_range(item, x_range)
+
+        # Precomputed tiles answer most views without touching the MDF
+        tiles = read_pyramid_trace(file_path, channel, n_out, read_range) \
+            if file_path and 'expression' not in item else None
+        if tiles is not None:
+            x, y, unit = tiles
+            x, y = minmax_downsample(x, y, n_out)
+            traces.append({'name': item['label'], 'unit': unit, 'x': x, 'y': y})
+            continue
+
+        try:
+            if 'expression' in item:
+                # Derived channels are evaluated for the visible window only
+                timestamps, samples, unit = load_derived(item, read_range)
+            elif read_range:
+                timestamps, samples, unit = load_window(file_id, channel, read_range[0],
+                                                        read_range[1], file_path)
+            else:
+                timestamps, samples, unit = load_signal(file_id, channel, file_path)
+        except Exception as e:
+            errors.append(f"{item['label']}: {e}")
+            continue
+
+        if not _is_plottable(samples):
+            errors.append(f"{item['label']}: not a numeric signal")
+            continue
+
+        x, y = minmax_downsample(timestamps, samples, n_out)
+        traces.append({
+            'name': item['label'],
+            'unit': unit,
+            'x': x,
+            'y': y
+        })
+
+    return traces, errors
@@ -0,0 +1,293 @@
+"""
+Multi-resolution min/max pyramids per channel, persisted as sidecar
+directories of .npy files in the upload directory so plots can skip decoding
+raw samples. Levels are memory mapped, so a view reads only its own tiles.
+"""
+
+import os
+import queue
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.fingerprint import file_fingerprint
+from utils.mdf_cache import mdf_cache
+from utils.upload_store import content_store, get_upload_dir
+
+
+# Build pyramids in the background after a file is loaded
+BUILD_PYRAMIDS = os.environ.get('LOGSCOPE_BUILD_PYRAMIDS', '0') == '1'
+
+# Samples per bucket at the finest level, and the ratio between levels
+BASE_BUCKET_SIZE = 64
+LEVEL_FACTOR = 8
+
+# Stop adding levels once a level has this few buckets
+MIN_TOP_BUCKETS = 256
+
+LEVEL_FIELDS = ('tmin', 'tmax', 'min', 'max')
+
+_build_queue = queue.Queue()
+_pending = set()
+_pending_lock = threading.Lock()
+_worker = None
+
+# Pyramids kept open, and memory-mapped levels kept per pyramid
+MAX_OPEN_PYRAMIDS = 16
+MAX_MAPPED_LEVELS = 64
+
+_open_pyramids = OrderedDict()  # sidecar path -> Pyramid, least recently used first
+_open_lock = threading.Lock()
+
+
+def pyramid_path(fingerprint):
+    """Return the sidecar directory for a file fingerprint."""
+    pyramid_dir = os.path.join(get_upload_dir(), 'pyramids')
+    os.makedirs(pyramid_dir, exist_ok=True)
+    return os.path.join(pyramid_dir, fingerprint)
+
+
+def _reduce_level(level, factor):
+    """Merge every `factor` consecutive buckets of a level into one."""
+    n = len(level['min'])
+    pad = (-n) % factor
+    if pad:
+        level = {
+            'tmin': np.concatenate([level['tmin'], np.repeat(level['tmin'][-1:], pad)]),
+            'tmax': np.concatenate([level['tmax'], np.repeat(level['tmax'][-1:], pad)]),
+            'min': np.concatenate([level['min'], np.full(pad, np.inf)]),
+            'max': np.concatenate([level['max'], np.full(pad, -np.inf)]),
+        }
+
+    shaped = {field: level[field].reshape(-1, factor) for field in LEVEL_FIELDS}
+    rows = np.arange(shaped['min'].shape[0])
+    min_idx = np.argmin(shaped['min'], axis=1)
+    max_idx = np.argmax(shaped['max'], axis=1)
+
+    return {
+        'tmin': shaped['tmin'][rows, min_idx],
+        'tmax': shaped['tmax'][rows, max_idx],
+        'min': shaped['min'][rows, min_idx],
+        'max': shaped['max'][rows, max_idx],
+    }
+
+
+def compute_pyramid(timestamps, samples):
+    """Return the list of levels, finest first, for one channel."""
+    values = samples.astype(np.float64)
+    valid = ~np.isnan(values)
+    raw = {
+        'tmin': timestamps.astype(np.float64),
+        'tmax': timestamps.astype(np.float64),
+        'min': np.where(valid, values, np.inf),
+        'max': np.where(valid, values, -np.inf),
+    }
+
+    levels = [_reduce_level(raw, BASE_BUCKET_SIZE)]
+    while len(levels[-1]['min']) > MIN_TOP_BUCKETS:
+        levels.append(_reduce_level(levels[-1], LEVEL_FACTOR))
+    return levels
+
+
+def _write_array(directory, name, array):
+    # Uncompressed so levels can be memory mapped when read
+    np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+
+
+def build_pyramid(file_path, file_id=None):
+    """Compute and persist the pyramid for every numeric channel of a file.
+
+    Channels are decoded one at a time and written straight to the sidecar
+    directory, so memory stays bounded by the largest single channel.
+    """
+    target = pyramid_path(file_fingerprint(file_path))
+    if os.path.exists(target):
+        return target
+
+    print(f"Building pyramid for: {file_path}", flush=True)
+    temp_target = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(temp_target, ignore_errors=True)
+    os.makedirs(temp_target)
+    channels = []
+    units = []
+    level_counts = []
+
+    try:
+        with mdf_cache.checkout(file_path, file_id=file_id) as entry:
+            names = list(entry.metadata.get('signal_names') or entry.mdf.channels_db)
+            for name in names:
+                try:
+                    with entry.lock:
+                        signal = entry.mdf.get(name)
+                except Exception:
+                    continue
+
+                samples = np.asarray(signal.samples)
+                if (samples.ndim != 1 or not len(samples)
+                        or not (np.issubdtype(samples.dtype, np.number)
+                                or samples.dtype == np.bool_)):
+                    continue
+
+                index = len(channels)
+                levels = compute_pyramid(np.asarray(signal.timestamps), samples)
+                for level_idx, level in enumerate(levels):
+                    for field in LEVEL_FIELDS:
+                        _write_array(temp_target, f"c{index}_L{level_idx}_{field}", level[field])
+                level_counts.append(len(levels))
+                channels.append(name)
+                units.append(getattr(signal, 'unit', '') or '')
+
+        _write_array(temp_target, 'levels', np.array(level_counts, dtype=np.int64))
+        _write_array(temp_target, 'channels', np.array(channels, dtype=object).astype(str))
+        _write_array(temp_target, 'units', np.array(units, dtype=object).astype(str))
+        os.rename(temp_target, target)
+    except OSError:
+        if not os.path.isdir(target):
+            raise
+        # Built meanwhile by another server process
+    finally:
+        shutil.rmtree(temp_target, ignore_errors=True)
+
+    print(f"Pyramid saved to: {target} ({len(channels)} channels)", flush=True)
+    return target
+
+
+def _build_worker():
+    while True:
+        file_path, file_id = _build_queue.get()
+        try:
+            build_pyramid(file_path, file_id)
+        except Exception as e:
+            print(f"Error building pyramid for {file_path}: {e}", flush=True)
+        finally:
+            with _pending_lock:
+                _pending.discard(file_path)
+            _build_queue.task_done()
+
+
+def schedule_pyramid_build(file_path, file_id=None):
+    """Queue a background pyramid build if enabled and not already done."""
+    global _worker
+    if not BUILD_PYRAMIDS:
+        return
+    with _pending_lock:
+        if file_path in _pending:
+            return
+        _pending.add(file_path)
+        if _worker is None:
+            _worker = threading.Thread(target=_build_worker, name='pyramid-builder',
+                                       daemon=True)
+            _worker.start()
+    _build_queue.put((file_path, file_id))
+
+
+class Pyramid:
+    """Read access to a persisted pyramid."""
+
+    def __init__(self, path):
+        self.path = path
+        self._levels = OrderedDict()  # (channel index, level) -> arrays, least recently used first
+        self._lock = threading.Lock()
+        names = self._load('channels')
+        self.units = dict(zip(names, self._load('units')))
+        self.index = {name: idx for idx, name in enumerate(names)}
+        self._level_counts = self._load('levels')
+
+    def _load(self, name, mmap_mode=None):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode=mmap_mode,
+                       allow_pickle=False)
+
+    def level_count(self, channel):
+        return int(self._level_counts[self.index[channel]])
+
+    def level(self, channel, level_idx):
+        """Return one level's arrays for a channel, memory mapped read-only."""
+        key = (self.index[channel], level_idx)
+        with self._lock:
+            level = self._levels.get(key)
+            if level is not None:
+                self._levels.move_to_end(key)
+                return level
+            level = {field: self._load(f"c{key[0]}_L{level_idx}_{field}", mmap_mode='r')
+                     for field in LEVEL_FIELDS}
+            self._levels[key] = level
+            while len(self._levels) > MAX_MAPPED_LEVELS:
+                self._levels.popitem(last=False)
+            return level
+
+
+def open_pyramid(file_path):
+    """Return the pyramid for a file, or None if it has not been built."""
+    try:
+        path = pyramid_path(file_fingerprint(file_path))
+    except OSError:
+        return None
+
+    with _open_lock:
+        pyramid = _open_pyramids.get(path)
+        if pyramid is not None:
+            _open_pyramids.move_to_end(path)
+        elif os.path.isdir(path):
+            pyramid = _open_pyramids[path] = Pyramid(path)
+            while len(_open_pyramids) > MAX_OPEN_PYRAMIDS:
+                _open_pyramids.popitem(last=False)
+        return pyramid
+
+
+def remove_pyramid(file_path):
+    """Close and delete the pyramid of a file, e.g. when its upload is evicted."""
+    try:
+        fingerprint = file_fingerprint(file_path)
+    except OSError:
+        return
+    path = pyramid_path(fingerprint)
+    with _open_lock:
+        _open_pyramids.pop(path, None)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"Removed pyramid: {path}", flush=True)
+    # Sidecar of the old single-archive format
+    legacy = f"{path}.npz"
+    if os.path.exists(legacy):
+        os.remove(legacy)
+
+
+content_store.on_evict(remove_pyramid)
+
+
+def read_pyramid_trace(file_path, channel, n_out, x_range=None):
+    """Return (x, y, unit) from the coarsest level that still fills n_out points.
+
+    Returns None when there is no pyramid for the channel or even the finest
+    level is too coarse for the requested window.
+    """
+    pyramid = open_pyramid(file_path)
+    if pyramid is None or channel not in pyramid.index:
+        return None
+
+    # Only the tiles inside the window are read from the mapped levels
+    wanted_buckets = max(n_out // 2, 1)
+    for level_idx in reversed(range(pyramid.level_count(channel))):
+        level = pyramid.level(channel, level_idx)
+        tmin, tmax = level['tmin'], level['tmax']
+        if x_range:
+            start = int(np.searchsorted(tmax, x_range[0], side='left'))
+            stop = int(np.searchsorted(tmin, x_range[1], side='right'))
+        else:
+            start, stop = 0, len(tmin)
+        if stop - start < wanted_buckets:
+            continue
+
+        sl = slice(start, stop)
+        min_first = tmin[sl] <= tmax[sl]
+        x = np.where(min_first, tmin[sl], tmax[sl]), np.where(min_first, tmax[sl], tmin[sl])
+        y = (np.where(min_first, level['min'][sl], level['max'][sl]),
+             np.where(min_first, level['max'][sl], level['min'][sl]))
+        # Buckets without valid samples carry +/-inf
+        y_out = np.stack(y).ravel(order='F')
+        y_out[~np.isfinite(y_out)] = np.nan
+        return np.stack(x).ravel(order='F'), y_out, pyramid.units.get(channel, '')
+
+    return None
@@ -0,0 +1,116 @@
+"""
+Selection specs typed after a path in the file path box, e.g.
+
+    /data/run42.mf4 | Engine.* VehSpd | 120..150
+
+loads only the channels matching the glob patterns, and only reads the
+records between 120 s and 150 s when they are plotted. Either part may be
+left out, and a window may be open-ended (120.. or ..150).
+"""
+
+import fnmatch
+import math
+import re
+
+from utils.catalog import catalog
+
+
+SEPARATOR = '|'
+
+_NUMBER = r'[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?'
+_WINDOW = re.compile(rf'^\s*({_NUMBER})?\s*\.\.\s*({_NUMBER})?\s*$')
+
+
+def parse_path_spec(text):
+    """Split path box text into (path, selection).
+
+    selection is None for a plain path, else a dict with 'channels' (glob
+    patterns, empty for all) and 'window' ([t0, t1] with None for an open
+    end, or None). Raises ValueError for a malformed spec.
+    """
+    path, *parts = (text or '').split(SEPARATOR)
+    path = path.strip()
+    if not parts:
+        return path, None
+
+    channels = []
+    window = None
+    for part in parts:
+        match = _WINDOW.match(part)
+        if match:
+            if window is not None:
+                raise ValueError("Only one time window may be given")
+            t0, t1 = (float(value) if value is not None else None for value in match.groups())
+            if t0 is not None and t1 is not None and t1 < t0:
+                raise ValueError(f"Time window ends before it starts: {part.strip()}")
+            window = [t0, t1]
+        else:
+            channels.extend(pattern for pattern in re.split(r'[\s,]+', part) if pattern)
+
+    if not channels and window is None:
+        return path, None
+    return path, {'channels': channels, 'window': window}
+
+
+def format_path_spec(path, selection):
+    """Inverse of parse_path_spec, for showing a loaded selection in the path box."""
+    if not selection:
+        return path
+    parts = [path]
+    if selection['channels']:
+        parts.append(' '.join(selection['channels']))
+    if selection['window']:
+        parts.append(window_label(selection['window']))
+    return f" {SEPARATOR} ".join(parts)
+
+
+def window_label(window):
+    t0, t1 = window
+    return f"{'' if t0 is None else f'{t0:g}'}..{'' if t1 is None else f'{t1:g}'}"
+
+
+def selection_window(selection):
+    """Return the selection's (t0, t1) with open ends as infinities, or None."""
+    window = (selection or {}).get('window')
+    if not window:
+        return None
+    t0, t1 = window
+    return (-math.inf if t0 is None else t0, math.inf if t1 is None else t1)
+
+
+def select_channels(file_path, names, selection):
+    """Return the names a selection keeps, in file order.
+
+    Channels are matched against the glob patterns; with a window, channels
+    whose recorded time range (from the catalog) misses it are dropped.
+    Channels without a catalogued range are kept.
+    """
+    if not selection:
+        return list(names)
+
+    patterns = selection['channels']
+    if patterns:
+        names = [name for name in names
+                 if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+    window = selection_window(selection)
+    if window and names:
+        ranges = catalog.time_ranges(file_path)
+        t0, t1 = window
+        names = [name for name in names
+                 if not _misses(ranges.get(name), t0, t1)]
+    return list(names)
+
+
+def _misses(time_range, t0, t1):
+    if time_range is None or time_range[0] is None or time_range[1] is None:
+        return False
+    return time_range[1] < t0 or time_range[0] > t1
+
+
+def selection_key(selection):
+    """Return a hashable key for a selection, for caches built per selection."""
+    if not selection:
+        return None
+    window = tuple(selection['window']) if selection['window'] else None
+    return tuple(selection['channels']), window
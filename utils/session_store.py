@@ -0,0 +1,230 @@
+"""
+Server-side session state.
+Browser stores only hold opaque handles (file_id, session id); the heavy
+state they refer to lives here, in memory or on disk.
+"""
+
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+SESSION_BACKEND = os.environ.get('LOGSCOPE_SESSION_BACKEND', 'memory')
+
+# Next to the uploads (see utils.upload_store.UPLOAD_DIR), in a directory only this user can read
+SESSION_DIR = os.environ.get('LOGSCOPE_SESSION_DIR') or os.path.join(
+    os.environ.get('LOGSCOPE_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'logscope_uploads')),
+    'sessions')
+
+# Entries kept by the in-memory backend before the oldest are dropped
+MAX_MEMORY_ENTRIES = 4096
+
+# Entries unused for this long are expired by either backend
+SESSION_TTL_SECONDS = float(os.environ.get('LOGSCOPE_SESSION_TTL_HOURS', 24)) * 3600
+
+SWEEP_INTERVAL_SECONDS = 600
+
+# Loaded file metadata is never dropped to make room, only expired
+PINNED_PREFIXES = ('file-',)
+
+
+class MemoryBackend:
+    """Bounded in-process key/value backend.
+
+    Past max_entries the least recently used entries are dropped, except
+    pinned ones; anything unused for ttl seconds expires.
+    """
+
+    def __init__(self, max_entries=MAX_MEMORY_ENTRIES, ttl=SESSION_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, last used), least recently used first
+        self._swept = time.monotonic()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self._data[key] = (item[0], time.monotonic())
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (value, now)
+            self._data.move_to_end(key)
+            if now - self._swept > SWEEP_INTERVAL_SECONDS:
+                self._swept = now
+                for old in [k for k, (_, used) in self._data.items() if now - used > self.ttl]:
+                    del self._data[old]
+            excess = len(self._data) - self.max_entries
+            if excess > 0:
+                for old in [k for k in self._data if not k.startswith(PINNED_PREFIXES)][:excess]:
+                    del self._data[old]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+def _private_directory(path):
+    """Create a directory only this user can use, refusing one that belongs to someone else."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    stats = os.lstat(path)
+    if not stat.S_ISDIR(stats.st_mode) or \
+            (hasattr(os, 'getuid') and stats.st_uid != os.getuid()):
+        raise RuntimeError(f"Session directory {path} is not a directory owned by this user")
+    if stats.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+
+class DiskBackend:
+    """JSON-file-per-key backend in a private directory, shared between processes.
+
+    Reads refresh an entry's mtime; a background sweep removes entries
+    unused for ttl seconds.
+    """
+
+    def __init__(self, directory=SESSION_DIR, ttl=SESSION_TTL_SECONDS):
+        self.directory = directory
+        self.ttl = ttl
+        _private_directory(directory)
+        self._janitor = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        safe_key = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in key)
+        return os.path.join(self.directory, f"{safe_key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def set(self, key, value):
+        self._start_janitor()
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            # Summaries may hold NumPy scalars and the like; they are only displayed
+            json.dump(value, f, default=str)
+        os.replace(temp_path, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def sweep(self):
+        """Remove entries (and stray temp files) unused for longer than the TTL."""
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"Expired {removed} session entries", flush=True)
+
+    def _start_janitor(self):
+        with self._lock:
+            if self._janitor is None:
+                self._janitor = threading.Thread(target=self._janitor_loop,
+                                                 name='session-janitor', daemon=True)
+                self._janitor.start()
+
+    def _janitor_loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error during session cleanup: {e}", flush=True)
+            time.sleep(SWEEP_INTERVAL_SECONDS)
+
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'disk': DiskBackend,
+}
+
+
+class SessionStore:
+    """Typed access to loaded file metadata and per-session state."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @property
+    def shared(self):
+        """True if other server processes see the same state."""
+        return isinstance(self.backend, DiskBackend)
+
+    def put_file(self, file_info):
+        """Store a loaded file's metadata and return its handle."""
+        file_id = file_info['file_id']
+        self.backend.set(f"file-{file_id}", file_info)
+        return {'file_id': file_id}
+
+    def get_file(self, handle):
+        """Return file metadata for a handle dict or file_id, or None."""
+        file_id = handle.get('file_id') if isinstance(handle, dict) else handle
+        if not file_id:
+            return None
+        return self.backend.get(f"file-{file_id}")
+
+    def get(self, session_id, name, default=None):
+        """Return one named value of a session's state."""
+        value = self.backend.get(f"session-{session_id}-{name}")
+        return default if value is None else value
+
+    def set(self, session_id, name, value):
+        self.backend.set(f"session-{session_id}-{name}", value)
+
+    def delete(self, session_id, name):
+        self.backend.delete(f"session-{session_id}-{name}")
+
+    def publish(self, kind, key, value):
+        """Make a record (job, upload, execution) visible to every server process.
+
+        value must be JSON-serialisable; objects publish their to_dict().
+        """
+        if self.shared:
+            self.backend.set(f"{kind}-{key}", value)
+
+    def published(self, kind, key):
+        """Return a record published by any server process, or None."""
+        if not self.shared or not key:
+            return None
+        return self.backend.get(f"{kind}-{key}")
+
+    def unpublish(self, kind, key):
+        if self.shared:
+            self.backend.delete(f"{kind}-{key}")
+
+
+def create_session_store(backend_name=SESSION_BACKEND):
+    """Create a session store with the configured backend."""
+    backend_class = BACKENDS.get(backend_name)
+    if backend_class is None:
+        raise ValueError(f"Unknown session backend: {backend_name}")
+    return SessionStore(backend_class())
+
+
+# Shared store used by all callbacks in this process
+session_store = create_session_store()
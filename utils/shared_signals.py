@@ -0,0 +1,318 @@
+"""
+Decoded channel arrays held in shared memory.
+Each file/channel pair is decoded once; the plot engine and every console
+kernel map the same buffers instead of keeping private copies. Channels read
+as views of a memory-mapped MDF file are not copied at all; other processes
+map the file themselves.
+"""
+
+import atexit
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.fingerprint import file_fingerprint
+from utils.mdf_cache import mdf_cache
+from utils.export import read_columnar_channel
+from utils.mmap_reader import is_mapped_view, read_mapped
+from utils.metrics import cache_result, registry, span
+from utils.session_store import session_store
+
+
+SHARED_SIGNALS_BYTES = int(os.environ.get('LOGSCOPE_SHARED_SIGNALS_MB', 4096)) * 1024 * 1024
+
+
+def _to_shared(array):
+    """Copy an array into a new shared memory block and return (block, view)."""
+    block = shared_memory.SharedMemory(name=f"logscope_{uuid.uuid4().hex[:20]}",
+                                       create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    view[...] = array
+    view.flags.writeable = False
+    return block, view
+
+
+def _release(block):
+    try:
+        block.close()
+    except BufferError:
+        pass  # Views are still alive; the mapping is freed with them
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class SharedSignal:
+    """One decoded channel living in two shared memory blocks."""
+
+    def __init__(self, channel, timestamps, samples, unit):
+        self.channel = channel
+        self.unit = unit
+        self.owner = True
+        self._blocks = []
+        self.timestamps = self._share(timestamps)
+        self.samples = self._share(samples)
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Map a channel decoded by another server process without copying it."""
+        shared = cls.__new__(cls)
+        shared.channel = descriptor['channel']
+        shared.unit = descriptor['unit']
+        shared.owner = False
+        shared._blocks, shared.timestamps, shared.samples = attach_signal(descriptor)
+        return shared
+
+    def _share(self, array):
+        block, view = _to_shared(np.ascontiguousarray(array))
+        self._blocks.append(block)
+        return view
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.samples.nbytes
+
+    def descriptor(self):
+        """Describe the blocks so another process can attach to them."""
+        return {
+            'channel': self.channel,
+            'unit': self.unit,
+            'timestamps': (self._blocks[0].name, self.timestamps.dtype.str,
+                           self.timestamps.shape),
+            'samples': (self._blocks[1].name, self.samples.dtype.str, self.samples.shape)
+        }
+
+    def release(self):
+        """Unlink the blocks; mappings stay valid until the last view is gone.
+
+        Attached signals only drop their own mapping; the owner unlinks.
+        """
+        for block in self._blocks:
+            if self.owner:
+                _release(block)
+            else:
+                try:
+                    block.close()
+                except BufferError:
+                    pass
+
+
+def _published_key(key):
+    fingerprint, channel = key
+    return hashlib.sha1(repr((fingerprint, channel)).encode()).hexdigest()
+
+
+def _forget(key, shared):
+    if shared.owner:
+        session_store.unpublish('signal', _published_key(key))
+    shared.release()
+
+
+def _attach_published(key):
+    """Return a signal another server process has already decoded, or None."""
+    descriptor = session_store.published('signal', _published_key(key))
+    if descriptor is None:
+        return None
+    try:
+        if descriptor.get('mapped'):
+            return MappedSignal.attach(descriptor)
+        return SharedSignal.attach(descriptor)
+    except (FileNotFoundError, ValueError):
+        # The owner evicted it meanwhile
+        return None
+
+
+class MappedSignal:
+    """A channel read from a memory-mapped MDF file, kept without copying.
+
+    View arrays share the OS page cache with every other process mapping the
+    file, so only arrays the read had to compute (converted values) count
+    against the store's budget. Other processes re-read it from the file.
+    """
+
+    owner = True
+
+    def __init__(self, channel, timestamps, samples, unit, file_path):
+        self.channel = channel
+        self.unit = unit
+        self.file_path = file_path
+        self.timestamps = timestamps
+        self.samples = samples
+        # Read-only like shared blocks, so no caller can change the cached channel
+        timestamps.flags.writeable = False
+        samples.flags.writeable = False
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.timestamps, self.samples)
+                   if not is_mapped_view(array))
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Map a channel another server process read from the same file."""
+        _, timestamps, samples = attach_signal(descriptor)
+        shared = cls(descriptor['channel'], timestamps, samples, descriptor['unit'],
+                     descriptor['mapped'])
+        shared.owner = False
+        return shared
+
+    def descriptor(self):
+        return {'channel': self.channel, 'unit': self.unit, 'mapped': self.file_path}
+
+    def release(self):
+        pass
+
+
+class SharedSignalStore:
+    """LRU store of shared channels keyed by file fingerprint and channel name."""
+
+    def __init__(self, max_bytes=SHARED_SIGNALS_BYTES):
+        self.max_bytes = max_bytes
+        self._signals = OrderedDict()
+        self._lock = threading.Lock()
+        self._decode_locks = {}
+
+    def _decode_lock(self, key):
+        with self._lock:
+            return self._decode_locks.setdefault(key, threading.Lock())
+
+    def _drop_decode_lock(self, key, lock):
+        with self._lock:
+            # A failed decode may have been retried under a newer lock
+            if self._decode_locks.get(key) is lock:
+                del self._decode_locks[key]
+
+    def get(self, file_path, channel, file_id=None):
+        """Return the SharedSignal for a channel, decoding it on first use."""
+        key = (file_fingerprint(file_path), channel)
+
+        with self._lock:
+            shared = self._signals.get(key)
+            if shared is not None:
+                self._signals.move_to_end(key)
+                cache_result('shared_signals', True)
+                return shared
+
+        # Only one thread decodes a given channel; the others wait for it
+        lock = self._decode_lock(key)
+        try:
+            with lock:
+                return self._decode(key, file_path, channel, file_id)
+        finally:
+            self._drop_decode_lock(key, lock)
+
+    def _decode(self, key, file_path, channel, file_id):
+        with self._lock:
+            shared = self._signals.get(key)
+            if shared is not None:
+                cache_result('shared_signals', True)
+                return shared
+
+        cache_result('shared_signals', False)
+        shared = _attach_published(key)
+        if shared is not None:
+            return self._add(key, shared)
+
+        # Plain MDF 4 layouts are read as views of the mapped file and kept as is
+        with span('mmap_read'):
+            mapped = read_mapped(file_path, channel)
+        if mapped is not None:
+            timestamps, samples, unit = mapped
+            shared = MappedSignal(channel, timestamps, samples, unit, file_path)
+            session_store.publish('signal', _published_key(key), shared.descriptor())
+            return self._add(key, shared)
+
+        # A columnar copy reads a single column instead of decoding MDF blocks
+        with span('columnar_read'):
+            columnar = read_columnar_channel(file_path, channel)
+        if columnar is not None:
+            timestamps, samples, unit = columnar
+        else:
+            with mdf_cache.checkout(file_path, file_id=file_id) as entry:
+                with entry.lock, span('mdf_decode'):
+                    signal = entry.mdf.get(channel)
+            timestamps = np.asarray(signal.timestamps)
+            samples = np.asarray(signal.samples)
+            unit = getattr(signal, 'unit', '') or ''
+
+        if samples.dtype.hasobject:
+            raise TypeError(f"Channel {channel} is not numeric")
+
+        shared = SharedSignal(channel, timestamps, samples, unit)
+        session_store.publish('signal', _published_key(key), shared.descriptor())
+        return self._add(key, shared)
+
+    def _add(self, key, shared):
+        with self._lock:
+            self._signals[key] = shared
+            self._enforce_budget()
+        return shared
+
+    def peek(self, file_path, channel):
+        """Return the SharedSignal for a channel if it is already decoded."""
+        key = (file_fingerprint(file_path), channel)
+        with self._lock:
+            return self._signals.get(key)
+
+    def _enforce_budget(self):
+        total = sum(s.nbytes for s in self._signals.values())
+        while len(self._signals) > 1 and total > self.max_bytes:
+            key, oldest = self._signals.popitem(last=False)
+            total -= oldest.nbytes
+            _forget(key, oldest)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'signals': len(self._signals),
+                'bytes': sum(s.nbytes for s in self._signals.values())
+            }
+
+    def release_all(self):
+        with self._lock:
+            for key, shared in self._signals.items():
+                _forget(key, shared)
+            self._signals.clear()
+
+
+def attach_signal(descriptor):
+    """Return (blocks, timestamps, samples) for a SharedSignal or MappedSignal descriptor.
+
+    Keep the blocks referenced while the arrays are used.
+    """
+    if descriptor.get('mapped'):
+        mapped = read_mapped(descriptor['mapped'], descriptor['channel'])
+        if mapped is None:
+            raise ValueError(f"{descriptor['mapped']} can no longer be mapped")
+        return [], mapped[0], mapped[1]
+    timestamps_block, timestamps = attach_array(descriptor['timestamps'])
+    samples_block, samples = attach_array(descriptor['samples'])
+    return [timestamps_block, samples_block], timestamps, samples
+
+
+def attach_array(spec):
+    """Map an array described by a SharedSignal descriptor into this process.
+
+    Returns (block, array); keep the block referenced while the array is used.
+    """
+    name, dtype, shape = spec
+    # Kernels are spawned from the Dash process and share its resource
+    # tracker, so attaching here does not hand ownership to this process
+    block = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return block, array
+
+
+# Shared store used by the plot engine and console kernels
+shared_signals = SharedSignalStore()
+atexit.register(shared_signals.release_all)
+
+registry.gauge('logscope_shared_signal_bytes', 'Bytes of decoded channels in shared memory',
+               function=lambda: shared_signals.stats()['bytes'])
@@ -0,0 +1,469 @@
+"""
+Upload storage helpers: the shared upload directory, chunked resumable
+uploads streamed straight to disk, and a content-addressed store that keeps
+each distinct upload once for as long as a session uses it.
+"""
+
+import base64
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows serves from a single process
+    fcntl = None
+
+from utils.mdf_cache import mdf_cache
+from utils.metrics import registry
+from utils.session_store import session_store
+
+
+# Bytes read from the request stream per write, bounds server memory per chunk
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+SUPPORTED_EXTENSIONS = ('.mdf', '.mf4', '.dat')
+
+UPLOAD_DIR = os.environ.get('LOGSCOPE_UPLOAD_DIR',
+                            os.path.join(tempfile.gettempdir(), 'logscope_uploads'))
+
+# Disk budget for stored uploads; unreferenced ones are evicted oldest-use first
+UPLOAD_STORE_BYTES = int(os.environ.get('LOGSCOPE_UPLOAD_STORE_MB', 10240)) * 1024 * 1024
+
+# Sessions not seen for this long give up their references
+SESSION_LEASE_SECONDS = float(os.environ.get('LOGSCOPE_UPLOAD_LEASE_HOURS', 24)) * 3600
+
+# Abandoned partial uploads are removed after this long
+PARTIAL_MAX_AGE_SECONDS = 24 * 3600
+
+JANITOR_INTERVAL_SECONDS = float(os.environ.get('LOGSCOPE_UPLOAD_JANITOR_SECONDS', 300))
+
+_UPLOAD_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]{8,64}$')
+
+# upload_id -> {'filename', 'total', 'path', 'digest'} for finished uploads
+_completed_uploads = {}
+# upload_id -> (sha256 object, bytes hashed) for uploads in progress
+_upload_hashes = {}
+# upload_ids with a chunk being written by this process
+_writing = set()
+_uploads_lock = threading.Lock()
+
+
+def get_upload_dir():
+    """Return the upload directory, creating it if needed."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    return UPLOAD_DIR
+
+
+def hash_file(path):
+    """Return the sha256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """Uploads stored once per content hash, with per-session references.
+
+    Blobs live in blobs/{sha256}{ext} under the upload directory. Sessions
+    acquire the blobs they have loaded; a background janitor expires idle
+    sessions and evicts unreferenced blobs once the store exceeds its budget.
+    """
+
+    def __init__(self, max_bytes=UPLOAD_STORE_BYTES, lease_seconds=SESSION_LEASE_SECONDS):
+        self.max_bytes = max_bytes
+        self.lease_seconds = lease_seconds
+        self._blobs = OrderedDict()  # digest -> {'path', 'size'}, least recently used first
+        self._refs = {}              # digest -> set of holders
+        self._holders = {}           # holder -> {'digests': set, 'seen': monotonic time}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._janitor = None
+        self._evict_hooks = []
+
+    def blob_dir(self):
+        path = os.path.join(get_upload_dir(), 'blobs')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _load_index(self):
+        """Pick up blobs left by an earlier run, oldest access first."""
+        if self._loaded:
+            return
+        self._loaded = True
+        found = []
+        for name in os.listdir(self.blob_dir()):
+            digest, ext = os.path.splitext(name)
+            if ext.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            path = os.path.join(self.blob_dir(), name)
+            try:
+                stats = os.stat(path)
+            except OSError:
+                continue
+            found.append((stats.st_atime, digest, path, stats.st_size))
+        for _, digest, path, size in sorted(found):
+            self._blobs[digest] = {'path': path, 'size': size}
+
+    def _digest_for(self, path):
+        digest, _ = os.path.splitext(os.path.basename(path))
+        entry = self._blobs.get(digest)
+        if entry is None and os.path.dirname(os.path.realpath(path)) == \
+                os.path.realpath(self.blob_dir()):
+            # Stored by another server process after this one read the index
+            try:
+                entry = self._blobs[digest] = {'path': path, 'size': os.path.getsize(path)}
+            except OSError:
+                return None
+        if entry and os.path.realpath(entry['path']) == os.path.realpath(path):
+            return digest
+        return None
+
+    def _touch(self, digest):
+        """Mark a blob as used; only atime changes so cache keys stay valid."""
+        self._blobs.move_to_end(digest)
+        path = self._blobs[digest]['path']
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
+
+    def commit(self, temp_path, digest, filename):
+        """Move a fully written upload into the store and return its blob path.
+
+        If the same content is already stored, the new copy is dropped.
+        """
+        ext = os.path.splitext(filename)[1].lower()
+        self.start_janitor()
+        with self._lock:
+            self._load_index()
+            entry = self._blobs.get(digest)
+            if entry and os.path.exists(entry['path']):
+                os.remove(temp_path)
+                print(f"Upload {filename} already stored as {entry['path']}", flush=True)
+            else:
+                path = os.path.join(self.blob_dir(), f"{digest}{ext}")
+                os.replace(temp_path, path)
+                entry = {'path': path, 'size': os.path.getsize(path)}
+                self._blobs[digest] = entry
+            self._touch(digest)
+            return entry['path']
+
+    def acquire(self, path, holder):
+        """Record that a holder (session) uses a stored upload. Other paths are ignored."""
+        with self._lock:
+            self._load_index()
+            digest = self._digest_for(path)
+            if digest is None:
+                return
+            self._refs.setdefault(digest, set()).add(holder)
+            record = self._holders.setdefault(holder, {'digests': set(), 'seen': 0})
+            record['digests'].add(digest)
+            record['seen'] = time.monotonic()
+            self._touch(digest)
+
+    def touch_holder(self, holder):
+        """Extend a holder's lease."""
+        with self._lock:
+            record = self._holders.get(holder)
+            if record:
+                record['seen'] = time.monotonic()
+                for digest in record['digests']:
+                    if digest in self._blobs:
+                        self._touch(digest)
+
+    def release(self, path, holder, remove_unused=False):
+        """Drop a holder's reference to a stored upload.
+
+        With remove_unused=True the blob is deleted straight away if nobody
+        else holds it, e.g. after it failed to load.
+        """
+        with self._lock:
+            digest = self._digest_for(path)
+            if digest is None:
+                return
+            self._drop_ref(digest, holder)
+            if remove_unused and not self._refs.get(digest):
+                self._remove_blob(digest)
+
+    def _drop_ref(self, digest, holder):
+        holders = self._refs.get(digest)
+        if holders:
+            holders.discard(holder)
+            if not holders:
+                del self._refs[digest]
+        record = self._holders.get(holder)
+        if record:
+            record['digests'].discard(digest)
+            if not record['digests']:
+                del self._holders[holder]
+
+    def on_evict(self, callback):
+        """Call callback(path) before a blob is deleted, to drop data derived from it."""
+        self._evict_hooks.append(callback)
+
+    def _remove_blob(self, digest):
+        entry = self._blobs.pop(digest, None)
+        if entry is None:
+            return
+        mdf_cache.evict_file(entry['path'])
+        for callback in self._evict_hooks:
+            try:
+                callback(entry['path'])
+            except Exception as e:
+                print(f"Error cleaning up after {entry['path']}: {e}", flush=True)
+        try:
+            os.remove(entry['path'])
+            print(f"Removed stored upload: {entry['path']}", flush=True)
+        except OSError:
+            pass
+
+    def sweep(self):
+        """Expire idle holders, evict unreferenced blobs over budget and old partials."""
+        now = time.monotonic()
+        with self._lock:
+            self._load_index()
+            for holder, record in list(self._holders.items()):
+                if now - record['seen'] > self.lease_seconds:
+                    for digest in list(record['digests']):
+                        self._drop_ref(digest, holder)
+
+            total = sum(entry['size'] for entry in self._blobs.values())
+            for digest in list(self._blobs):
+                if total <= self.max_bytes:
+                    break
+                if self._refs.get(digest) or self._leased_elsewhere(digest):
+                    continue
+                total -= self._blobs[digest]['size']
+                self._remove_blob(digest)
+
+        _remove_stale_partials()
+        _forget_abandoned_hashes()
+
+    def _leased_elsewhere(self, digest):
+        """True if another server process may still hold a blob.
+
+        Holders are tracked per process; with several processes a blob used
+        within the lease period (its atime) is kept.
+        """
+        if not session_store.shared:
+            return False
+        try:
+            return time.time() - os.stat(self._blobs[digest]['path']).st_atime < self.lease_seconds
+        except OSError:
+            return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'blobs': len(self._blobs),
+                'bytes': sum(entry['size'] for entry in self._blobs.values()),
+                'referenced': len(self._refs),
+                'holders': len(self._holders)
+            }
+
+    def start_janitor(self):
+        """Start the background sweep once per process."""
+        with self._lock:
+            if self._janitor is None:
+                self._janitor = threading.Thread(target=self._janitor_loop,
+                                                 name='upload-janitor', daemon=True)
+                self._janitor.start()
+
+    def _janitor_loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error during upload cleanup: {e}", flush=True)
+            time.sleep(JANITOR_INTERVAL_SECONDS)
+
+
+def _remove_stale_partials():
+    """Remove abandoned partial uploads and files left by the old flat layout."""
+    upload_dir = get_upload_dir()
+    cutoff = time.time() - PARTIAL_MAX_AGE_SECONDS
+    for name in os.listdir(upload_dir):
+        if not name.lower().endswith(SUPPORTED_EXTENSIONS + ('.part',)):
+            continue
+        path = os.path.join(upload_dir, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                mdf_cache.evict_file(path)
+                os.remove(path)
+                print(f"Cleaned up old upload: {name}", flush=True)
+        except OSError:
+            pass
+
+
+def _forget_abandoned_hashes():
+    """Drop running hashes of uploads whose partial file is gone."""
+    with _uploads_lock:
+        for upload_id in list(_upload_hashes):
+            if upload_id not in _writing and not os.path.exists(_partial_path(upload_id)):
+                del _upload_hashes[upload_id]
+
+
+def validate_upload_request(upload_id, filename):
+    """Return an error message for an invalid upload request, or None."""
+    if not upload_id or not _UPLOAD_ID_PATTERN.match(upload_id):
+        return "Invalid upload id"
+    if not filename or not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        return f"Only MDF files are supported (got {filename})"
+    return None
+
+
+def _partial_path(upload_id):
+    return os.path.join(get_upload_dir(), f"{upload_id}.part")
+
+
+def received_bytes(upload_id):
+    """Return how many bytes of an upload are already on disk."""
+    with _uploads_lock:
+        return _received_bytes(upload_id)
+
+
+def _received_bytes(upload_id):
+    completed = _completed_uploads.get(upload_id) or session_store.published('upload', upload_id)
+    if completed:
+        return completed['total']
+    try:
+        return os.path.getsize(_partial_path(upload_id))
+    except OSError:
+        return 0
+
+
+def write_chunk(upload_id, filename, offset, total, stream):
+    """Append one chunk from a file-like stream to a partial upload.
+
+    Returns a dict with the number of bytes received so far and, once the
+    upload is complete, the final path. A chunk whose offset does not match
+    the bytes already on disk is rejected so the client can resume from the
+    reported position.
+    """
+    # A retried chunk may arrive while the first attempt is still writing;
+    # only one writer per upload checks the offset and appends
+    with _uploads_lock:
+        current = _received_bytes(upload_id)
+        if upload_id in _writing or offset != current:
+            return {'received': current, 'complete': False, 'mismatch': True}
+        _writing.add(upload_id)
+    try:
+        return _append_chunk(upload_id, filename, offset, total, stream)
+    finally:
+        with _uploads_lock:
+            _writing.discard(upload_id)
+
+
+def _append_chunk(upload_id, filename, current, total, stream):
+    part_path = _partial_path(upload_id)
+
+    # Hash while streaming; a resume after a restart rehashes from disk at the end
+    with _uploads_lock:
+        digest, hashed = _upload_hashes.get(upload_id, (None, 0))
+        if digest is None and current == 0:
+            digest = hashlib.sha256()
+        if hashed != current:
+            digest = None
+
+    with open(part_path, 'ab') as f:
+        if fcntl is not None:
+            # Other server processes may be handed a retry of the same chunk
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return {'received': current, 'complete': False, 'mismatch': True}
+        on_disk = os.fstat(f.fileno()).st_size
+        if on_disk != current:
+            return {'received': on_disk, 'complete': False, 'mismatch': True}
+        while True:
+            block = stream.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            f.write(block)
+            if digest is not None:
+                digest.update(block)
+            current += len(block)
+            if current > total:
+                break
+
+    if current > total:
+        os.remove(part_path)
+        with _uploads_lock:
+            _upload_hashes.pop(upload_id, None)
+        return {'received': 0, 'complete': False, 'error': 'Upload exceeds declared size'}
+
+    if current < total:
+        if digest is not None:
+            with _uploads_lock:
+                _upload_hashes[upload_id] = (digest, current)
+        return {'received': current, 'complete': False}
+
+    with _uploads_lock:
+        _upload_hashes.pop(upload_id, None)
+    hex_digest = digest.hexdigest() if digest is not None else hash_file(part_path)
+    final_path = content_store.commit(part_path, hex_digest, filename)
+    completed = {
+        'filename': os.path.basename(filename),
+        'total': total,
+        'path': final_path,
+        'digest': hex_digest
+    }
+    with _uploads_lock:
+        _completed_uploads[upload_id] = completed
+    # The load callback may run in another server process
+    session_store.publish('upload', upload_id, completed)
+
+    print(f"Chunked upload saved to: {final_path}", flush=True)
+    return {'received': current, 'complete': True}
+
+
+def save_base64_upload(contents, filename):
+    """Decode a dcc.Upload data URL into the content store and return its path.
+
+    The payload is decoded and hashed in blocks so only one copy of the
+    decoded file is ever written.
+    """
+    _, encoded = contents.split(',', 1)
+    part_path = os.path.join(get_upload_dir(), f"b64-{os.getpid()}-{time.time_ns()}.part")
+    digest = hashlib.sha256()
+    # Whole base64 quanta per block so each slice decodes on its own
+    step = STREAM_BLOCK_SIZE // 3 * 4
+    try:
+        with open(part_path, 'wb') as f:
+            for start in range(0, len(encoded), step):
+                block = base64.b64decode(encoded[start:start + step])
+                digest.update(block)
+                f.write(block)
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return content_store.commit(part_path, digest.hexdigest(), filename)
+
+
+def pop_completed_upload(upload_id):
+    """Return and forget the record of a finished upload."""
+    with _uploads_lock:
+        completed = _completed_uploads.pop(upload_id, None)
+    completed = completed or session_store.published('upload', upload_id)
+    session_store.unpublish('upload', upload_id)
+    return completed
+
+
+# Shared store used by the upload routes and file callbacks
+content_store = ContentStore()
+
+registry.gauge('logscope_upload_store_bytes', 'Bytes of uploaded files kept in the content store',
+               function=lambda: content_store.stats()['bytes'])
+registry.gauge('logscope_upload_store_blobs', 'Files kept in the content store',
+               function=lambda: content_store.stats()['blobs'])
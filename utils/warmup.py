@@ -0,0 +1,49 @@
+"""
+Background warm-up of heavy imports.
+The first page is served without asammdf or pyarrow; this thread imports them
+shortly after startup so the first file load does not pay for them either.
+"""
+
+import importlib
+import os
+import threading
+import time
+
+from utils.metrics import span
+
+
+WARMUP_ENABLED = os.environ.get('LOGSCOPE_WARMUP', '1').lower() in ('1', 'true', 'yes')
+
+# Give the first page requests a head start before importing in the background
+WARMUP_DELAY_SECONDS = float(os.environ.get('LOGSCOPE_WARMUP_DELAY', 2.0))
+
+WARMUP_MODULES = ('asammdf', 'pyarrow')
+
+
+def import_module_timed(name):
+    """Import a module and return the seconds it took, or None if it is missing."""
+    start = time.perf_counter()
+    try:
+        with span(f'import:{name}'):
+            importlib.import_module(name)
+    except ImportError:
+        return None
+    return time.perf_counter() - start
+
+
+def _warm_up(modules, delay):
+    time.sleep(delay)
+    for name in modules:
+        seconds = import_module_timed(name)
+        if seconds is not None:
+            print(f"Warm-up imported {name} in {seconds:.2f}s", flush=True)
+
+
+def start_warmup(modules=WARMUP_MODULES, delay=WARMUP_DELAY_SECONDS):
+    """Import heavy modules on a daemon thread unless LOGSCOPE_WARMUP=0."""
+    if not WARMUP_ENABLED:
+        return None
+    thread = threading.Thread(target=_warm_up, args=(modules, delay), name='import-warmup',
+                              daemon=True)
+    thread.start()
+    return thread